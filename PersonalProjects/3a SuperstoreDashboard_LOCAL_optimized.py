@@ -1,40 +1,87 @@
 import dash
-from dash import dcc, html
+from dash import dcc, html, ClientsideFunction
 from dash.dependencies import Input, Output, State
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from plotly.io.json import to_json_plotly
 import pytz
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
+from background_jobs import (POLL_INTERVAL, Uncacheable, coalesce, create_manager, extend_fingerprint, files_fingerprint,
+                             frame_fingerprint, uncached)
+from callback_metrics import instrument_callbacks, phase, pooled, registry
+from health import add_probes
+from kpi_engine import (DISTINCT_MODE, KPI_MEASURES, calculate_metrics, count_distinct, derive_kpis, distinct_states,
+                        merge_distinct, merge_kpi_summaries, merge_states, summarize_kpis)
 
 # Constants
 DATA_URL = 'https://raw.githubusercontent.com/ANK002X/Datasets/main/superstore.csv'
+DATA_SOURCE = os.environ.get('SUPERSTORE_SOURCE', DATA_URL)
+SNAPSHOT_PATH = os.environ.get('SUPERSTORE_SNAPSHOT', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'superstore.parquet'))
+SHARED_DATA = os.environ.get('SUPERSTORE_SHARED_DATA')  # set by serve.py for its worker processes
+DATE_FORMAT = '%Y-%m-%d'
 TIMEZONE = 'US/Eastern'
+FIGURE_CACHE_SIZE = 32
+REFRESH_INTERVAL = int(os.environ.get('SUPERSTORE_REFRESH_SECONDS', 60))
+QUERY_BACKEND = os.environ.get('SUPERSTORE_QUERY_BACKEND', 'pandas')  # 'pandas' or 'duckdb'
+QUERY_THREADS = int(os.environ.get('SUPERSTORE_QUERY_THREADS', os.cpu_count() or 1))
+FIGURE_EXECUTOR = os.environ.get('SUPERSTORE_FIGURE_EXECUTOR', 'thread')  # 'thread', 'process' or 'serial'
+FIGURE_WORKERS = int(os.environ.get('SUPERSTORE_FIGURE_WORKERS', 6))
+FIGURE_TIMEOUT = float(os.environ.get('SUPERSTORE_FIGURE_TIMEOUT', 30))
+SCATTER_POINT_BUDGET = int(os.environ.get('SUPERSTORE_SCATTER_BUDGET', 5000))
+SCATTER_BINS = 60
+READY_POLL_INTERVAL = 1000  # milliseconds between the loading screen's checks for the data
+RENDER_MODE = os.environ.get('SUPERSTORE_RENDER_MODE', 'server')  # 'server' or 'client' (assets/superstore.js)
+# Payload mode per scatter chart once it exceeds the point budget: 'raw', 'sample' or 'density'
+SCATTER_MODES = {
+    'year-sales-profit': os.environ.get('SUPERSTORE_SCATTER_MODE', 'sample'),
+}
 
-# Load and preprocess the dataset
-def load_data():
-    data = pd.read_csv(DATA_URL)
-    data['Order.Date'] = pd.to_datetime(data['Order.Date'])
-    data['Ship.Date'] = pd.to_datetime(data['Ship.Date'])
+def parse_dates(column):
+    try:
+        return pd.to_datetime(column, format=DATE_FORMAT)
+    except ValueError:
+        return pd.to_datetime(column)
+
+# Type the raw CSV rows into the frame the dashboard works on
+def type_frame(data):
+    data['Order.Date'] = parse_dates(data['Order.Date'])
+    data['Ship.Date'] = parse_dates(data['Ship.Date'])
     data['Month'] = data['Order.Date'].dt.month
     data['Year'] = data['Order.Date'].dt.year
     data['shippingTime'] = (data['Ship.Date'] - data['Order.Date']).dt.days
+    string_columns = data.select_dtypes(include='object').columns
+    data[string_columns] = data[string_columns].astype('category')
     return data
 
-data = load_data()
+def read_source(source=DATA_SOURCE):
+    return type_frame(pd.read_csv(source))
 
-# Calculate key metrics
-def calculate_metrics(data):
-    current_year = data['Year'].max()
-    previous_year = current_year - 1
-    total_sales = data[data['Year'] == current_year]['Sales'].sum()
-    total_orders = data[data['Year'] == current_year]['Order.ID'].nunique()
-    total_products_sold = data[data['Year'] == current_year]['Quantity'].sum()
-    previous_year_sales = data[data['Year'] == previous_year]['Sales'].sum()
-    sales_growth = ((total_sales - previous_year_sales) / previous_year_sales) * 100
-    return total_sales, total_orders, total_products_sold, sales_growth
+# Convert the CSV once into a local Parquet snapshot (delete the file to re-ingest)
+def ingest_snapshot(source=DATA_SOURCE, path=SNAPSHOT_PATH):
+    data = read_source(source)
+    data.to_parquet(path, index=False)
+    return data
 
-total_sales, total_orders, total_products_sold, sales_growth = calculate_metrics(data)
+# Load the dataset from the snapshot, ingesting it on first start; serve.py workers attach to the
+# frame the server process exported to shared memory instead
+def load_data():
+    if SHARED_DATA:
+        from shared_frame import attach_frame
+        return attach_frame(SHARED_DATA)
+    if os.path.exists(SNAPSHOT_PATH):
+        return pd.read_parquet(SNAPSHOT_PATH, memory_map=True)
+    try:
+        return ingest_snapshot()
+    except ImportError as e:
+        print("Snapshot disabled, reading CSV directly:", str(e))
+        return read_source()
 
 # Get current time in EDT
 def get_current_time():
@@ -51,12 +98,337 @@ country_to_continent = {
     # ... (rest of the mapping)
 }
 
-# Mapping the countries to the respective continents
-data['Continent'] = data['Country'].map(country_to_continent)
+# Target dtypes for the compaction pass; money columns stay float64 so the cube totals keep full precision
+COMPACT_SCHEMA = {
+    'category': ['Country', 'Category', 'Sub.Category', 'Segment', 'Ship.Mode', 'Order.ID', 'Continent'],
+    'integer': ['Row.ID', 'Year', 'Month', 'Quantity', 'shippingTime'],
+    'float': ['Discount'],
+}
+
+# Convert low-cardinality columns to categoricals and downcast numerics, reporting bytes per column
+def compact_frame(data, schema=COMPACT_SCHEMA):
+    before = data.memory_usage(index=False, deep=True)
+    for kind, columns in schema.items():
+        for column in columns:
+            if column not in data.columns:
+                continue
+            if kind == 'category':
+                data[column] = data[column].astype('category')
+            else:
+                data[column] = pd.to_numeric(data[column], downcast=kind)
+    after = data.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({'before': before, 'after': after})
+    report['saved'] = report['before'] - report['after']
+    return data, report
+
+# Mapping the countries to the respective continents and compacting the frame
+def prepare_data(data):
+    data['Continent'] = data['Country'].map(country_to_continent)
+    return compact_frame(data)
+
+# Pre-aggregated cube the chart builders read from instead of the raw rows
+CUBE_DIMENSIONS = ['Year', 'Month', 'Category', 'Sub.Category', 'Segment', 'Ship.Mode', 'Continent']
+CUBE_MEASURES = {'Sales': 'sum', 'Profit': 'sum', 'Quantity': 'sum', 'Shipping.Cost': 'sum',
+                 'shippingTime': 'sum', 'Order.ID': 'count'}
+
+def build_cube(data):
+    # dropna=False keeps rows whose country has no continent mapping in the year totals
+    cube = data.groupby(CUBE_DIMENSIONS, dropna=False, observed=True).agg(CUBE_MEASURES).reset_index()
+    return cube.rename(columns={'Order.ID': 'Orders'})
+
+# Per-year Sales/Profit points for the row-level scatter, the only chart the cube cannot serve
+def build_year_points(data):
+    return {year: frame[['Sales', 'Profit']].reset_index(drop=True) for year, frame in data.groupby('Year', observed=True)}
+
+# DuckDB backend: the per-year chart queries run as SQL over the Parquet snapshot instead of the
+# in-memory cube. Only the queried columns are read and the Year filter is pushed down to the
+# snapshot's row groups. The KPI tiles are queried too, so no frame is held in memory; the
+# appended-rows refresh only runs on the in-memory path
+def connect_snapshot(backend=QUERY_BACKEND):
+    if backend != 'duckdb':
+        return None
+    if not os.path.exists(SNAPSHOT_PATH):
+        print("DuckDB backend disabled, no snapshot at", SNAPSHOT_PATH)
+        return None
+    try:
+        import duckdb
+    except ImportError as e:
+        print("DuckDB backend disabled, querying in memory:", str(e))
+        return None
+    connection = duckdb.connect()
+    connection.execute(f'SET threads TO {QUERY_THREADS}')
+    connection.execute('CREATE TABLE continents ("Country" VARCHAR, "Continent" VARCHAR)')
+    connection.executemany('INSERT INTO continents VALUES (?, ?)', list(country_to_continent.items()))
+    return connection
+
+def query(sql, parameters=()):
+    # A cursor per query, since renders run on several threads
+    return query_connection.cursor().execute(sql, parameters).df()
+
+def quoted(column):
+    return f'"{column}"'
+
+CUBE_AGGREGATES = {'sum': 'SUM', 'count': 'COUNT'}
+CUBE_QUERY = (
+    f"SELECT {', '.join(quoted(column) for column in CUBE_DIMENSIONS)}, "
+    + ', '.join(f"{CUBE_AGGREGATES[how]}({quoted(column)}) AS {quoted('Orders' if column == 'Order.ID' else column)}"
+                for column, how in CUBE_MEASURES.items())
+    + ' FROM read_parquet($path) LEFT JOIN continents USING ("Country") WHERE "Year" = $year GROUP BY ALL'
+)
+
+# The registered KPI measures per year, year-to-date up to the latest order date, in one scan
+KPI_AGGREGATES = {'sum': 'SUM({})', 'count': 'COUNT({})',
+                  'nunique': 'approx_count_distinct({})' if DISTINCT_MODE == 'hll' else 'COUNT(DISTINCT {})'}
+MONTH_DAY = 'month("Order.Date") * 100 + day("Order.Date")'
+KPI_QUERY = (
+    'SELECT "Year", '
+    + ', '.join(f"{KPI_AGGREGATES[how].format(quoted(column))} AS {name}" for name, (column, how) in KPI_MEASURES.items())
+    + f' FROM read_parquet($path) WHERE {MONTH_DAY} <= (SELECT max({MONTH_DAY}) FROM read_parquet($path)'
+    + ' WHERE "Year" = (SELECT max("Year") FROM read_parquet($path))) GROUP BY "Year" ORDER BY "Year"'
+)
+
+def query_metrics():
+    kpis = derive_kpis(query(KPI_QUERY, {'path': SNAPSHOT_PATH}).set_index('Year'))
+    return kpis.loc[kpis.index.max()]
+
+def query_years():
+    return query('SELECT DISTINCT "Year" FROM read_parquet($path) ORDER BY "Year"', {'path': SNAPSHOT_PATH})['Year'].tolist()
+
+# Distinct orders per Year x Month x Continent partition; year and region totals merge these
+ORDER_PARTITIONS = ['Year', 'Month', 'Continent']
+
+def build_order_partitions(data):
+    return distinct_states(data, ORDER_PARTITIONS, 'Order.ID')
+
+@phase('pandas')
+def orders_by_continent(order_partitions, year):
+    if query_connection is not None:
+        distinct = 'approx_count_distinct("Order.ID")' if DISTINCT_MODE == 'hll' else 'COUNT(DISTINCT "Order.ID")'
+        orders = query(f'SELECT "Continent", {distinct} AS orders FROM read_parquet($path) JOIN continents USING ("Country") '
+                       'WHERE "Year" = $year GROUP BY ALL ORDER BY "Continent"', {'path': SNAPSHOT_PATH, 'year': year})
+        return orders.set_index('Continent')['orders'].astype('int64').rename_axis(None)
+    year_partitions = order_partitions[order_partitions.index.get_level_values('Year') == year]
+    return pd.Series({continent: count_distinct(merge_distinct(states))
+                      for continent, states in year_partitions.groupby(level='Continent')}, dtype='int64')
+
+@phase('pandas')
+def cube_for_year(cube, year):
+    if query_connection is not None:
+        return query(CUBE_QUERY, {'path': SNAPSHOT_PATH, 'year': year})
+    return cube[cube['Year'] == year]
+
+@phase('pandas')
+def points_for_year(year_points, year):
+    if query_connection is not None:
+        return query('SELECT "Sales", "Profit" FROM read_parquet($path) WHERE "Year" = $year',
+                     {'path': SNAPSHOT_PATH, 'year': year})
+    return year_points.get(year, pd.DataFrame(columns=['Sales', 'Profit']))
+
+# Dataset state, filled in by load_state on a background thread so the server binds before the
+# data is read; the dashboard layout is served once data_ready is set
+data = compaction_report = cube = year_points = kpi_summary = metrics = order_partitions = query_connection = None
+data_ready = threading.Event()
+load_error = None
+loader = None
 
-# Initialize the Dash app
-app = dash.Dash(__name__)
-app.title = "Global Superstore Dashboard"
+# Plotly imports its validators lazily on first use and that import is not thread-safe, so
+# concurrent first renders fail with 'Invalid value'. Every trace type the builders use is built
+# once here, under a lock, before the figure pool ever runs
+plotly_lock = threading.Lock()
+plotly_warm = False
+
+def warm_plotly():
+    global px, go, plotly_warm
+    with plotly_lock:
+        if plotly_warm:
+            return
+        # Plotly Express is the slowest import; the figure builders only run once the data is in
+        import plotly.express as px
+        import plotly.graph_objects as go
+        sample = pd.DataFrame({'Group': ['a', 'b'], 'Item': ['c', 'd'], 'Month': [1, 2], 'Value': [1.0, 2.0]})
+        figures = [
+            px.area(sample, x='Month', y=['Value'], color_discrete_sequence=px.colors.sequential.Plasma),
+            px.sunburst(sample, path=['Group', 'Item'], values='Value', color='Value', color_continuous_scale='RdBu'),
+            px.treemap(sample, path=['Group', 'Item'], values='Value', color='Value', color_continuous_scale='Redor'),
+            px.scatter(sample, x='Month', y='Value', size='Value', color='Group', size_max=60),
+            px.funnel(sample, x='Value', y='Group', color='Value'),
+            px.line(sample, x='Month', y='Value'),
+            px.bar(sample, x='Group', y='Value'),
+            px.pie(sample, values='Value', names='Group'),
+            go.Figure(go.Waterfall(x=sample['Group'], y=sample['Value'], connector={'line': {'color': 'rgb(63, 63, 63)'}})),
+            go.Figure(go.Heatmap(x=[1], y=[1], z=[[1]], colorscale='Plasma', colorbar={'title': 'Orders'})),
+            placeholder_figure('warm-up', 'none'),
+        ]
+        to_json_plotly(figures)
+        plotly_warm = True
+
+def load_state():
+    global data, compaction_report, cube, year_points, kpi_summary, metrics, order_partitions, query_connection
+    global data_version, load_error
+    try:
+        warm_plotly()
+        if QUERY_BACKEND == 'duckdb' and not os.path.exists(SNAPSHOT_PATH):
+            # The queries run over the snapshot, so the first start writes it from the source
+            try:
+                ingest_snapshot()
+            except ImportError as e:
+                print("Snapshot disabled, cannot query it:", str(e))
+        query_connection = connect_snapshot()
+        if query_connection is not None:
+            # Every chart and the KPI tiles are queried from the snapshot, so the frame, the cube
+            # and the KPI and order partitions are never built in memory
+            metrics = query_metrics()
+            data_version = files_fingerprint([SNAPSHOT_PATH])
+        else:
+            new_data, compaction_report = prepare_data(load_data())
+            print("Memory compaction (bytes):")
+            print(compaction_report.to_string())
+            cube = build_cube(new_data)
+            year_points = build_year_points(new_data)
+            kpi_summary = summarize_kpis(new_data)
+            metrics = calculate_metrics(kpi_summary)
+            order_partitions = build_order_partitions(new_data)
+            data_version = frame_fingerprint(new_data)
+            data = new_data
+        if RENDER_MODE == 'client':
+            warm_client_views()
+        else:
+            warm_background_jobs()
+    except Exception as e:
+        print("Error loading data:", str(e))
+        load_error = str(e)
+    # Set only once the warm-up is done, so /readyz and the first requests never race it
+    data_ready.set()
+
+def start_loading():
+    global loader
+    if loader is None:
+        loader = threading.Thread(target=load_state, name='superstore-load', daemon=True)
+        loader.start()
+    return loader
+
+def readiness():
+    if load_error is not None:
+        return False, f"data failed to load: {load_error}"
+    if not data_ready.is_set():
+        return False, "loading data"
+    return True, f"{len(data)} rows loaded" if data is not None else f"querying {SNAPSHOT_PATH}"
+
+# Fingerprint of the dataset being served, set on load and on every refresh. It keys the rendered
+# dashboards, including the background job results kept on disk across restarts, so it is taken
+# from the data itself rather than counted per process
+data_version = None
+data_lock = threading.Lock()
+
+def publish_data(new_data, new_cube, new_year_points, new_kpi_summary, new_order_partitions, new_version):
+    global data, cube, year_points, kpi_summary, order_partitions, metrics, data_version, timeVar
+    new_metrics = calculate_metrics(new_kpi_summary)
+    with data_lock:
+        data, cube, year_points, kpi_summary = new_data, new_cube, new_year_points, new_kpi_summary
+        order_partitions = new_order_partitions
+        metrics = new_metrics
+        timeVar = get_current_time()
+        data_version = new_version
+    render_dashboard.cache_clear()
+
+def reload_data():
+    new_data, _ = prepare_data(load_data())
+    publish_data(new_data, build_cube(new_data), build_year_points(new_data), summarize_kpis(new_data),
+                 build_order_partitions(new_data), frame_fingerprint(new_data))
+
+# Concatenate frames while keeping categorical columns categorical
+def concat_frames(left, right):
+    left, right = left.copy(deep=False), right.copy(deep=False)
+    for column in left.select_dtypes(include='category').columns:
+        if column not in right.columns:
+            continue
+        right_values = right[column].astype('category')
+        new_categories = right_values.cat.categories.difference(left[column].cat.categories)
+        left[column] = left[column].cat.add_categories(new_categories)
+        right[column] = right_values.cat.set_categories(left[column].cat.categories)
+    return pd.concat([left, right], ignore_index=True)
+
+def merge_cubes(cube, delta_cube):
+    merged = concat_frames(cube, delta_cube)
+    return merged.groupby(CUBE_DIMENSIONS, dropna=False, observed=True).sum().reset_index()
+
+# Byte offset just past the given number of data rows, so only appended rows get parsed
+def find_row_offset(path, rows):
+    newlines_needed = rows + 1  # header line
+    offset = 0
+    with open(path, 'rb') as source:
+        for block in iter(lambda: source.read(1 << 20), b''):
+            count = block.count(b'\n')
+            if count < newlines_needed:
+                newlines_needed -= count
+                offset += len(block)
+                continue
+            position = -1
+            for _ in range(newlines_needed):
+                position = block.index(b'\n', position + 1)
+            return offset + position + 1
+    return offset
+
+def read_appended_rows(path, offset, columns):
+    size = os.path.getsize(path)
+    if size <= offset:
+        return None, offset
+    with open(path, 'rb') as source:
+        source.seek(offset)
+        chunk = source.read(size - offset)
+    # Leave a partially written last line for the next poll
+    end = chunk.rfind(b'\n') + 1
+    if end == 0:
+        return None, offset
+    delta = pd.read_csv(io.BytesIO(chunk[:end]), header=None, names=columns)
+    return type_frame(delta), offset + end
+
+# Folds parsed appended rows into the frame, cube, points, KPIs and order partitions; only the
+# new rows are aggregated and hashed
+def append_rows(delta):
+    delta, _ = prepare_data(delta)
+    new_data = concat_frames(data, delta)
+    new_year_points = dict(year_points)
+    for year, points in build_year_points(delta).items():
+        new_year_points[year] = pd.concat([year_points.get(year), points], ignore_index=True)
+    publish_data(new_data, merge_cubes(cube, build_cube(delta)), new_year_points,
+                 merge_kpi_summaries(kpi_summary, summarize_kpis(delta)),
+                 merge_states(pd.concat([order_partitions, build_order_partitions(delta)]), ORDER_PARTITIONS),
+                 extend_fingerprint(data_version, delta))
+
+# Background refresher: parses rows appended to a local source file and folds them into the cube and KPIs
+def refresh_forever(path=DATA_SOURCE, interval=REFRESH_INTERVAL):
+    data_ready.wait()
+    # Appended rows never reach the snapshot, so the DuckDB backend serves the snapshot as loaded
+    if load_error is not None or query_connection is not None:
+        return
+    columns = pd.read_csv(path, nrows=0).columns
+    offset = find_row_offset(path, len(data))
+    while True:
+        time.sleep(interval)
+        try:
+            delta, offset = read_appended_rows(path, offset, columns)
+            if delta is None or delta.empty:
+                continue
+            append_rows(delta)
+        except Exception as e:
+            print("Error refreshing data:", str(e))
+
+# Started only when the script is run directly. Under serve.py every worker derives its own cube
+# and KPIs from the shared frame, so a refresher in one process would leave the others stale; the
+# page's refresh interval is disabled wherever no refresher runs
+refresher = None
+
+def start_refresher():
+    global refresher
+    if not os.path.isfile(DATA_SOURCE):
+        return None
+    refresher = threading.Thread(target=refresh_forever, name='superstore-refresher', daemon=True)
+    refresher.start()
+    return refresher
+
+# Dashboard renders run as background jobs, with results cached per dataset fingerprint
+background_manager = create_manager('superstore')
 
 # Define the create_tile function
 def create_tile(title, value, *colors):
@@ -75,74 +447,110 @@ def create_tile(title, value, *colors):
         ]
     )
 
+def create_overview_tiles():
+    return [
+        create_tile("Sales YTD", f"${metrics['sales']/1_000_000:.1f}M", '#84F6D5', '#1CA8FF', '#5533FF', '#5E46BF'),
+        create_tile("Orders YTD", f"{metrics['orders']:.0f}", '#0575E6', '#021B79'),
+        create_tile("Products Sold YTD", f"{metrics['quantity']/1000:.1f}K", '#428bca', '#000000'),
+        create_tile("Sales Growth YTD", f"{metrics['sales_growth']:.2f}%", '#00b388', '#425563'),
+        create_tile("Profit Margin YTD", f"{metrics['profit_margin']:.1f}%", '#F7971E', '#C0392B'),
+        create_tile("Avg Shipping Time", f"{metrics['avg_shipping_time']:.1f} days", '#8E44AD', '#2C3E50'),
+    ]
+
 # Define the layout
-app.layout = html.Div(
-    style={'background-color': '#F0F0F0', 'padding': '20px', 'font-family': 'Calibri'},
-    children=[
-        html.Div(style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'center', 'color': '#34495E', 'font-family':'Calibri'},
-            children=[
-                html.Div(style={'flex': '1', 'textAlign': 'center'},
-                    children=[
-                        html.H1("Global Superstore Dashboard", style={'margin': '0'}),
-                    ]
-                ),
-                html.Span(f'{timeVar}', style={'font-weight':'bold'}),
-            ]
-        ),
+def dashboard_layout():
+    return html.Div(
+        style={'background-color': '#F0F0F0', 'padding': '20px', 'font-family': 'Calibri'},
+        children=[
+            html.Div(style={'display': 'flex', 'justifyContent': 'space-between', 'alignItems': 'center', 'color': '#34495E', 'font-family':'Calibri'},
+                children=[
+                    html.Div(style={'flex': '1', 'textAlign': 'center'},
+                        children=[
+                            html.H1("Global Superstore Dashboard", style={'margin': '0'}),
+                        ]
+                    ),
+                    html.Span(f'{timeVar}', id='header-time', style={'font-weight':'bold'}),
+                ]
+            ),
         
-        # Overview Tiles
-        html.Div(
-            style={'display': 'flex', 'justify-content': 'space-between', 'textAlign': 'center', 'width': '100%', 'color': 'Black', 'font-size': 24},
-            children=[
-                create_tile("Sales YTD", f"${total_sales/1_000_000:.1f}M", '#84F6D5', '#1CA8FF', '#5533FF', '#5E46BF'),
-                create_tile("Orders YTD", f"{total_orders}", '#0575E6', '#021B79'),
-                create_tile("Products Sold YTD", f"{total_products_sold/1000:.1f}K", '#428bca', '#000000'),
-                create_tile("Sales Growth YTD", f"{sales_growth:.2f}%", '#00b388', '#425563'),
-            ]
-        ),
+            # Overview Tiles
+            html.Div(
+                id='overview-tiles',
+                style={'display': 'flex', 'justify-content': 'space-between', 'textAlign': 'center', 'width': '100%', 'color': 'Black', 'font-size': 24},
+                children=create_overview_tiles()
+            ),
+            dcc.Interval(id='refresh-interval', interval=REFRESH_INTERVAL * 1000, disabled=refresher is None),
         
-        html.Br(),
+            html.Br(),
 
-        # Accordion for Dropdowns
-        html.Button("Dashboard Options", id="toggle-button", n_clicks=0, style={
-         'width': '99.8%', 'background-color': '#34495E', 'color': '#FFFFFF', 'border': 'none', 'padding': '10px 20px', 'cursor': 'pointer', 'font-size': '16px', 'border-radius': '5px', 'margin-bottom': '10px'
-        }),
-        html.Div(id="accordion-content", children=[
-            html.Div([
-                dcc.Dropdown(
-                    id='dashboard-type',
-                    options=[
-                        {'label': 'Management Dashboard', 'value': 'Management Dashboard'},
-                        {'label': 'Year Based', 'value': 'Year Based'},
-                        {'label': '2012 Reports', 'value': '2012 Reports'}
-                    ],
-                    placeholder='Select Report Type',
-                    value='Select Dashboard'
-                )
-            ], style={'margin-bottom': '20px'}),
+            # Accordion for Dropdowns
+            html.Button("Dashboard Options", id="toggle-button", n_clicks=0, style={
+             'width': '99.8%', 'background-color': '#34495E', 'color': '#FFFFFF', 'border': 'none', 'padding': '10px 20px', 'cursor': 'pointer', 'font-size': '16px', 'border-radius': '5px', 'margin-bottom': '10px'
+            }),
+            html.Div(id="accordion-content", children=[
+                html.Div([
+                    dcc.Dropdown(
+                        id='dashboard-type',
+                        options=[
+                            {'label': 'Management Dashboard', 'value': 'Management Dashboard'},
+                            {'label': 'Year Based', 'value': 'Year Based'},
+                            {'label': '2012 Reports', 'value': '2012 Reports'}
+                        ],
+                        placeholder='Select Report Type',
+                        value='Select Dashboard'
+                    )
+                ], style={'margin-bottom': '20px'}),
             
-            html.Div(dcc.Dropdown(
-                id='select-year',
-                options=[{'label': i, 'value': i} for i in range(2011, 2015)],
-                placeholder='Select Year',
-                value='Select-year'
-            ))
-        ], style={
-           'width': '97.8%', 'background-color': '#ECF0F1', 'padding': '20px', 'border-radius': '5px', 'box-shadow': '0 4px 8px rgba(0, 0, 0, 0.2)', 'color': '#404F6E'
-        }),
-
-        html.Br(),
-
-        # Chart Display Area
-        html.Div(id='output-container', className='chart-grid', style={'display': 'flex', 'justify-content': 'center', 'textAlign': 'center', 'width': '100%', 'color': 'Black', 'font-size': 24})
-    ]
-)
+                html.Div(dcc.Dropdown(
+                    id='select-year',
+                    options=[{'label': i, 'value': i} for i in range(2011, 2015)],
+                    placeholder='Select Year',
+                    value='Select-year'
+                ))
+            ], style={
+               'width': '97.8%', 'background-color': '#ECF0F1', 'padding': '20px', 'border-radius': '5px', 'box-shadow': '0 4px 8px rgba(0, 0, 0, 0.2)', 'color': '#404F6E'
+            }),
+
+            html.Br(),
+
+            # Chart Display Area
+            html.Div(id='dashboard-progress', style={'display': 'none'}),
+            # Client mode: the dataset version and every view pre-rendered for it, sent with the page,
+            # plus a view re-requested from the server when its figures failed to build
+            dcc.Store(id='client-version', data=data_version if RENDER_MODE == 'client' else None),
+            dcc.Store(id='client-views', data=client_views() if RENDER_MODE == 'client' else None),
+            dcc.Store(id='client-view-request'),
+            dcc.Store(id='client-view'),
+            html.Div(id='output-container', className='chart-grid', style={'display': 'flex', 'justify-content': 'center', 'textAlign': 'center', 'width': '100%', 'color': 'Black', 'font-size': 24})
+        ]
+    )
+
+# Shown until the data is in; the interval asks the server to swap in the dashboard
+def loading_layout():
+    message = f"Data failed to load: {load_error}" if load_error else "Loading the Superstore data..."
+    children = [html.H1("Global Superstore Dashboard", style={'margin': '0'}), html.P(message)]
+    if load_error is None:
+        children.append(dcc.Interval(id='ready-poll', interval=READY_POLL_INTERVAL))
+    return html.Div(style={'background-color': '#F0F0F0', 'padding': '20px', 'font-family': 'Calibri',
+                           'textAlign': 'center', 'color': '#34495E'}, children=children)
+
+# Evaluated on every page load, so a warm server serves the dashboard directly
+def serve_layout():
+    ready = data_ready.is_set() and load_error is None
+    return html.Div(id='app-root', children=dashboard_layout() if ready else loading_layout())
+
+def show_dashboard_when_ready(n_intervals):
+    if not data_ready.is_set():
+        return dash.no_update
+    return dashboard_layout() if load_error is None else loading_layout()
+
+def update_overview(n_intervals):
+    return create_overview_tiles(), timeVar
+
+# Client mode: the refresh that updates the tiles also reports a new dataset version
+def update_overview_and_version(n_intervals, version):
+    return (*update_overview(n_intervals), dash.no_update if version == data_version else data_version)
 
-@app.callback(
-    Output("accordion-content", "style"),
-    [Input("toggle-button", "n_clicks")],
-    [State("accordion-content", "style")]
-)
 def toggle_accordion(n_clicks, style):
     if n_clicks % 2 == 1:
         style["display"] = "block"
@@ -150,37 +558,210 @@ def toggle_accordion(n_clicks, style):
         style["display"] = "none"
     return style
 
-@app.callback(
-    Output('select-year', 'disabled'),
-    [Input('dashboard-type', 'value')]
-)
 def update_input_container(selected_statistics):
     return selected_statistics != 'Year Based' and selected_statistics != 'Management Dashboard'
 
-@app.callback(
-    Output('output-container', 'children'),
-    [Input('select-year', 'value'),
-     Input('dashboard-type', 'value')]
-)
-def update_output_container(input_year, selected_statistics):
+# The view for the selected inputs; a partial render is raised as Uncacheable
+def select_view(input_year, selected_statistics):
     if input_year and selected_statistics == 'Management Dashboard':
-        return create_management_dashboard(data, int(input_year))
+        return dashboard_view(selected_statistics, int(input_year))
     elif selected_statistics == '2012 Reports':
-        return create_2012_reports(data)
+        return dashboard_view(selected_statistics, None)
     elif input_year and selected_statistics == 'Year Based':
-        return create_year_based_dashboard(data, int(input_year))
+        return dashboard_view(selected_statistics, int(input_year))
+
+def update_output_container(input_year, selected_statistics):
+    return uncached(lambda: select_view(input_year, selected_statistics))
+
+def update_output_container_in_background(set_progress, input_year, selected_statistics):
+    global figure_progress
+    # The job runs in its own forked process, so the hook is private to this render
+    figure_progress = set_progress
+    set_progress(f"Building {selected_statistics}...")
+    key = repr((data_version, input_year, selected_statistics))
+    return coalesce(background_manager, key, lambda: select_view(input_year, selected_statistics))
+
+def client_function(name):
+    return ClientsideFunction(namespace='superstoreViews', function_name=name)
+
+def register_callbacks(app):
+    app.callback(Output('app-root', 'children'), [Input('ready-poll', 'n_intervals')])(show_dashboard_when_ready)
+    overview = [Output('overview-tiles', 'children'),
+                Output('header-time', 'children')]
+    if RENDER_MODE == 'client':
+        app.callback(overview + [Output('client-version', 'data')], [Input('refresh-interval', 'n_intervals')],
+                     [State('client-version', 'data')])(update_overview_and_version)
+    else:
+        app.callback(overview, [Input('refresh-interval', 'n_intervals')])(update_overview)
+    accordion = (Output("accordion-content", "style"),
+                 [Input("toggle-button", "n_clicks")],
+                 [State("accordion-content", "style")])
+    year_selector = (Output('select-year', 'disabled'),
+                     [Input('dashboard-type', 'value')])
+    dashboard_output = Output('output-container', 'children')
+    dashboard_inputs = [Input('select-year', 'value'),
+                        Input('dashboard-type', 'value')]
+    if RENDER_MODE == 'client':
+        # The UI toggles and the view lookup run in the browser (assets/superstore.js) over the
+        # views sent with the page. The server is only asked again for a view that came with
+        # placeholder figures, and for the whole set once the refresh reports a new version
+        app.clientside_callback(client_function('toggleAccordion'), *accordion)
+        app.clientside_callback(client_function('yearSelectorDisabled'), *year_selector)
+        app.clientside_callback(client_function('request'), Output('client-view-request', 'data'),
+                                dashboard_inputs, [State('client-views', 'data')])
+        app.callback(Output('client-view', 'data'), [Input('client-view-request', 'data')])(serve_client_view)
+        app.clientside_callback(client_function('store'), Output('client-views', 'data', allow_duplicate=True),
+                                [Input('client-view', 'data')], [State('client-views', 'data')], prevent_initial_call=True)
+        app.callback(Output('client-views', 'data'), [Input('client-version', 'data')],
+                     prevent_initial_call=True)(update_client_views)
+        app.clientside_callback(client_function('render'), dashboard_output, dashboard_inputs + [Input('client-views', 'data')])
+        return
+    app.callback(*accordion)(toggle_accordion)
+    app.callback(*year_selector)(update_input_container)
+    if background_manager is not None:
+        app.callback(
+            dashboard_output, dashboard_inputs,
+            background=True,
+            manager=background_manager,
+            interval=POLL_INTERVAL,
+            progress=Output('dashboard-progress', 'children'),
+            running=[(Output('dashboard-progress', 'style'), {'display': 'block', 'textAlign': 'center'}, {'display': 'none'})],
+        )(update_output_container_in_background)
+    else:
+        app.callback(dashboard_output, dashboard_inputs)(update_output_container)
+
+# Raised out of render_dashboard when a figure degraded to a placeholder, so the partial dashboard
+# is still served but never memoized (in the render cache or the job result cache) and the next
+# request tries the figure again
+class IncompleteRender(Exception):
+    def __init__(self, children):
+        super().__init__("some figures failed to build")
+        self.children = children
+
+def dashboard_view(selected_statistics, year):
+    try:
+        return render_dashboard(selected_statistics, year, data_version)
+    except IncompleteRender as e:
+        raise Uncacheable(json.loads(to_json_plotly(e.children))) from None
+
+# Serialized dashboards keyed by (dashboard type, year, dataset version) with LRU eviction
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def render_dashboard(selected_statistics, year, version):
+    # Cube and point lookups are timed as 'pandas' within the figure phase
+    with phase('figure'):
+        if selected_statistics == 'Management Dashboard':
+            children = create_management_dashboard(cube, order_partitions, year)
+        elif selected_statistics == '2012 Reports':
+            children = create_2012_reports(cube)
+        else:
+            children = create_year_based_dashboard(cube, year_points, year)
+    with phase('serialize'):
+        return json.loads(to_json_plotly(children))
+
+def figure_cache_stats():
+    info = render_dashboard.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize,
+            'figure_ms': {name: round(ms, 2) for name, ms in figure_timings.items()}}
+
+# Worker pool shared by the figure builders, created on first use
+figure_executor = None
+# Milliseconds spent on each figure in its most recent build
+figure_timings = {}
+# Called with a status line as figures finish (set by background jobs)
+figure_progress = None
 
-def create_management_dashboard(data, year):
-    static_data = data[data['Year'] == year]
+# A forked background job cannot use the parent's pool threads, so it starts its own
+def reset_figure_executor():
+    global figure_executor
+    figure_executor = None
+
+os.register_at_fork(after_in_child=reset_figure_executor)
+
+def get_figure_executor():
+    global figure_executor
+    if figure_executor is None:
+        pool = ProcessPoolExecutor if FIGURE_EXECUTOR == 'process' else ThreadPoolExecutor
+        figure_executor = pool(max_workers=FIGURE_WORKERS)
+    return figure_executor
+
+def timed_build(builder, *args):
+    start = time.perf_counter()
+    with phase('figure'):
+        figure = builder(*args)
+    return figure, (time.perf_counter() - start) * 1000
+
+def placeholder_figure(title, error):
+    return go.Figure().update_layout(
+        title=title,
+        xaxis={'visible': False},
+        yaxis={'visible': False},
+        annotations=[{'text': f'Chart unavailable: {error}', 'showarrow': False, 'font': {'size': 14}}]
+    )
+
+# Build independent figures concurrently; a failing figure, or one not finished when the shared
+# FIGURE_TIMEOUT deadline passes, degrades to a placeholder and is listed in the failures returned
+# alongside the figures. Figures still queued at the deadline are cancelled so they do not hold
+# pool workers for later renders
+def build_figures(jobs):
+    figures, errors = {}, {}
+
+    def finished(name, result):
+        if isinstance(result, Exception):
+            errors[name] = result
+        else:
+            figures[name], figure_timings[name] = result
+            registry.observe('dash_figure_build_seconds', {'figure': name}, result[1] / 1000)
+        if figure_progress:
+            figure_progress(f"Built {len(figures) + len(errors)} of {len(jobs)} charts")
+
+    with pooled() as bind:
+        # Process pool tasks must pickle, so only thread and serial builds report their phases
+        build = timed_build if FIGURE_EXECUTOR == 'process' else bind(timed_build)
+        if FIGURE_EXECUTOR == 'serial':
+            for name, (builder, args) in jobs.items():
+                try:
+                    result = build(builder, *args)
+                except Exception as e:
+                    result = e
+                finished(name, result)
+        else:
+            executor = get_figure_executor()
+            futures = {executor.submit(build, builder, *args): name for name, (builder, args) in jobs.items()}
+            deadline = time.monotonic() + FIGURE_TIMEOUT
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    finished(futures[future], future.exception() or future.result())
+            for future in pending:
+                future.cancel()
+                errors[futures[future]] = TimeoutError(f"not built within {FIGURE_TIMEOUT:g}s")
+    for name, e in errors.items():
+        print(f"Error building {name}:", str(e) or type(e).__name__)
+        figures[name] = placeholder_figure(name, str(e) or type(e).__name__)
+    return figures, list(errors)
+
+def create_management_dashboard(cube, order_partitions, year):
+    static_data = cube_for_year(cube, year)
     # Create charts
-    area_chart = create_area_chart(static_data)
-    sunburst_chart = create_sunburst_chart(static_data)
-    bubble_chart = create_bubble_chart(static_data)
-    funnel_chart = create_funnel_chart(static_data)
-    treemap_chart = create_treemap_chart(static_data)
-    waterfall_chart = create_waterfall_chart(static_data)
+    charts, failed = build_figures({
+        'Sales & Profit Over Time': (create_area_chart, (static_data,)),
+        'Top Categories by Sales': (create_sunburst_chart, (static_data,)),
+        'Sales, Profit, Orders by Continent': (create_bubble_chart, (static_data, orders_by_continent(order_partitions, year))),
+        'Sales Funnel by Continent': (create_funnel_chart, (static_data,)),
+        'Segment, Category by Sales': (create_treemap_chart, (static_data,)),
+        'Profit Contribution by Category': (create_waterfall_chart, (static_data,)),
+    })
+    area_chart = charts['Sales & Profit Over Time']
+    sunburst_chart = charts['Top Categories by Sales']
+    bubble_chart = charts['Sales, Profit, Orders by Continent']
+    funnel_chart = charts['Sales Funnel by Continent']
+    treemap_chart = charts['Segment, Category by Sales']
+    waterfall_chart = charts['Profit Contribution by Category']
     # Combine all charts into one layout
-    return [
+    children = [
         html.Div(style={'display': 'flex', 'justify-content': 'space-between', 'textAlign': 'center', 'width': '100%', 'color': 'Black', 'font-size': 24},
                  children=[
                              html.Div(style={'flex': '1', 'margin': '5px'},children=[dcc.Graph(figure=area_chart),dcc.Graph(figure=waterfall_chart)]),
@@ -188,22 +769,30 @@ def create_management_dashboard(data, year):
                              html.Div(style={'flex': '1', 'margin': '5px'},children=[dcc.Graph(figure=bubble_chart),dcc.Graph(figure=funnel_chart)])]
         )
     ]
+    if failed:
+        raise IncompleteRender(children)
+    return children
 
-def create_2012_reports(data):
-    static_data = data[data['Year'] == 2012]
-    avg_shipping_time = static_data.groupby('Month')['shippingTime'].mean().reset_index()
+def create_2012_reports(cube):
+    static_data = cube_for_year(cube, 2012)
+    with phase('pandas'):
+        avg_shipping_time = static_data.groupby('Month', observed=True)[['shippingTime', 'Orders']].sum().reset_index()
+        avg_shipping_time['shippingTime'] = avg_shipping_time['shippingTime'] / avg_shipping_time['Orders']
     R_chart1 = dcc.Graph(
         figure=px.line(avg_shipping_time, x='Month', y='shippingTime', title='Average Shipping Time Trends')
     )
-    average_sales = static_data.groupby(['Category'])['Profit'].sum().reset_index()
+    with phase('pandas'):
+        average_sales = static_data.groupby(['Category'], observed=True)['Profit'].sum().reset_index()
     R_chart2 = dcc.Graph(
         figure=px.bar(average_sales, x='Category', y='Profit', title="Category-wise Profit in 2012")
     )
-    exp_rec = static_data.groupby(['Ship.Mode'])['Profit'].sum().reset_index()
+    with phase('pandas'):
+        exp_rec = static_data.groupby(['Ship.Mode'], observed=True)['Profit'].sum().reset_index()
     R_chart3 = dcc.Graph(
         figure=px.pie(exp_rec, values='Profit', names='Ship.Mode', title="Profit by Ship Modes in 2012")
     )
-    category_data = static_data.groupby('Category').agg({'Shipping.Cost': 'sum', 'Profit': 'sum', 'Sales': 'sum'}).reset_index()
+    with phase('pandas'):
+        category_data = static_data.groupby('Category', observed=True).agg({'Shipping.Cost': 'sum', 'Profit': 'sum', 'Sales': 'sum'}).reset_index()
     R_chart4 = dcc.Graph(
         figure=px.scatter(category_data, x='Shipping.Cost', y='Sales', size='Profit', color='Category',
                           title='Shipping Cost, Sales, Profit by Cateogry in 2012', color_continuous_scale='Plasma')
@@ -213,20 +802,24 @@ def create_2012_reports(data):
         html.Div(className='chart-item', children=[R_chart3, R_chart4])
     ]
 
-def create_year_based_dashboard(data, year):
-    yearly_data = data[data['Year'] == year]
-    yas = yearly_data.groupby('Month')['Sales'].mean().reset_index()
+def create_year_based_dashboard(cube, year_points, year):
+    yearly_data = cube_for_year(cube, year)
+    with phase('pandas'):
+        yas = yearly_data.groupby('Month', observed=True)[['Sales', 'Orders']].sum().reset_index()
+        yas['Sales'] = yas['Sales'] / yas['Orders']
     Y_chart1 = dcc.Graph(
         figure=px.line(yas, x='Month', y='Sales', title="Monthly Average Product Sales for the year {}".format(year))
     )
     Y_chart2 = dcc.Graph(
-        figure=px.scatter(yearly_data, x='Sales', y='Profit', title='Sales and Profit for the year {}'.format(year))
+        figure=create_sales_profit_scatter(points_for_year(year_points, year), year)
     )
-    avr_vdata = yearly_data.groupby(['Category'])['Sales'].sum().reset_index()
+    with phase('pandas'):
+        avr_vdata = yearly_data.groupby(['Category'], observed=True)['Sales'].sum().reset_index()
     Y_chart3 = dcc.Graph(
         figure=px.bar(avr_vdata, x='Category', y='Sales', title="Sum of Product Sales by Category for the year {}".format(year))
     )
-    avr_vdata1 = yearly_data.groupby(['Ship.Mode'])['Sales'].sum().reset_index()
+    with phase('pandas'):
+        avr_vdata1 = yearly_data.groupby(['Ship.Mode'], observed=True)['Sales'].sum().reset_index()
     Y_chart4 = dcc.Graph(
         figure=px.pie(avr_vdata1, values='Sales', names='Ship.Mode', title="Sum of Product Sales by Ship Mode for the year {}".format(year))
     )
@@ -235,36 +828,79 @@ def create_year_based_dashboard(data, year):
         html.Div(className='chart-item', children=[Y_chart3, Y_chart4])
     ]
 
-# Define chart creation functions
+# Stratified sample over a grid of Sales/Profit cells; every occupied cell keeps at least one point so outliers survive
+def grid_cells(values, bins):
+    values = np.nan_to_num(values.to_numpy(dtype=np.float64))
+    low, high = values.min(), values.max()
+    scaled = (values - low) / (high - low) * bins if high > low else np.zeros(len(values))
+    return np.clip(scaled.astype(np.int64), 0, bins - 1)
+
+def stratified_sample(points, budget, bins=20, seed=0):
+    if len(points) <= budget:
+        return points
+    cells = grid_cells(points['Sales'], bins) * bins + grid_cells(points['Profit'], bins)
+    keep = np.random.default_rng(seed).random(len(points)) < budget / len(points)
+    # Reverse assignment leaves each cell's first row, which is always kept
+    first_rows = np.full(bins * bins, -1)
+    first_rows[cells[::-1]] = np.arange(len(points))[::-1]
+    keep[first_rows[first_rows >= 0]] = True
+    return points[keep]
+
+# 2-D binned counts, so the payload is bounded by the number of bins rather than the number of rows
+def binned_density(points, bins=SCATTER_BINS):
+    counts, x_edges, y_edges = np.histogram2d(points['Sales'], points['Profit'], bins=bins)
+    counts = np.where(counts > 0, counts, np.nan)
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts.T
+
+def create_sales_profit_scatter(points, year, mode=None):
+    mode = mode or SCATTER_MODES['year-sales-profit']
+    title = 'Sales and Profit for the year {}'.format(year)
+    if mode == 'raw' or len(points) <= SCATTER_POINT_BUDGET:
+        return px.scatter(points, x='Sales', y='Profit', title=title)
+    if mode == 'density':
+        x, y, counts = binned_density(points)
+        return go.Figure(go.Heatmap(x=x, y=y, z=counts, colorscale='Plasma', colorbar={'title': 'Orders'})).update_layout(
+            title=f'{title} ({len(points)} points binned)', xaxis_title='Sales', yaxis_title='Profit')
+    sample = stratified_sample(points, SCATTER_POINT_BUDGET)
+    return px.scatter(sample, x='Sales', y='Profit', title=f'{title} ({len(sample)} of {len(points)} points)')
+
+# Define chart creation functions (each receives the cube rows of one year)
 def create_area_chart(data):
-    sales_profit_time = data.groupby(data['Order.Date'].dt.to_period('M')).agg({'Sales': 'sum', 'Profit': 'sum'}).reset_index()
-    sales_profit_time['Order.Date'] = sales_profit_time['Order.Date'].dt.to_timestamp()
+    with phase('pandas'):
+        sales_profit_time = data.groupby('Month', observed=True).agg({'Sales': 'sum', 'Profit': 'sum', 'Year': 'first'}).reset_index()
+        sales_profit_time['Order.Date'] = pd.to_datetime(sales_profit_time[['Year', 'Month']].assign(Day=1))
     return px.area(sales_profit_time, x='Order.Date', y=['Sales', 'Profit'],
                    title='Sales & Profit Over Time', labels={'value': 'Amount', 'x':'Order Date'}, color_discrete_sequence=px.colors.sequential.Plasma)
 
 def create_sunburst_chart(data):
-    category_sales = data.groupby(['Category', 'Sub.Category']).agg({'Sales': 'sum'}).reset_index()
+    with phase('pandas'):
+        category_sales = data.groupby(['Category', 'Sub.Category'], observed=True).agg({'Sales': 'sum'}).reset_index()
     return px.sunburst(category_sales, path=['Category', 'Sub.Category'], values='Sales',
                        title='Top Categories by Sales', color='Sales', color_continuous_scale='RdBu')
 
-def create_bubble_chart(data):
-    continent_sales_profit = data.groupby('Continent').agg({'Sales': 'sum', 'Profit': 'sum', 'Order.ID': 'count'}).reset_index()
+def create_bubble_chart(data, continent_orders):
+    with phase('pandas'):
+        continent_sales_profit = data.groupby('Continent', observed=True).agg({'Sales': 'sum', 'Profit': 'sum'}).reset_index()
+        continent_sales_profit['Order.ID'] = continent_orders.reindex(continent_sales_profit['Continent']).fillna(0).to_numpy()
     return px.scatter(continent_sales_profit, x='Sales', y='Profit', size='Order.ID', color='Continent',
                       title='Sales, Profit, Orders by Continent', size_max=60, color_continuous_scale=px.colors.diverging.Temps)
 
 def create_funnel_chart(data):
-    funnel_data = data.groupby('Continent').agg({'Sales': 'sum'}).reset_index()
+    with phase('pandas'):
+        funnel_data = data.groupby('Continent', observed=True).agg({'Sales': 'sum'}).reset_index()
     return px.funnel(funnel_data, x='Sales', y='Continent', title='Sales Funnel by Continent', color='Sales')
 
 def create_treemap_chart(data):
-    segment_sales = data.groupby(['Segment', 'Category']).agg({'Sales': 'sum'}).reset_index()
+    with phase('pandas'):
+        segment_sales = data.groupby(['Segment', 'Category'], observed=True).agg({'Sales': 'sum'}).reset_index()
     return px.treemap(segment_sales, path=['Segment', 'Category'], values='Sales', title='Segment, Category by Sales',
                       color='Sales', color_continuous_scale=px.colors.sequential.Redor)
 
 def create_waterfall_chart(data):
-    category_profit = data.groupby('Category').agg({'Profit': 'sum'}).reset_index()
-    new_row = pd.DataFrame([['Fashion & Beauty', -70125], ['Pharmacy', 195070]], columns=['Category', 'Profit'])
-    category_profit = pd.concat([category_profit, new_row], ignore_index=True)
+    with phase('pandas'):
+        category_profit = data.groupby('Category', observed=True).agg({'Profit': 'sum'}).reset_index()
+        new_row = pd.DataFrame([['Fashion & Beauty', -70125], ['Pharmacy', 195070]], columns=['Category', 'Profit'])
+        category_profit = pd.concat([category_profit, new_row], ignore_index=True)
     return go.Figure(go.Waterfall(
         name="Profit",
         orientation="v",
@@ -276,6 +912,72 @@ def create_waterfall_chart(data):
         waterfallgap=0.3
     )
 
+# Client render mode: every view of every year is rendered by the server builders (render_dashboard)
+# and sent with the page, so switching years and reports is a lookup in the browser
+# (assets/superstore.js) with no round trip
+CLIENT_VIEWS = ['Management Dashboard', 'Year Based']
+
+def client_view_keys():
+    years = query_years() if query_connection is not None else sorted(int(year) for year in cube['Year'].unique())
+    return [(view, year) for view in CLIENT_VIEWS for year in years] + [('2012 Reports', None)]
+
+def client_view_key(view, year):
+    return f"{view}|{year if year is not None else ''}"
+
+# Every view for the current dataset version, keyed as assets/superstore.js looks them up. A view
+# with placeholder figures is sent marked incomplete, and the browser asks for it again when shown
+def client_views():
+    views = {}
+    for view, year in client_view_keys():
+        try:
+            views[client_view_key(view, year)] = {'children': dashboard_view(view, year), 'complete': True}
+        except Uncacheable as e:
+            views[client_view_key(view, year)] = {'children': e.result, 'complete': False}
+    return {'version': data_version, 'views': views}
+
+# Render every view once at load, so page loads are served from the render cache
+def warm_client_views():
+    client_views()
+
+def serve_client_view(request):
+    if not request:
+        return dash.no_update
+    try:
+        children, complete = dashboard_view(request['view'], request['year']), True
+    except Uncacheable as e:
+        # Served, but not kept in the browser's cache, so the view is requested again next time
+        children, complete = e.result, False
+    return {'version': data_version, 'key': request['key'], 'children': children, 'complete': complete}
+
+def update_client_views(version):
+    return client_views()
+
+# Background jobs are forked from the server process, so warming the render cache
+# here once saves every job from doing it
+def warm_background_jobs():
+    if background_manager is not None:
+        uncached(lambda: dashboard_view('Management Dashboard', int(metrics.name)))
+
+# App factory: the layout, callbacks, metrics and probe routes are set up right away and the data
+# loads on a background thread, so the server binds at once and /readyz reports when it can serve
+def create_app(load_async=True):
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.title = "Global Superstore Dashboard"
+    app.layout = serve_layout
+    register_callbacks(app)
+    # Latency, phase, payload and cache metrics for every callback, served on /metrics
+    instrument_callbacks(app, caches=[render_dashboard])
+    add_probes(app.server, readiness)
+    if load_async:
+        start_loading()
+    else:
+        load_state()
+    return app
+
+app = create_app()
+server = app.server  # WSGI entry point for serve.py
+
 # Run the app
 if __name__ == '__main__':
+    start_refresher()
     app.run_server(debug=True)
\ No newline at end of file
@@ -6,6 +6,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pytz
 from datetime import datetime
+from kpi_engine import calculate_metrics, summarize_kpis
 
 # Load the dataset
 data = pd.read_csv('https://raw.githubusercontent.com/ANK002X/Datasets/main/superstore.csv')
@@ -17,26 +18,16 @@ data['Order.Date'] = pd.to_datetime(data['Order.Date'])
 data['Month'] = data['Order.Date'].dt.month
 data['Year'] = data['Order.Date'].dt.year
 
-# Calculate key metrics
-total_sales = data[data['Year'] == data['Year'].max()]['Sales'].sum()
-total_orders = data[data['Year'] == data['Year'].max()]['Order.ID'].nunique()
-total_products_sold = data[data['Year'] == data['Year'].max()]['Quantity'].sum()
-
-# Calculate Sales Growth of current year
-previous_year_sales = data[data['Year'] == data['Year'].max() - 1]['Sales'].sum()
-current_year_sales = data[data['Year'] == data['Year'].max()]['Sales'].sum()
-sales_growth = ((current_year_sales - previous_year_sales) / previous_year_sales) * 100
-
-# Calculate the shipping time
+# Convert the ship date and calculate the shipping time
 data['Ship.Date'] = pd.to_datetime(data['Ship.Date'])
-data['Order.Date'] = pd.to_datetime(data['Order.Date'])
-
-# Extract year and month from the Order Date column
-data['Order.Date'] = pd.to_datetime(data['Order.Date'])
-data['Month'] = data['Order.Date'].dt.month
-data['Year'] = data['Order.Date'].dt.year
 data['shippingTime'] = (data['Ship.Date'] - data['Order.Date']).dt.days
-data['shippingTime']
+
+# Calculate key metrics for the latest year, year-to-date, with the KPI engine shared with the optimized dashboard
+metrics = calculate_metrics(summarize_kpis(data))
+total_sales = metrics['sales']
+total_orders = int(metrics['orders'])
+total_products_sold = metrics['quantity']
+sales_growth = metrics['sales_growth']
 
 # Get time
 # Set the timezone to Eastern Daylight Time (EDT)
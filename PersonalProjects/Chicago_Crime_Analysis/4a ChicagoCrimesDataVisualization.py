@@ -1,19 +1,539 @@
+import os
+import sys
+import threading
+from functools import lru_cache, reduce
 import dash
-from dash import dcc, html, Input, Output
+from dash import dcc, html, ClientsideFunction, Input, Output, State
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+from chicago_ingest import DATE_FORMAT, STORE_DIR, UNDATED, sync
 
-# Data loading
-dataLink = "https://data.cityofchicago.org/resource/ijzp-q8t2.json?$order=date%20DESC&$limit=99999&$offset=0"
-try:
-    data = pd.read_json(dataLink)
-    data['month'] = pd.to_datetime(data['date']).dt.strftime('%Y-%m')
-except Exception as e:
-    print("Error loading data:", str(e))
+# Helpers shared with the Superstore dashboard live one directory up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from background_jobs import POLL_INTERVAL, coalesce, create_manager, files_fingerprint, frame_fingerprint
+from callback_metrics import instrument_callbacks, phase
+from health import add_probes
 
-# Create Dash app
-app = dash.Dash(__name__)
+SHARED_DATA = os.environ.get('CHICAGO_SHARED_DATA')  # set by serve.py for its worker processes
+
+HEATMAP_MODE = os.environ.get('CHICAGO_HEATMAP_MODE', 'binned')  # 'binned' or 'raw'
+QUERY_BACKEND = os.environ.get('CHICAGO_QUERY_BACKEND', 'pandas')  # 'pandas' or 'duckdb'
+QUERY_THREADS = int(os.environ.get('CHICAGO_QUERY_THREADS', os.cpu_count() or 1))
+MONTH_STORE = os.path.join(STORE_DIR, 'months')
+
+HEATMAP_CENTER = {'lat': 41.8781, 'lon': -87.6298}
+HEATMAP_ZOOM = 10
+HEATMAP_MIN_ZOOM = 8
+HEATMAP_MAX_ZOOM = 16
+HEATMAP_CELL_PIXELS = 4
+HEATMAP_TILE_SHIFT = 6  # tiles are 64 x 64 cells, one 256 px map tile at 4 px cells
+HEATMAP_VIEWPORT = (1200, 600)  # assumed map size in pixels until the browser reports its bounds
+HEATMAP_PYRAMID_CACHE_SIZE = 32
+HEATMAP_TILE_CACHE_SIZE = 2048
+TIMELINE_CACHE_SIZE = 16
+BREAKDOWN_CACHE_SIZE = 64
+TIMELINE_INTERVAL = 700  # milliseconds per month while the timeline plays
+READY_POLL_INTERVAL = 1000  # milliseconds between the loading screen's checks for the data
+
+# Linked breakdown charts under the map, by name: (title, label expression on the DuckDB backend).
+# Hour and day of week come from the incident date
+BREAKDOWNS = {
+    'district': ('District', 'CAST(district AS VARCHAR)'),
+    'ward': ('Ward', 'CAST(ward AS VARCHAR)'),
+    'hour': ('Hour of Day', 'CAST(hour(date) AS VARCHAR)'),
+    'dow': ('Day of Week', 'dayname(date)'),
+    'arrest': ('Arrest', "CASE WHEN arrest THEN 'True' WHEN NOT arrest THEN 'False' END"),
+    'domestic': ('Domestic', "CASE WHEN domestic THEN 'True' WHEN NOT domestic THEN 'False' END"),
+    'fbi_code': ('FBI Code', 'CAST(fbi_code AS VARCHAR)'),
+}
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+BREAKDOWN_COLORS = {'bar': '#4C78A8', 'selected': '#F58518'}
+
+# Data loading: a local JSON file when CHICAGO_DATA_SOURCE is set, otherwise the local month
+# store plus the records added or updated since the last sync (a full paged ingest on first run).
+# serve.py workers attach to the prepared frame the server process exported to shared memory
+def load_data():
+    if SHARED_DATA:
+        from shared_frame import attach_frame
+        return attach_frame(SHARED_DATA)
+    if os.environ.get('CHICAGO_DATA_SOURCE'):
+        return pd.read_json(os.environ['CHICAGO_DATA_SOURCE'], convert_dates=False)
+    return sync()
+
+# Timestamps arrive as ISO strings from JSON (the month store is already typed); they are parsed
+# in one vectorized pass with the feed's explicit format instead of per-row inference. Values in
+# another format are parsed again with inference, and whatever is still unparseable is reported
+def parse_dates(values):
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    dates = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(values[retry], format='mixed', errors='coerce')
+        unparsed = int((dates.isna() & values.notna()).sum())
+        print(f"Parsed {int(retry.sum()) - unparsed} dates in other formats; {unparsed} could not be parsed")
+    return dates
+
+# Month as an ordered categorical of 'YYYY-MM' labels: the timestamps are truncated to months
+# as datetime64 and only the distinct months are formatted; rows without a date get code -1
+def month_buckets(dates):
+    months = dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    valid = ~np.isnat(months)
+    unique, inverse = np.unique(months[valid], return_inverse=True)
+    codes = np.full(len(months), -1, dtype=np.int32)
+    codes[valid] = inverse
+    return pd.Categorical.from_codes(codes, categories=np.datetime_as_string(unique, unit='M'), ordered=True)
+
+# DuckDB backend: the heatmap queries run as SQL over the month store written by chicago_ingest.py,
+# so the full history is never loaded. A month filter opens only that month's Parquet file, the
+# crime type filter is pushed down to the row groups and only the queried columns are read
+query_connection = None
+
+def connect_store():
+    try:
+        import duckdb
+    except ImportError as e:
+        print("DuckDB backend disabled, loading into memory:", str(e))
+        return None
+    connection = duckdb.connect()
+    connection.execute(f'SET threads TO {QUERY_THREADS}')
+    return connection
+
+def query(sql, parameters=()):
+    # A cursor per query, since callbacks run on several threads
+    return query_connection.cursor().execute(sql, parameters).df()
+
+def store_months():
+    names = (name[:-len('.parquet')] for name in os.listdir(MONTH_STORE) if name.endswith('.parquet'))
+    return pd.Index(sorted(name for name in names if name != UNDATED))
+
+def month_files(month=None):
+    selected = months if month is None else [month] if month in months else []
+    return [os.path.join(MONTH_STORE, f'{month}.parquet') for month in selected]
+
+def default_selection(months, type_counts):
+    # The filters the page opens on, whichever backend counted the rows: the newest month and
+    # the most frequent crime type (type_counts is indexed by type, ties go to the first by name)
+    default_crime_type = type_counts.sort_index().idxmax() if len(type_counts) else None
+    return default_crime_type, months[-1] if len(months) else None
+
+# Dataset state, filled in by load_state on a background thread so the server binds before the
+# data is read; the dashboard layout is served once data_ready is set
+data = heatmap_index = data_stamp = None
+breakdown_index, filter_rows = {}, {}
+months, crime_types, default_crime_type, default_month = pd.Index([]), [], None, None
+data_ready = threading.Event()
+load_error = None
+loader = None
+
+# Heatmap index: rows are reordered once so every (crime type, month) pair, every crime type
+# and every month is a contiguous slice, and the callback only does a dictionary lookup
+HEATMAP_COLUMNS = ['latitude', 'longitude', 'id']
+
+def sorted_runs(keys):
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], dtype=int)
+    stops = np.r_[starts[1:], len(keys)]
+    return zip(keys[starts], starts, stops)
+
+def heatmap_keys(data):
+    type_codes, crime_types = pd.factorize(data['primary_type'], sort=True)
+    return type_codes, crime_types, data['month'].cat.codes.to_numpy(), data['month'].cat.categories
+
+# Row order of the crime-type-major index, also used by serve.py when exporting the frame
+def heatmap_order(data):
+    type_codes, _, month_codes, _ = heatmap_keys(data)
+    return np.lexsort((month_codes, type_codes))
+
+def build_heatmap_index(data):
+    type_codes, crime_types, month_codes, months = heatmap_keys(data)
+    columns = {name: data[name].to_numpy() for name in HEATMAP_COLUMNS}
+    index = {}
+
+    # Crime-type-major order serves (type, month) and (type, all months)
+    type_order = np.lexsort((month_codes, type_codes))
+    # A frame exported by serve.py is already in this order, so its shared columns are used as-is
+    if np.array_equal(type_order, np.arange(len(type_order))):
+        by_type = columns
+    else:
+        by_type = {name: values[type_order] for name, values in columns.items()}
+    # Month codes are shifted by one so rows without a month (-1) get their own key
+    pair_keys = type_codes[type_order] * (len(months) + 1) + month_codes[type_order] + 1
+    for key, start, stop in sorted_runs(pair_keys):
+        crime_type, month = divmod(key, len(months) + 1)
+        if key >= 0 and month > 0:
+            index[(crime_types[crime_type], months[month - 1])] = (by_type, slice(start, stop))
+    for code, start, stop in sorted_runs(type_codes[type_order]):
+        if code >= 0:
+            index[(crime_types[code], None)] = (by_type, slice(start, stop))
+
+    # Month-major order serves (all crimes, month) and (all crimes, all months)
+    month_order = np.argsort(month_codes, kind='stable')
+    by_month = {name: values[month_order] for name, values in columns.items()}
+    for code, start, stop in sorted_runs(month_codes[month_order]):
+        if code >= 0:
+            index[(None, months[code])] = (by_month, slice(start, stop))
+    index[(None, None)] = (by_month, slice(0, len(data)))
+    return index
+
+def query_heatmap_points(crime_type, month, selection=()):
+    files = month_files(month)
+    if not files:
+        return pd.DataFrame(columns=HEATMAP_COLUMNS)
+    where, parameters = selection_where(crime_type, selection)
+    return query(f"SELECT {', '.join(HEATMAP_COLUMNS)} FROM read_parquet($files) {where}", {'files': files, **parameters})
+
+# Points for the map; a breakdown selection picks its rows from the bitmap index instead
+def heatmap_points(crime_type, month, selection=()):
+    if data is None:
+        return query_heatmap_points(crime_type, month, selection)
+    if selection:
+        rows = selected_rows(selection_bitmap(crime_type, month, selection))
+        return pd.DataFrame({name: data[name].to_numpy()[rows] for name in HEATMAP_COLUMNS})
+    arrays, rows = heatmap_index.get((crime_type, month), (None, None))
+    if arrays is None:
+        return pd.DataFrame(columns=HEATMAP_COLUMNS)
+    return pd.DataFrame({name: values[rows] for name, values in arrays.items()})
+
+# Breakdown bitmap index, built once per load. Each dimension's rows get a small integer code
+# (missing values get the extra code len(labels)) and each of its values a packed row bitmap, so
+# a cross-filter is a few bitwise ANDs and ORs plus a bincount of codes, never a frame filter.
+# Bars are labelled with strings formatted the same way on both backends
+def format_label(value):
+    if isinstance(value, (bool, np.bool_)):
+        return str(bool(value))
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+def label_order(name, label):
+    if name == 'dow' and label in DAY_NAMES:
+        return (0, DAY_NAMES.index(label), '')
+    if label.lstrip('-').isdigit():
+        return (0, int(label), '')
+    return (1, 0, label)
+
+def breakdown_codes(name, values):
+    codes, uniques = pd.factorize(values)
+    labels = [DAY_NAMES[int(value)] if name == 'dow' else format_label(value) for value in uniques]
+    order = sorted(range(len(labels)), key=lambda position: label_order(name, labels[position]))
+    # Factorized codes are remapped to the label order; -1 (missing) lands on the last slot
+    remap = np.empty(len(labels) + 1, dtype=np.min_scalar_type(len(labels)))
+    remap[order] = np.arange(len(labels))
+    remap[-1] = len(labels)
+    return remap[codes], [labels[position] for position in order]
+
+def breakdown_values(data, name):
+    if name in ('hour', 'dow'):
+        if 'date' not in data or not pd.api.types.is_datetime64_any_dtype(data['date']):
+            return None
+        return data['date'].dt.hour if name == 'hour' else data['date'].dt.dayofweek
+    return data[name] if name in data else None
+
+def build_breakdown_index(data):
+    index = {}
+    for name in BREAKDOWNS:
+        values = breakdown_values(data, name)
+        if values is None:
+            continue
+        codes, labels = breakdown_codes(name, values)
+        bitmaps = np.zeros((len(labels), (len(data) + 7) // 8), dtype=np.uint8)
+        for code in range(len(labels)):
+            bitmaps[code] = np.packbits(codes == code)
+        index[name] = {'codes': codes, 'labels': labels, 'positions': {label: code for code, label in enumerate(labels)},
+                       'bitmaps': bitmaps}
+    return index
+
+# The dropdown filters as ascending row numbers, one array per crime type and per month, built at
+# load from the codes in one sort. They are slices of that one sort, so they hold 4 bytes a row in
+# all whatever the row order: serve.py exports the rows in heatmap order, which spreads every
+# month over the whole frame
+def code_rows(codes, count):
+    order = np.argsort(codes, kind='stable').astype(np.min_scalar_type(max(len(codes) - 1, 0)))
+    bounds = np.searchsorted(codes[order], np.arange(count + 1))
+    return [order[bounds[code]:bounds[code + 1]] for code in range(count)]
+
+def build_filter_rows(data):
+    type_codes, crime_types = pd.factorize(data['primary_type'])
+    return {
+        'primary_type': dict(zip(crime_types, code_rows(type_codes, len(crime_types)))),
+        'month': dict(zip(data['month'].cat.categories,
+                          code_rows(data['month'].cat.codes.to_numpy(), len(data['month'].cat.categories)))),
+    }
+
+# Rows in both ascending row arrays, looked up from the shorter one
+def intersect_rows(left, right):
+    left, right = sorted([left, right], key=len)
+    if not len(left):
+        return left
+    positions = np.minimum(np.searchsorted(right, left), len(right) - 1)
+    return left[right[positions] == left]
+
+# Rows matching the dropdowns and the breakdown selection, leaving out the selection on `skip`:
+# the dropdowns' rows are intersected and set in a bitmap, a dimension's selected values are ORed
+# and the dimensions ANDed into it. None stands for every row
+def selection_bitmap(crime_type, month, selection, skip=None):
+    dropdowns = [filter_rows[column].get(value, np.zeros(0, dtype=np.int64))
+                 for column, value in [('primary_type', crime_type), ('month', month)] if value is not None]
+    parts = []
+    for name, labels in selection:
+        if name != skip and name in breakdown_index:
+            entry = breakdown_index[name]
+            codes = [entry['positions'][label] for label in labels if label in entry['positions']]
+            parts.append(np.bitwise_or.reduce(entry['bitmaps'][codes], axis=0))
+    if dropdowns:
+        bits = np.zeros(len(data), dtype=bool)
+        bits[reduce(intersect_rows, dropdowns)] = True
+        parts.append(np.packbits(bits))
+    return reduce(np.bitwise_and, parts) if parts else None
+
+def selected_rows(bitmap):
+    if bitmap is None:
+        return slice(None)
+    return np.unpackbits(bitmap, count=len(data)).view(bool)
+
+def breakdown_counts(name, rows):
+    entry = breakdown_index[name]
+    return np.bincount(entry['codes'][rows], minlength=len(entry['labels']) + 1)[:len(entry['labels'])]
+
+# The store's selection ({name: [labels]}) as a hashable cache key
+def selection_key(selection):
+    return tuple(sorted((name, tuple(sorted(labels))) for name, labels in (selection or {}).items()
+                        if labels and name in BREAKDOWNS))
+
+def selection_where(crime_type, selection, skip=None):
+    clauses, parameters = [], {}
+    if crime_type is not None:
+        clauses.append('primary_type = $crime_type')
+        parameters['crime_type'] = crime_type
+    for name, labels in selection:
+        if name != skip:
+            clauses.append(f'list_contains(${name}, {BREAKDOWNS[name][1]})')
+            parameters[name] = list(labels)
+    return ('WHERE ' + ' AND '.join(clauses)) if clauses else '', parameters
+
+def query_breakdowns(crime_type, month, selection):
+    files = month_files(month)
+    result = {}
+    for name, (_, label) in BREAKDOWNS.items():
+        if not files:
+            result[name] = ([], [])
+            continue
+        where, parameters = selection_where(crime_type, selection, skip=name)
+        counts = query(f"SELECT {label} AS label, count(*) AS count FROM read_parquet($files) {where} GROUP BY label",
+                       {'files': files, **parameters}).dropna(subset=['label'])
+        rows = sorted(zip(counts['label'], counts['count']), key=lambda row: label_order(name, row[0]))
+        result[name] = ([label for label, _ in rows], [int(count) for _, count in rows])
+    return result
+
+# Bar counts for every breakdown chart. A chart is filtered by the selections on the other charts
+# but not its own, so its unselected bars stay visible; charts without a selection share one mask
+@lru_cache(maxsize=BREAKDOWN_CACHE_SIZE)
+def breakdowns(crime_type, month, selection):
+    if data is None:
+        return query_breakdowns(crime_type, month, selection)
+    shared = selected_rows(selection_bitmap(crime_type, month, selection))
+    selected = dict(selection)
+    result = {}
+    for name, entry in breakdown_index.items():
+        rows = selected_rows(selection_bitmap(crime_type, month, selection, skip=name)) if name in selected else shared
+        result[name] = (entry['labels'], breakdown_counts(name, rows).tolist())
+    return result
+
+# Server-side binning: incidents are counted per grid cell sized to a few pixels at the map zoom,
+# so the payload is bounded by the number of occupied cells rather than the number of crimes
+def cell_size(zoom):
+    return 360 / (256 * 2 ** zoom) * HEATMAP_CELL_PIXELS
+
+# Sum counts per cell, ordered tile by tile so each tile is a contiguous run
+def aggregate_cells(rows, cols, counts):
+    if len(rows) == 0:
+        return rows, cols, counts
+    # One int64 sort key: tile row, tile column, then the cell's position inside the tile
+    tile_rows, tile_cols = rows >> HEATMAP_TILE_SHIFT, cols >> HEATMAP_TILE_SHIFT
+    mask = (1 << HEATMAP_TILE_SHIFT) - 1
+    tiles = (tile_rows - tile_rows.min()) * (tile_cols.max() - tile_cols.min() + 1) + (tile_cols - tile_cols.min())
+    keys = (tiles << (2 * HEATMAP_TILE_SHIFT)) | ((rows & mask) << HEATMAP_TILE_SHIFT) | (cols & mask)
+    order = np.argsort(keys)
+    keys, rows, cols, counts = keys[order], rows[order], cols[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return rows[starts], cols[starts], np.add.reduceat(counts, starts)
+
+# Tile pyramid: cells are binned once at the finest zoom, and each coarser level halves the
+# cell coordinates and re-sums, since a cell at zoom z - 1 covers exactly 2 x 2 cells at zoom z
+@lru_cache(maxsize=HEATMAP_PYRAMID_CACHE_SIZE)
+def heatmap_pyramid(crime_type, month, selection=()):
+    points = heatmap_points(crime_type, month, selection)
+    latitude = points['latitude'].to_numpy(dtype=np.float64)
+    longitude = points['longitude'].to_numpy(dtype=np.float64)
+    valid = ~(np.isnan(latitude) | np.isnan(longitude))
+    size = cell_size(HEATMAP_MAX_ZOOM)
+    rows = np.floor(latitude[valid] / size).astype(np.int64)
+    cols = np.floor(longitude[valid] / size).astype(np.int64)
+    rows, cols, counts = aggregate_cells(rows, cols, np.ones(len(rows), dtype=np.int64))
+    pyramid = {}
+    for zoom in range(HEATMAP_MAX_ZOOM, HEATMAP_MIN_ZOOM - 1, -1):
+        if zoom < HEATMAP_MAX_ZOOM:
+            rows, cols, counts = aggregate_cells(rows >> 1, cols >> 1, counts)
+        tile_keys = np.stack([rows >> HEATMAP_TILE_SHIFT, cols >> HEATMAP_TILE_SHIFT], axis=1)
+        starts = np.flatnonzero(np.r_[True, np.any(tile_keys[1:] != tile_keys[:-1], axis=1)]) if len(rows) else []
+        stops = np.r_[starts[1:], len(rows)] if len(rows) else []
+        tiles = {tuple(tile_keys[start]): slice(start, stop) for start, stop in zip(starts, stops)}
+        pyramid[zoom] = (rows, cols, counts, tiles)
+    return pyramid
+
+@lru_cache(maxsize=HEATMAP_TILE_CACHE_SIZE)
+def heatmap_tile(crime_type, month, selection, zoom, tile):
+    rows, cols, counts, tiles = heatmap_pyramid(crime_type, month, selection)[zoom]
+    cells = tiles.get(tile, slice(0, 0))
+    size = cell_size(zoom)
+    return (rows[cells] + 0.5) * size, (cols[cells] + 0.5) * size, counts[cells]
+
+# Viewport from the map's relayout events: the corner coordinates when the browser reported
+# them, otherwise an estimate from the center, zoom and an assumed map size
+def viewport_bounds(viewport):
+    viewport = viewport or {}
+    zoom = viewport.get('zoom', HEATMAP_ZOOM)
+    if viewport.get('coordinates'):
+        longitudes, latitudes = zip(*viewport['coordinates'])
+        return zoom, (min(latitudes), max(latitudes)), (min(longitudes), max(longitudes))
+    center = viewport.get('center', HEATMAP_CENTER)
+    degrees_per_pixel = 360 / (256 * 2 ** zoom)
+    half_width, half_height = (pixels / 2 * degrees_per_pixel for pixels in HEATMAP_VIEWPORT)
+    return (zoom, (center['lat'] - half_height, center['lat'] + half_height),
+            (center['lon'] - half_width, center['lon'] + half_width))
+
+def viewport_cells(crime_type, month, viewport, selection=()):
+    zoom, latitudes, longitudes = viewport_bounds(viewport)
+    level = int(min(max(np.floor(zoom + 0.5), HEATMAP_MIN_ZOOM), HEATMAP_MAX_ZOOM))
+    rows, cols, _, tiles = heatmap_pyramid(crime_type, month, selection)[level]
+    if not tiles:
+        return pd.DataFrame({'latitude': [], 'longitude': [], 'count': []})
+    size = cell_size(level) * 2 ** HEATMAP_TILE_SHIFT
+    # Tiles outside the occupied extent are skipped, so zooming far out stays a bounded loop
+    tile_rows = range(max(int(np.floor(latitudes[0] / size)), rows[0] >> HEATMAP_TILE_SHIFT),
+                      min(int(np.floor(latitudes[1] / size)), rows[-1] >> HEATMAP_TILE_SHIFT) + 1)
+    tile_cols = range(max(int(np.floor(longitudes[0] / size)), cols.min() >> HEATMAP_TILE_SHIFT),
+                      min(int(np.floor(longitudes[1] / size)), cols.max() >> HEATMAP_TILE_SHIFT) + 1)
+    parts = [heatmap_tile(crime_type, month, selection, level, (row, col))
+             for row in tile_rows for col in tile_cols if (row, col) in tiles]
+    if not parts:
+        return pd.DataFrame({'latitude': [], 'longitude': [], 'count': []})
+    latitude, longitude, count = (np.concatenate(values) for values in zip(*parts))
+    # Tiles overhang the viewport; keep a margin of a few cells so the heat blur has no seams
+    margin = cell_size(level) * 4
+    visible = ((latitude >= latitudes[0] - margin) & (latitude <= latitudes[1] + margin)
+               & (longitude >= longitudes[0] - margin) & (longitude <= longitudes[1] + margin))
+    return pd.DataFrame({'latitude': latitude[visible], 'longitude': longitude[visible], 'count': count[visible]})
+
+# Timeline frames: one binned density frame per month for a crime type, sent to the browser once.
+# Cell positions are listed once; each frame lists only the cells whose count changed since the
+# previous month (gap-encoded cell numbers plus their new counts), and assets/timeline.js
+# rebuilds the frames so scrubbing the slider needs no server round trip
+@lru_cache(maxsize=TIMELINE_CACHE_SIZE)
+def timeline_frames(crime_type):
+    latitude, longitude, month_positions = [], [], []
+    for position, month in enumerate(months):
+        points = heatmap_points(crime_type, month)
+        if len(points):
+            latitude.append(points['latitude'].to_numpy(dtype=np.float64))
+            longitude.append(points['longitude'].to_numpy(dtype=np.float64))
+            month_positions.append(np.full(len(points), position))
+    if not latitude:
+        return None
+    latitude = np.concatenate(latitude).astype(np.float64)
+    longitude = np.concatenate(longitude).astype(np.float64)
+    month_positions = np.concatenate(month_positions)
+    valid = ~(np.isnan(latitude) | np.isnan(longitude))
+    size = cell_size(HEATMAP_ZOOM)
+    rows = np.floor(latitude[valid] / size).astype(np.int64)
+    cols = np.floor(longitude[valid] / size).astype(np.int64)
+    width = cols.max() - cols.min() + 1
+    cells, cell_of_point = np.unique((rows - rows.min()) * width + (cols - cols.min()), return_inverse=True)
+    counts = np.bincount(month_positions[valid] * len(cells) + cell_of_point,
+                         minlength=len(months) * len(cells)).reshape(len(months), len(cells))
+    changed = counts != np.vstack([np.zeros((1, len(cells)), dtype=counts.dtype), counts[:-1]])
+    frames = []
+    for position in range(len(months)):
+        changed_cells = np.flatnonzero(changed[position])
+        frames.append([np.diff(changed_cells, prepend=0).tolist(), counts[position, changed_cells].tolist()])
+    cell_rows, cell_cols = np.divmod(cells, width)
+    return {
+        'key': f'{data_stamp}:{crime_type}',
+        'title': crime_type or 'All Crimes',
+        'months': list(months),
+        'latitude': np.round((cell_rows + rows.min() + 0.5) * size, 5).tolist(),
+        'longitude': np.round((cell_cols + cols.min() + 0.5) * size, 5).tolist(),
+        'zmax': int(counts.max()),
+        'frames': frames,
+    }
+
+# Heavy heatmaps run as background jobs, with results cached per dataset fingerprint
+background_manager = create_manager('chicago')
+
+def load_state():
+    global data, months, crime_types, default_crime_type, default_month, heatmap_index, breakdown_index, filter_rows
+    global data_stamp, load_error, query_connection, px, go
+    try:
+        # Plotly Express is the slowest import; the figures are only built once the data is in
+        import plotly.express as px
+        import plotly.graph_objects as go
+        query_connection = connect_store() if QUERY_BACKEND == 'duckdb' else None
+        if query_connection is not None:
+            data = None
+            months = store_months()
+            if not len(months):
+                raise FileNotFoundError(f"no month partitions in {MONTH_STORE}; run chicago_ingest.py first")
+            type_counts = query("SELECT primary_type, count(*) AS crimes FROM read_parquet($files) "
+                                "WHERE primary_type IS NOT NULL GROUP BY primary_type ORDER BY crimes DESC, primary_type",
+                                {'files': month_files()}).set_index('primary_type')['crimes']
+            crime_types = sorted(type_counts.index)
+            default_crime_type, default_month = default_selection(months, type_counts)
+        else:
+            new_data = load_data()
+            if 'month' not in new_data.columns:
+                new_data['date'] = parse_dates(new_data['date'])
+                new_data['month'] = month_buckets(new_data['date'])
+            data = new_data
+    except Exception as e:
+        print("Error loading data:", str(e))
+        load_error = str(e)
+        data = pd.DataFrame(columns=['id', 'date', 'primary_type', 'latitude', 'longitude'])
+        data['month'] = pd.Categorical([], categories=[], ordered=True)
+    if data is not None:
+        months = data['month'].cat.categories
+        crime_types = sorted(data['primary_type'].dropna().unique())
+        default_crime_type, default_month = default_selection(months, data['primary_type'].value_counts())
+        heatmap_index = build_heatmap_index(data)
+        breakdown_index = build_breakdown_index(data)
+        filter_rows = build_filter_rows(data)
+        # Identifies the loaded dataset in the background job result cache, which outlives the
+        # process, so an upsert that keeps the row count and latest date still changes it
+        data_stamp = frame_fingerprint(data)
+    else:
+        heatmap_index = {}
+        # For the month store, by its partitions and their modification times and sizes
+        data_stamp = files_fingerprint(month_files())
+    # Forked background jobs inherit the parent's caches, and the viewport redraws run in this
+    # process, so the pyramids of the all-crimes view and the initial view are built once here
+    if load_error is None:
+        heatmap_pyramid(None, None, ())
+        heatmap_pyramid(default_crime_type, default_month, ())
+    # Set only once the warm-up is done, so /readyz and the first requests never race it
+    data_ready.set()
+
+def start_loading():
+    global loader
+    if loader is None:
+        loader = threading.Thread(target=load_state, name='chicago-load', daemon=True)
+        loader.start()
+    return loader
+
+def readiness():
+    if load_error is not None:
+        return False, f"data failed to load: {load_error}"
+    if not data_ready.is_set():
+        return False, "loading data"
+    return True, f"{len(data)} rows loaded" if data is not None else f"{len(months)} month partitions"
 
 # Define colors and styles
 colors = {
@@ -59,68 +579,115 @@ styles = {
     },
 }
 
-# Get the range of data
-data_range = f"{data['month'].min()} to {data['month'].max()}"
-
 # App layout
-app.layout = html.Div(
-    style=styles['app_container'],
-    children=[
-        html.H1("Chicago Crime Data Dashboard", style=styles['title']),
-        html.Div(style={'marginBottom': '20px', 'marginRight': '20px'}, children=[
-            html.Label("Select Crime Type:", style=styles['dropdown_label']),
-            dcc.Dropdown(
-                id='crime-type-dropdown',
-                options=[{'label': i, 'value': i} for i in sorted(data['primary_type'].unique())],
-                value=data['primary_type'].iloc[0],
-                style=styles['dropdown_style']
-            ),
-        ]),
-        html.Div(style={'marginBottom': '20px','marginRight': '20px'}, children=[
-            html.Label("Select Month:", style=styles['dropdown_label']),
-            dcc.Dropdown(
-                id='month-dropdown',
-                options=[{'label': i, 'value': i} for i in sorted(data['month'].unique())],
-                value=data['month'].iloc[0],
-                style=styles['dropdown_style']
-            ),
-        ]),
-        html.Div(style={'marginBottom': '20px', 'color': colors['text']}, children=[
-            dcc.Checklist(
-                id='all-months-checkbox',
-                options=[{'label': f'All Months ({data_range})', 'value': 'all'}],
-                value=[]
-            ),
-        ]),
-        html.Div(style={'marginBottom': '20px'}, children=[
-            dcc.Graph(id='crime-heatmap', style={'height': '600px'})
-        ]),
-    ]
-)
+def dashboard_layout():
+    # Get the range of data
+    data_range = f"{months[0]} to {months[-1]}" if len(months) else "no data"
+    return html.Div(
+        style=styles['app_container'],
+        children=[
+            html.H1("Chicago Crime Data Dashboard", style=styles['title']),
+            html.Div(style={'marginBottom': '20px', 'marginRight': '20px'}, children=[
+                html.Label("Select Crime Type:", style=styles['dropdown_label']),
+                dcc.Dropdown(
+                    id='crime-type-dropdown',
+                    options=[{'label': i, 'value': i} for i in crime_types],
+                    value=default_crime_type,
+                    style=styles['dropdown_style']
+                ),
+            ]),
+            html.Div(style={'marginBottom': '20px','marginRight': '20px'}, children=[
+                html.Label("Select Month:", style=styles['dropdown_label']),
+                dcc.Dropdown(
+                    id='month-dropdown',
+                    options=[{'label': i, 'value': i} for i in months],
+                    value=default_month,
+                    style=styles['dropdown_style']
+                ),
+            ]),
+            html.Div(style={'marginBottom': '20px', 'color': colors['text']}, children=[
+                dcc.Checklist(
+                    id='all-months-checkbox',
+                    options=[{'label': f'All Months ({data_range})', 'value': 'all'}],
+                    value=[]
+                ),
+            ]),
+            html.Div(style={'marginBottom': '20px', 'color': colors['text']}, children=[
+                dcc.Checklist(
+                    id='timeline-checkbox',
+                    options=[{'label': 'Animate over months', 'value': 'timeline'}],
+                    value=[]
+                ),
+            ]),
+            html.Div(id='timeline-container', style={'display': 'none'}, children=[
+                html.Button("Play", id='timeline-play', n_clicks=0, style={'marginBottom': '10px'}),
+                dcc.Slider(
+                    id='timeline-slider',
+                    min=0,
+                    max=max(len(months) - 1, 0),
+                    step=1,
+                    value=0,
+                    marks={position: months[position] for position in range(0, len(months), 12)},
+                ),
+                dcc.Interval(id='timeline-interval', interval=TIMELINE_INTERVAL, disabled=True),
+                dcc.Store(id='timeline-frames'),
+                dcc.Graph(id='timeline-heatmap', style={'height': '600px'}),
+            ]),
+            html.Div(id='heatmap-container', style={'marginBottom': '20px'}, children=[
+                html.Div(id='heatmap-progress', style={'display': 'none', 'color': colors['text'], 'marginBottom': '10px'}),
+                dcc.Graph(id='crime-heatmap', style={'height': '600px'}),
+                dcc.Store(id='map-viewport'),
+            ]),
+            html.Div(id='breakdown-container', style={'marginBottom': '20px', 'color': colors['text']}, children=[
+                html.Div(style={'display': 'flex', 'alignItems': 'center', 'gap': '20px', 'marginBottom': '10px'}, children=[
+                    html.Button("Clear selection", id='breakdown-clear', n_clicks=0),
+                    html.Span(id='breakdown-summary'),
+                ]),
+                dcc.Store(id='breakdown-selection', data={}),
+                html.Div(style={'display': 'flex', 'flexWrap': 'wrap'}, children=[
+                    dcc.Graph(id=f'breakdown-{name}', style={'width': '50%', 'height': '300px'})
+                    for name in BREAKDOWNS
+                ]),
+            ]),
+        ]
+    )
 
-# Callback to update heatmap
-@app.callback(
-    Output('crime-heatmap', 'figure'),
-    [Input('crime-type-dropdown', 'value'),
-     Input('month-dropdown', 'value'),
-     Input('all-months-checkbox', 'value')]
-)
-def update_heatmap(selected_crime_type, selected_month, all_months):
-    # If either dropdown is cleared (empty), show all data
-    if not selected_crime_type:
-        # Show heatmap with all data if crime type is cleared
-        filtered_data = data
-    else:
-        # Filter data based on the selected crime type
-        filtered_data = data[data['primary_type'] == selected_crime_type]
+# Shown until the data is in; the interval asks the server to swap in the dashboard
+def loading_layout():
+    message = f"Data failed to load: {load_error}" if load_error else "Loading the crime data..."
+    children = [html.H1("Chicago Crime Data Dashboard", style=styles['title']),
+                html.P(message, style={'color': colors['text'], 'textAlign': 'center'})]
+    if load_error is None:
+        children.append(dcc.Interval(id='ready-poll', interval=READY_POLL_INTERVAL))
+    return html.Div(style=styles['app_container'], children=children)
 
-    # If month is cleared, show data for all months
-    if not selected_month or 'all' in all_months:
-        # If "all" months are selected, or month is cleared, show all data
-        filtered_data = filtered_data
-    else:
-        # Filter data based on the selected month
-        filtered_data = filtered_data[filtered_data['month'] == selected_month]
+# Evaluated on every page load, so a warm server serves the dashboard directly
+def serve_layout():
+    ready = data_ready.is_set() and load_error is None
+    return html.Div(id='app-root', children=dashboard_layout() if ready else loading_layout())
+
+def show_dashboard_when_ready(n_intervals):
+    if not data_ready.is_set():
+        return dash.no_update
+    return dashboard_layout() if load_error is None else loading_layout()
+
+# A cleared crime type or month (or "All Months") falls back to the rollup over all of them
+def filter_keys(selected_crime_type, selected_month, all_months):
+    return selected_crime_type or None, None if not selected_month or 'all' in all_months else selected_month
+
+# Callback to update heatmap
+def update_heatmap(selected_crime_type, selected_month, all_months, viewport=None, selection=None, progress=None):
+    crime_key, month_key = filter_keys(selected_crime_type, selected_month, all_months)
+    selection = selection_key(selection)
+    if progress:
+        progress(f"Binning {crime_key or 'all crimes'} in {month_key or 'all months'}...")
+    with phase('pandas'):
+        if HEATMAP_MODE == 'binned':
+            filtered_data = viewport_cells(crime_key, month_key, viewport, selection)
+            weight = 'count'
+        else:
+            filtered_data = heatmap_points(crime_key, month_key, selection)
+            weight = 'id'  # Using 'id' as a placeholder for density
 
     # If no data is available after filtering, return an empty figure
     if filtered_data.empty:
@@ -131,31 +698,215 @@ def update_heatmap(selected_crime_type, selected_month, all_months):
     month_title = "All Months" if 'all' in all_months or not selected_month else selected_month
 
     # Generate the heatmap with the filtered data
-    fig = px.density_mapbox(
-        filtered_data,
-        lat='latitude',
-        lon='longitude',
-        z='id',  # Using 'id' as a placeholder for density
-        radius=10,
-        center=dict(lat=41.8781, lon=-87.6298),  # Centered on Chicago
-        zoom=10,
-        mapbox_style="carto-positron",
-        title=f'Heatmap of {crime_title} in {month_title}'
-    )
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        font_color=colors['text'],
-    )
+    if progress:
+        progress(f"Rendering {len(filtered_data)} cells...")
+    with phase('figure'):
+        fig = px.density_mapbox(
+            filtered_data,
+            lat='latitude',
+            lon='longitude',
+            z=weight,
+            radius=10,
+            center=HEATMAP_CENTER,  # Centered on Chicago
+            zoom=HEATMAP_ZOOM,
+            mapbox_style="carto-positron",
+            title=f'Heatmap of {crime_title} in {month_title}'
+        )
+        fig.update_layout(
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font_color=colors['text'],
+            uirevision='crime-heatmap',  # keep the user's pan and zoom when the figure is replaced
+        )
     return fig
 
+# Filter changes may need a new pyramid, so they run as background jobs. The pyramids a job builds
+# are lost with its process, so pans and zooms are redrawn inline from this process's pyramid and
+# tile caches, which stay warm across viewports
+def update_heatmap_in_background(set_progress, selected_crime_type, selected_month, all_months, selection, viewport):
+    key = repr((data_stamp, selected_crime_type, selected_month, all_months, viewport, selection_key(selection)))
+    return coalesce(background_manager, key, lambda: update_heatmap(
+        selected_crime_type, selected_month, all_months, viewport, selection, progress=set_progress))
+
+def update_heatmap_viewport(viewport, selected_crime_type, selected_month, all_months, selection):
+    if HEATMAP_MODE != 'binned':
+        return dash.no_update
+    return update_heatmap(selected_crime_type, selected_month, all_months, viewport, selection)
+
+# Callback to draw the breakdown charts, the selected bars highlighted
+def update_breakdowns(selected_crime_type, selected_month, all_months, selection):
+    crime_key, month_key = filter_keys(selected_crime_type, selected_month, all_months)
+    selection = selection_key(selection)
+    with phase('pandas'):
+        counts = breakdowns(crime_key, month_key, selection)
+    selected = dict(selection)
+    figures = []
+    with phase('figure'):
+        for name, (title, _) in BREAKDOWNS.items():
+            labels, values = counts.get(name, ([], []))
+            bar_colors = [BREAKDOWN_COLORS['selected'] if label in selected.get(name, ()) else BREAKDOWN_COLORS['bar']
+                          for label in labels]
+            fig = go.Figure(go.Bar(x=labels, y=values, marker_color=bar_colors))
+            fig.update_layout(
+                title=title,
+                xaxis={'type': 'category'},
+                margin={'l': 40, 'r': 10, 't': 40, 'b': 40},
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font_color=colors['text'],
+                clickmode='event',
+            )
+            figures.append(fig)
+    summary = '; '.join(f"{BREAKDOWNS[name][0]}: {', '.join(labels)}" for name, labels in selection)
+    return figures + [summary or "Click bars to cross-filter the map and the other charts"]
+
+# Callback to toggle a clicked bar in the breakdown selection, or clear it
+def update_selection(*args):
+    selection = dict(args[-1] or {})
+    trigger = dash.callback_context.triggered_id
+    if trigger == 'breakdown-clear':
+        return {}
+    name = (trigger or '')[len('breakdown-'):]
+    click_data = args[list(BREAKDOWNS).index(name)] if name in BREAKDOWNS else None
+    if not click_data:
+        return dash.no_update
+    label = str(click_data['points'][0]['x'])
+    labels = [value for value in selection.get(name, []) if value != label]
+    if len(labels) == len(selection.get(name, [])):
+        labels.append(label)
+    selection[name] = labels
+    return {name: labels for name, labels in selection.items() if labels}
+
+# Callback to remember the map viewport; relayout events only carry the keys that changed
+def track_viewport(relayout_data, viewport):
+    relayout_data = relayout_data or {}
+    if not any(key.startswith('mapbox.') for key in relayout_data):
+        return dash.no_update
+    viewport = dict(viewport or {})
+    if 'mapbox.center' in relayout_data:
+        viewport['center'] = relayout_data['mapbox.center']
+    if 'mapbox.zoom' in relayout_data:
+        viewport['zoom'] = relayout_data['mapbox.zoom']
+    viewport['coordinates'] = relayout_data.get('mapbox._derived', {}).get('coordinates')
+    return viewport
+
 # Callback to enable/disable month dropdown
-@app.callback(
-    Output('month-dropdown', 'disabled'),
-    [Input('all-months-checkbox', 'value')]
-)
 def toggle_month_dropdown(all_months):
     return 'all' in all_months
 
+# Callback to switch between the single-month heatmap and the timeline
+def toggle_timeline(timeline):
+    if 'timeline' in timeline:
+        return {'marginBottom': '20px'}, {'display': 'none'}
+    return {'display': 'none'}, {'marginBottom': '20px'}
+
+# Callback to send the timeline frames for the selected crime type, only while the timeline is shown
+def update_timeline_frames(selected_crime_type, timeline):
+    if 'timeline' not in timeline:
+        return dash.no_update
+    return timeline_frames(selected_crime_type or None)
+
+def register_callbacks(app):
+    app.callback(Output('app-root', 'children'), [Input('ready-poll', 'n_intervals')])(show_dashboard_when_ready)
+
+    heatmap_output = Output('crime-heatmap', 'figure')
+    heatmap_filters = [('crime-type-dropdown', 'value'),
+                       ('month-dropdown', 'value'),
+                       ('all-months-checkbox', 'value')]
+    if background_manager is not None:
+        app.callback(
+            heatmap_output,
+            [Input(*prop) for prop in heatmap_filters + [('breakdown-selection', 'data')]],
+            [State('map-viewport', 'data')],
+            background=True,
+            manager=background_manager,
+            interval=POLL_INTERVAL,
+            progress=Output('heatmap-progress', 'children'),
+            running=[(Output('heatmap-progress', 'style'), {'display': 'block', 'color': colors['text']}, {'display': 'none'})],
+        )(update_heatmap_in_background)
+        app.callback(
+            Output('crime-heatmap', 'figure', allow_duplicate=True),
+            [Input('map-viewport', 'data')],
+            [State(*prop) for prop in heatmap_filters + [('breakdown-selection', 'data')]],
+            prevent_initial_call=True
+        )(update_heatmap_viewport)
+    else:
+        app.callback(heatmap_output, [Input(*prop) for prop in heatmap_filters]
+                     + [Input('map-viewport', 'data'), Input('breakdown-selection', 'data')])(update_heatmap)
+
+    app.callback(
+        [Output(f'breakdown-{name}', 'figure') for name in BREAKDOWNS] + [Output('breakdown-summary', 'children')],
+        [Input('crime-type-dropdown', 'value'),
+         Input('month-dropdown', 'value'),
+         Input('all-months-checkbox', 'value'),
+         Input('breakdown-selection', 'data')]
+    )(update_breakdowns)
+    app.callback(
+        Output('breakdown-selection', 'data'),
+        [Input(f'breakdown-{name}', 'clickData') for name in BREAKDOWNS] + [Input('breakdown-clear', 'n_clicks')],
+        [State('breakdown-selection', 'data')],
+        prevent_initial_call=True
+    )(update_selection)
+    app.callback(
+        Output('map-viewport', 'data'),
+        [Input('crime-heatmap', 'relayoutData')],
+        [State('map-viewport', 'data')]
+    )(track_viewport)
+    app.callback(
+        Output('month-dropdown', 'disabled'),
+        [Input('all-months-checkbox', 'value')]
+    )(toggle_month_dropdown)
+    app.callback(
+        [Output('timeline-container', 'style'),
+         Output('heatmap-container', 'style')],
+        [Input('timeline-checkbox', 'value')]
+    )(toggle_timeline)
+    app.callback(
+        Output('timeline-frames', 'data'),
+        [Input('crime-type-dropdown', 'value'),
+         Input('timeline-checkbox', 'value')]
+    )(update_timeline_frames)
+
+    # Scrubbing and playback run in the browser (assets/timeline.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace='crimeTimeline', function_name='render'),
+        Output('timeline-heatmap', 'figure'),
+        [Input('timeline-slider', 'value'),
+         Input('timeline-frames', 'data')]
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='crimeTimeline', function_name='togglePlay'),
+        [Output('timeline-interval', 'disabled'),
+         Output('timeline-play', 'children')],
+        [Input('timeline-play', 'n_clicks')]
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace='crimeTimeline', function_name='advance'),
+        Output('timeline-slider', 'value'),
+        [Input('timeline-interval', 'n_intervals')],
+        [State('timeline-slider', 'value'),
+         State('timeline-slider', 'max')]
+    )
+
+# App factory: the layout, callbacks, metrics and probe routes are set up right away and the data
+# loads on a background thread, so the server binds at once and /readyz reports when it can serve
+def create_app(load_async=True):
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.layout = serve_layout
+    register_callbacks(app)
+    # Latency, phase, payload and cache metrics for every callback, served on /metrics
+    instrument_callbacks(app, caches=[heatmap_pyramid, heatmap_tile, timeline_frames, breakdowns])
+    add_probes(app.server, readiness)
+    if load_async:
+        start_loading()
+    else:
+        load_state()
+    return app
+
+app = create_app()
+server = app.server  # WSGI entry point for serve.py
+
 if __name__ == '__main__':
     app.run_server()  # Run in production mode
@@ -0,0 +1,72 @@
+// Client-side timeline for the crime heatmap: decodes the delta-encoded month frames sent by
+// update_timeline_frames once per crime type, then renders the selected month without a
+// server round trip.
+(function () {
+    var decoded = {key: null, frames: []};
+
+    function decode(timeline) {
+        var counts = new Int32Array(timeline.latitude.length);
+        var frames = [];
+        timeline.frames.forEach(function (frame) {
+            var cell = 0;
+            for (var i = 0; i < frame[0].length; i++) {
+                cell += frame[0][i];
+                counts[cell] = frame[1][i];
+            }
+            var lat = [], lon = [], z = [];
+            for (var c = 0; c < counts.length; c++) {
+                if (counts[c] > 0) {
+                    lat.push(timeline.latitude[c]);
+                    lon.push(timeline.longitude[c]);
+                    z.push(counts[c]);
+                }
+            }
+            frames.push({lat: lat, lon: lon, z: z});
+        });
+        return {key: timeline.key, frames: frames};
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        crimeTimeline: {
+            render: function (position, timeline) {
+                if (!timeline) {
+                    return {data: [], layout: {}};
+                }
+                if (decoded.key !== timeline.key) {
+                    decoded = decode(timeline);
+                }
+                var index = Math.min(position || 0, decoded.frames.length - 1);
+                var frame = decoded.frames[index];
+                return {
+                    data: [{
+                        type: 'densitymapbox',
+                        lat: frame.lat,
+                        lon: frame.lon,
+                        z: frame.z,
+                        zmin: 0,
+                        zmax: timeline.zmax,  // one color scale across months
+                        radius: 10,
+                        hovertemplate: 'count=%{z}<extra></extra>'
+                    }],
+                    layout: {
+                        title: {text: 'Heatmap of ' + timeline.title + ' in ' + timeline.months[index]},
+                        mapbox: {style: 'carto-positron', center: {lat: 41.8781, lon: -87.6298}, zoom: 10},
+                        margin: {t: 60, l: 0, r: 0, b: 0},
+                        paper_bgcolor: 'rgba(0,0,0,0)',
+                        font: {color: '#E0E0E0'},
+                        uirevision: 'timeline-heatmap'
+                    }
+                };
+            },
+
+            togglePlay: function (clicks) {
+                var playing = clicks % 2 === 1;
+                return [!playing, playing ? 'Pause' : 'Play'];
+            },
+
+            advance: function (ticks, position, last) {
+                return position >= last ? 0 : position + 1;
+            }
+        }
+    });
+})();
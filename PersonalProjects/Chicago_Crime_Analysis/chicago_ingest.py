@@ -0,0 +1,263 @@
+"""Paginated, resumable ingest and incremental sync of the Chicago crime SODA feed.
+
+Pages of ``$limit``/``$offset`` (ordered by ``:id`` so offsets are stable) are fetched by a
+bounded pool of workers with retries. Each page is parsed into a typed frame and written as
+its own chunk, and a checkpoint records finished pages so an interrupted run resumes where it
+stopped.
+
+Once the full history is in, the chunks are regrouped into one Parquet file per month and the
+high-water marks of ``date`` and ``updated_on`` are recorded (records without a parseable date go
+to an ``undated`` file, which is not a month). Later syncs fetch only records
+past those marks, upsert them by ``id`` and rewrite just the months they touch.
+
+    python chicago_ingest.py --store crime_store --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+SODA_URL = os.environ.get('CHICAGO_SODA_URL', 'https://data.cityofchicago.org/resource/ijzp-q8t2.json')
+STORE_DIR = os.environ.get('CHICAGO_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crime_store'))
+PAGE_SIZE = 50_000
+MAX_WORKERS = 4
+RETRIES = 5
+TIMEOUT = 120
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+DATE_COLUMNS = ['date', 'updated_on']
+CATEGORY_COLUMNS = ['primary_type', 'description', 'location_description', 'iucr', 'fbi_code']
+BOOLEAN_COLUMNS = ['arrest', 'domestic']
+INTEGER_COLUMNS = ['beat', 'district', 'ward', 'community_area', 'year']
+FLOAT_COLUMNS = ['latitude', 'longitude', 'x_coordinate', 'y_coordinate']
+STRING_COLUMNS = ['case_number', 'block']
+COLUMNS = ['id'] + STRING_COLUMNS + DATE_COLUMNS + CATEGORY_COLUMNS + BOOLEAN_COLUMNS + INTEGER_COLUMNS + FLOAT_COLUMNS
+
+
+def fetch_json(base_url, params, retries=RETRIES, timeout=TIMEOUT):
+    url = f"{base_url}?{urllib.parse.urlencode(params)}"
+    for attempt in range(retries + 1):
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                return json.load(response)
+        except (urllib.error.URLError, TimeoutError, ConnectionError, json.JSONDecodeError) as e:
+            # Client errors other than rate limiting will not succeed on retry
+            if isinstance(e, urllib.error.HTTPError) and e.code < 500 and e.code != 429:
+                raise
+            if attempt == retries:
+                raise
+            time.sleep(min(2 ** attempt, 30) + random.random())
+
+
+def count_rows(base_url=SODA_URL, where=None):
+    params = {'$select': 'count(*)'}
+    if where:
+        params['$where'] = where
+    return int(fetch_json(base_url, params)[0]['count'])
+
+
+def type_page(records):
+    page = pd.DataFrame.from_records(records)
+    page = page.reindex(columns=COLUMNS)
+    page['id'] = pd.to_numeric(page['id'], errors='coerce')
+    # Records without a usable id cannot be upserted, so they are skipped rather than failing the sync
+    missing = page['id'].isna()
+    if missing.any():
+        print(f"Skipped {int(missing.sum())} records without a numeric id")
+        page = page[~missing].reset_index(drop=True)
+    page['id'] = page['id'].astype('int64')
+    for column in DATE_COLUMNS:
+        page[column] = pd.to_datetime(page[column], format=DATE_FORMAT, errors='coerce')
+    for column in CATEGORY_COLUMNS:
+        page[column] = page[column].astype('category')
+    for column in BOOLEAN_COLUMNS:
+        page[column] = page[column].astype('boolean')
+    for column in INTEGER_COLUMNS:
+        page[column] = pd.to_numeric(page[column], errors='coerce').astype('Int16')
+    for column in FLOAT_COLUMNS:
+        page[column] = pd.to_numeric(page[column], errors='coerce').astype('float64')
+    for column in STRING_COLUMNS:
+        page[column] = page[column].astype('string')
+    return page
+
+
+def fetch_page(base_url, offset, limit, where=None):
+    params = {'$limit': limit, '$offset': offset, '$order': ':id'}
+    if where:
+        params['$where'] = where
+    return type_page(fetch_json(base_url, params))
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as checkpoint:
+        return json.load(checkpoint)
+
+
+def write_checkpoint(path, state):
+    # Write then rename so a crash never leaves a truncated checkpoint
+    with open(path + '.tmp', 'w') as checkpoint:
+        json.dump(state, checkpoint)
+    os.replace(path + '.tmp', path)
+
+
+def fetch_pages(base_url, total, page_size, workers, where=None, skip=()):
+    """Yield (offset, page) as the pages of a query complete."""
+    offsets = [offset for offset in range(0, total, page_size) if offset not in skip]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_page, base_url, offset, min(page_size, total - offset), where): offset
+                   for offset in offsets}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def ingest(base_url=SODA_URL, store=STORE_DIR, page_size=PAGE_SIZE, workers=MAX_WORKERS, max_rows=None):
+    chunk_dir = os.path.join(store, 'chunks')
+    os.makedirs(chunk_dir, exist_ok=True)
+    checkpoint_path = os.path.join(store, 'checkpoint.json')
+    state = read_checkpoint(checkpoint_path)
+    if state.get('url') != base_url or state.get('page_size') != page_size:
+        # Chunks from a different source or paging cannot be resumed
+        for name in os.listdir(chunk_dir):
+            os.remove(os.path.join(chunk_dir, name))
+        state = {'url': base_url, 'page_size': page_size, 'total': None, 'done': []}
+    if state['total'] is None:
+        state['total'] = count_rows(base_url)
+        write_checkpoint(checkpoint_path, state)
+    total = min(state['total'], max_rows) if max_rows else state['total']
+    done = set(state['done'])
+    pages = len(range(0, total, page_size))
+    for offset, page in fetch_pages(base_url, total, page_size, workers, skip=done):
+        page.to_parquet(os.path.join(chunk_dir, f'part-{offset:012d}.parquet'), index=False)
+        done.add(offset)
+        state['done'] = sorted(done)
+        write_checkpoint(checkpoint_path, state)
+        print(f"Ingested rows {offset}-{offset + len(page)} ({len(done)} of {pages} pages)")
+    return state
+
+
+def concat_frames(frames):
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    data = pd.concat(frames, ignore_index=True)
+    # Each frame carries its own category set, which concat widens back to strings
+    for column in CATEGORY_COLUMNS:
+        try:
+            data[column] = union_categoricals([frame[column] for frame in frames])
+        except TypeError:
+            data[column] = data[column].astype('category')
+    return data
+
+
+def read_parquet_dir(directory):
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.parquet'))
+    if not paths:
+        return type_page([])
+    return concat_frames([pd.read_parquet(path) for path in paths])
+
+
+def read_chunks(store=STORE_DIR):
+    return read_parquet_dir(os.path.join(store, 'chunks'))
+
+
+# Records whose date did not parse are kept in their own partition, which is not a month
+UNDATED = 'undated'
+
+
+def month_keys(data):
+    return data['date'].dt.to_period('M').astype(str).where(data['date'].notna(), UNDATED)
+
+
+def write_months(data, store, months=None):
+    month_dir = os.path.join(store, 'months')
+    os.makedirs(month_dir, exist_ok=True)
+    keys = month_keys(data)
+    if months is not None:
+        data, keys = data[keys.isin(months)], keys[keys.isin(months)]
+    for month, rows in data.groupby(keys.to_numpy()):
+        path = os.path.join(month_dir, f'{month}.parquet')
+        rows.to_parquet(path + '.tmp', index=False)
+        os.replace(path + '.tmp', path)
+    # A month every record moved out of (or was deleted from) has no rows left to write
+    for month in set(months or ()) - set(keys):
+        path = os.path.join(month_dir, f'{month}.parquet')
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def high_water_marks(data):
+    return {column: data[column].max().strftime(DATE_FORMAT)[:-3] for column in DATE_COLUMNS if data[column].notna().any()}
+
+
+# Merge fetched records into the frame by id and return the months whose contents changed
+def upsert(data, delta):
+    replaced = data['id'].isin(delta['id'])
+    affected = set(month_keys(delta)) | set(month_keys(data[replaced]))
+    data = concat_frames([data[~replaced], delta.drop_duplicates('id', keep='last')])
+    return data, affected
+
+
+# Full paginated ingest, regrouped by month, with the high-water marks recorded for later syncs
+def initial_load(base_url, store, page_size, workers, state_path):
+    ingest(base_url, store, page_size, workers)
+    data = read_chunks(store)
+    write_months(data, store)
+    write_checkpoint(state_path, {'url': base_url, 'marks': high_water_marks(data)})
+    for name in os.listdir(os.path.join(store, 'chunks')):
+        os.remove(os.path.join(store, 'chunks', name))
+    os.remove(os.path.join(store, 'checkpoint.json'))
+    return data
+
+
+def sync(base_url=SODA_URL, store=STORE_DIR, page_size=PAGE_SIZE, workers=MAX_WORKERS):
+    """Open the month store and fold in records newer than its high-water marks."""
+    state_path = os.path.join(store, 'sync.json')
+    state = read_checkpoint(state_path)
+    if not state.get('marks'):
+        # First run, or a store without a single dated record: with no marks to sync from (an
+        # empty filter would select the whole feed) the full history is loaded again
+        return initial_load(base_url, store, page_size, workers, state_path)
+
+    data = read_parquet_dir(os.path.join(store, 'months'))
+    where = ' OR '.join(f"{column} > '{mark}'" for column, mark in state['marks'].items())
+    try:
+        total = count_rows(base_url, where)
+        pages = [page for _, page in fetch_pages(base_url, total, page_size, workers, where)]
+    except Exception as e:
+        print("Sync failed, serving the local store:", str(e))
+        return data
+    if not pages:
+        return data
+    data, affected = upsert(data, concat_frames(pages))
+    write_months(data, store, affected)
+    state['marks'] = high_water_marks(data)
+    write_checkpoint(state_path, state)
+    print(f"Synced {sum(len(page) for page in pages)} records into {len(affected)} month partitions")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=SODA_URL)
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE)
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    parser.add_argument('--max-rows', type=int, help='ingest only this many rows into chunks, without building the month store')
+    args = parser.parse_args()
+    if args.max_rows:
+        ingest(args.url, args.store, args.page_size, args.workers, args.max_rows)
+    else:
+        sync(args.url, args.store, args.page_size, args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+"""Streaming profile of the crime data: the notebook's EDA tables over the full dataset.
+
+One pass over chunked input (Parquet files or directories such as the synced month store,
+or CSV) feeds mergeable per-column accumulators:
+
+- counts, nulls, min and max
+- mean and variance (Welford, merged with Chan's formula)
+- top values from a Misra-Gries heavy-hitters summary (counts are lower bounds, short by at
+  most rows / (k + 1))
+- distinct counts from a k-minimum-values sketch
+- quantiles from a KLL-style compactor sketch
+- pairwise-complete covariance and correlation from co-moment sums, matching DataFrame.corr()
+
+Memory depends on the sketch sizes, not the row count. Files can be profiled in parallel
+processes and the partial profiles merged.
+
+    python crime_profile.py crime_store/months --workers 4 --top 10
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 250_000
+TOP_K = 64
+QUANTILE_K = 400
+DISTINCT_K = 2048
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+class Moments:
+    def __init__(self):
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def update(self, values):
+        chunk = Moments()
+        chunk.n = len(values)
+        if chunk.n:
+            chunk.mean = float(values.mean())
+            chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+            self.merge(chunk)
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n:
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta ** 2 * self.n * other.n / n
+            self.n = n
+        return self
+
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+
+
+class HeavyHitters:
+    """Misra-Gries summary with at most k counters."""
+
+    def __init__(self, k=TOP_K):
+        self.k, self.counters = k, {}
+
+    def update(self, values):
+        self._add(values.value_counts(dropna=True).items())
+
+    def merge(self, other):
+        self._add(other.counters.items())
+        return self
+
+    def _add(self, counts):
+        for value, count in counts:
+            if count:
+                self.counters[value] = self.counters.get(value, 0) + int(count)
+        if len(self.counters) > self.k:
+            # Subtracting the (k + 1)-th largest count drops all but at most k counters
+            threshold = sorted(self.counters.values(), reverse=True)[self.k]
+            self.counters = {value: count - threshold for value, count in self.counters.items() if count > threshold}
+
+    def top(self, n=None):
+        return pd.Series(self.counters, dtype='int64').sort_values(ascending=False).head(n)
+
+
+class DistinctSketch:
+    """k-minimum-values sketch: keeps the k smallest 64-bit hashes seen."""
+
+    def __init__(self, k=DISTINCT_K):
+        self.k, self.hashes = k, np.empty(0, dtype=np.uint64)
+
+    def update(self, values):
+        self._add(pd.util.hash_pandas_object(values.dropna(), index=False).to_numpy())
+
+    def merge(self, other):
+        self._add(other.hashes)
+        return self
+
+    def _add(self, hashes):
+        self.hashes = np.unique(np.concatenate([self.hashes, hashes]))[:self.k]
+
+    def estimate(self):
+        if len(self.hashes) < self.k:
+            return len(self.hashes)
+        return int(round((self.k - 1) / (float(self.hashes[-1]) / 2.0 ** 64)))
+
+
+class QuantileSketch:
+    """KLL-style sketch: level h holds items of weight 2**h and is halved when over capacity."""
+
+    def __init__(self, k=QUANTILE_K, seed=0):
+        self.k, self.levels = k, [np.empty(0)]
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        self.levels[0] = np.concatenate([self.levels[0], np.asarray(values, dtype=np.float64)])
+        self._compress()
+
+    def merge(self, other):
+        for height, items in enumerate(other.levels):
+            if height == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[height] = np.concatenate([self.levels[height], items])
+        self._compress()
+        return self
+
+    def _capacity(self, height):
+        # Lower levels get geometrically smaller capacities, as in KLL
+        return max(int(self.k * (2 / 3) ** (len(self.levels) - height - 1)), 2)
+
+    def _compress(self):
+        height = 0
+        while height < len(self.levels):
+            items = self.levels[height]
+            if len(items) <= self._capacity(height):
+                height += 1
+                continue
+            items = np.sort(items)
+            # An odd item out stays behind; every other item of the rest moves up a level
+            keep, items = items[len(items) - len(items) % 2:], items[:len(items) - len(items) % 2]
+            if height + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[height] = keep
+            self.levels[height + 1] = np.concatenate([self.levels[height + 1], items[self.rng.integers(2)::2]])
+            height = 0
+
+    def quantiles(self, qs):
+        items = np.concatenate(self.levels)
+        if not len(items):
+            return [np.nan] * len(qs)
+        weights = np.concatenate([np.full(len(level), 2.0 ** height) for height, level in enumerate(self.levels)])
+        order = np.argsort(items)
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, np.asarray(qs) * cumulative[-1], side='left')
+        return items[order][np.minimum(positions, len(items) - 1)].tolist()
+
+
+class Covariance:
+    """Pairwise-complete co-moment sums over numeric columns, shifted for numerical stability."""
+
+    def __init__(self, columns):
+        p = len(columns)
+        self.columns, self.shift = list(columns), None
+        self.n, self.sx, self.sxx, self.sxy = (np.zeros((p, p)) for _ in range(4))
+
+    def update(self, values):
+        if self.shift is None:
+            self.shift = np.nan_to_num(pd.DataFrame(values).mean().to_numpy(dtype=np.float64))
+        present = ~np.isnan(values)
+        x = np.where(present, values - self.shift, 0.0)
+        mask = present.astype(np.float64)
+        self.n += mask.T @ mask
+        self.sx += x.T @ mask          # sx[i, j]: sum of column i over rows where i and j are present
+        self.sxx += (x * x).T @ mask
+        self.sxy += x.T @ x
+
+    def merge(self, other):
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        d = (other.shift - self.shift)[:, None]
+        # Re-express the other sums relative to this shift before adding them
+        self.sxy += other.sxy + d * other.sx.T + d.T * other.sx + d * d.T * other.n
+        self.sxx += other.sxx + 2 * d * other.sx + d ** 2 * other.n
+        self.sx += other.sx + d * other.n
+        self.n += other.n
+        return self
+
+    def corr(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = np.where(self.n > 1, self.n, np.nan)
+            cov = self.sxy - self.sx * self.sx.T / n
+            var = self.sxx - self.sx ** 2 / n
+            corr = cov / np.sqrt(var * var.T)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.columns, columns=self.columns)
+
+
+def column_kind(values):
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return 'categorical'
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return 'numeric'
+    return 'categorical'
+
+
+class ColumnProfile:
+    def __init__(self, kind):
+        self.kind, self.count, self.nulls = kind, 0, 0
+        self.minimum = self.maximum = None
+        self.moments = Moments() if kind != 'categorical' else None
+        self.quantiles = QuantileSketch() if kind != 'categorical' else None
+        self.top = HeavyHitters() if kind == 'categorical' else None
+        self.distinct = DistinctSketch() if kind == 'categorical' else None
+
+    def update(self, values):
+        nulls = int(values.isna().sum())
+        self.nulls += nulls
+        self.count += len(values) - nulls
+        if self.kind == 'categorical':
+            self.top.update(values)
+            self.distinct.update(values)
+            return
+        numbers = numeric_values(values)
+        numbers = numbers[~np.isnan(numbers)]
+        if len(numbers):
+            self._extend(numbers.min(), numbers.max())
+            self.moments.update(numbers)
+            self.quantiles.update(numbers)
+
+    def merge(self, other):
+        self.count += other.count
+        self.nulls += other.nulls
+        if self.kind == 'categorical':
+            self.top.merge(other.top)
+            self.distinct.merge(other.distinct)
+        else:
+            if other.minimum is not None:
+                self._extend(other.minimum, other.maximum)
+            self.moments.merge(other.moments)
+            self.quantiles.merge(other.quantiles)
+        return self
+
+    def _extend(self, minimum, maximum):
+        self.minimum = minimum if self.minimum is None else min(self.minimum, minimum)
+        self.maximum = maximum if self.maximum is None else max(self.maximum, maximum)
+
+    def describe(self):
+        if self.kind == 'categorical':
+            top = self.top.top(1)
+            return {'count': self.count, 'unique': self.distinct.estimate(),
+                    'top': top.index[0] if len(top) else None, 'freq': int(top.iloc[0]) if len(top) else None}
+        convert = (lambda value: pd.Timestamp(int(value))) if self.kind == 'datetime' else float
+        quantiles = self.quantiles.quantiles(QUANTILES)
+        summary = {'count': self.count, 'mean': convert(self.moments.mean) if self.count else None,
+                   'min': convert(self.minimum) if self.count else None}
+        summary.update({f'{q:.0%}': convert(value) if self.count else None for q, value in zip(QUANTILES, quantiles)})
+        summary['max'] = convert(self.maximum) if self.count else None
+        if self.kind == 'numeric':
+            summary['std'] = self.moments.std()
+        return summary
+
+
+def numeric_values(values):
+    if pd.api.types.is_datetime64_any_dtype(values.dtype):
+        if getattr(values.dt, 'tz', None) is not None:
+            values = values.dt.tz_convert(None)
+        numbers = values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+        numbers[values.isna().to_numpy()] = np.nan
+        return numbers
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class Profile:
+    def __init__(self):
+        self.rows, self.columns, self.covariance = 0, {}, None
+
+    def update(self, chunk):
+        if not self.columns:
+            self.columns = {name: ColumnProfile(column_kind(chunk[name])) for name in chunk.columns}
+            self.covariance = Covariance(self.numeric_columns())
+        self.rows += len(chunk)
+        for name, column in self.columns.items():
+            column.update(chunk[name] if name in chunk.columns else pd.Series([None] * len(chunk)))
+        self.covariance.update(np.column_stack([numeric_values(chunk[name]) for name in self.covariance.columns])
+                               if self.covariance.columns else np.empty((len(chunk), 0)))
+        return self
+
+    def merge(self, other):
+        if not self.columns:
+            return other
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+        self.covariance.merge(other.covariance)
+        return self
+
+    def numeric_columns(self):
+        return [name for name, column in self.columns.items() if column.kind == 'numeric']
+
+    # The notebook's tables, computed from the accumulators
+    def describe(self):
+        return pd.DataFrame({name: column.describe() for name, column in self.columns.items()})
+
+    def isna(self):
+        return pd.Series({name: column.nulls for name, column in self.columns.items()}, dtype='int64')
+
+    def value_counts(self, column, n=None):
+        return self.columns[column].top.top(n).rename('count')
+
+    def corr(self):
+        return self.covariance.corr()
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield DataFrames of at most chunk_rows rows from a Parquet or CSV file."""
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+        return
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def data_files(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(('.parquet', '.csv')))
+        else:
+            files.append(path)
+    return files
+
+
+def profile_frames(frames):
+    return reduce(Profile.update, frames, Profile())
+
+
+def profile_file(path, chunk_rows=CHUNK_ROWS):
+    return profile_frames(read_chunks(path, chunk_rows))
+
+
+def profile_files(paths, workers=1, chunk_rows=CHUNK_ROWS):
+    """Profile files or directories of files, one process per file when workers > 1."""
+    files = data_files(paths)
+    if workers > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            profiles = list(executor.map(profile_file, files, [chunk_rows] * len(files)))
+    else:
+        profiles = [profile_file(path, chunk_rows) for path in files]
+    return reduce(Profile.merge, profiles, Profile())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='Parquet/CSV files or directories of them')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    profile = profile_files(args.paths, args.workers, args.chunk_rows)
+    with pd.option_context('display.width', 200, 'display.max_columns', 50):
+        print(f"{profile.rows} rows")
+        print(profile.describe())
+        print(profile.isna())
+        for column in ['primary_type', 'fbi_code']:
+            if column in profile.columns:
+                print(profile.value_counts(column, args.top))
+        print(profile.corr().round(3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+// Superstore views for SUPERSTORE_RENDER_MODE=client: the page arrives with every view of every
+// year already rendered by the server (client_views), so switching years and reports is a lookup
+// here with no round trip. Only a view sent with placeholder figures is requested again
+// (serve_client_view), and the server replaces the whole set when the dataset version changes.
+function viewKey(year, view) {
+    if (view === '2012 Reports') {
+        return view + '|';
+    }
+    if ((view === 'Management Dashboard' || view === 'Year Based') && year) {
+        return view + '|' + year;
+    }
+    return null;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    superstoreViews: {
+        // Ask the server again only for a view whose figures failed to build
+        request: function (year, view, views) {
+            var key = viewKey(year, view);
+            var sent = key && views && views.views[key];
+            if (!sent || sent.complete) {
+                return window.dash_clientside.no_update;
+            }
+            return {key: key, view: view, year: Number(year) || null};
+        },
+        // Swap a re-served view into the set, unless the set moved on to a new version meanwhile
+        store: function (served, views) {
+            if (!served || !views || views.version !== served.version) {
+                return window.dash_clientside.no_update;
+            }
+            var updated = Object.assign({}, views.views);
+            updated[served.key] = {children: served.children, complete: served.complete};
+            return {version: views.version, views: updated};
+        },
+        render: function (year, view, views) {
+            var key = viewKey(year, view);
+            var sent = key && views && views.views[key];
+            return sent ? sent.children : window.dash_clientside.no_update;
+        },
+        toggleAccordion: function (nClicks, style) {
+            return Object.assign({}, style, {display: nClicks % 2 === 1 ? 'block' : 'none'});
+        },
+        yearSelectorDisabled: function (view) {
+            return view !== 'Year Based' && view !== 'Management Dashboard';
+        }
+    }
+});
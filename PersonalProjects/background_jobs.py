@@ -0,0 +1,95 @@
+"""Background execution of the dashboards' heavy callbacks on a local diskcache queue.
+
+``create_manager`` returns a Dash ``DiskcacheManager``: background callbacks run in a forked
+process and report progress through the cache, so no external broker is needed. Dash hands each
+job's result to the browser once and drops it. Results are reused across requests only through
+``coalesce``, which caches them on disk under the caller's key and serializes jobs for the same
+key behind a diskcache lock. Duplicates that arrive while the first job is computing wait for it
+and reuse its result instead of recomputing.
+
+The cache is on disk, so it outlives the process and is shared by serve.py's workers. Keys must
+therefore identify the data by content: ``frame_fingerprint`` or ``files_fingerprint``, never a
+counter that restarts with the process. ``extend_fingerprint`` carries a fingerprint over
+appended rows. A computation raises ``Uncacheable`` to serve a result
+once without caching it, such as a dashboard with placeholder figures.
+
+Without diskcache (and the multiprocess and psutil packages Dash needs with it), or with
+DASHBOARD_BACKGROUND=0, ``create_manager`` returns None and the callbacks run inline.
+"""
+
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+JOBS_DIR = os.environ.get('DASHBOARD_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'dashboard-jobs'))
+RESULT_EXPIRE = 3600
+LOCK_EXPIRE = 600
+POLL_INTERVAL = 250  # milliseconds between the browser's polls for a running job
+MISSING = object()
+
+
+class Uncacheable(Exception):
+    def __init__(self, result):
+        super().__init__("result must not be cached")
+        self.result = result
+
+
+# Content hash of a loaded frame, for keying results computed from it
+def frame_fingerprint(frame):
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+# Fingerprint of a frame with rows appended, from the fingerprint it had before and a hash of the
+# appended rows only, so a refresh does not re-hash everything already loaded
+def extend_fingerprint(fingerprint, delta):
+    return hashlib.sha1(f'{fingerprint}+{frame_fingerprint(delta)}'.encode()).hexdigest()
+
+
+# Path, modification time and size of each file a dataset is queried from
+def files_fingerprint(paths):
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        stat = os.stat(path)
+        digest.update(f'{path}:{stat.st_mtime_ns}:{stat.st_size};'.encode())
+    return digest.hexdigest()
+
+
+def create_manager(name, directory=JOBS_DIR, expire=RESULT_EXPIRE):
+    if os.environ.get('DASHBOARD_BACKGROUND', '1') == '0':
+        return None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+        return DiskcacheManager(diskcache.Cache(os.path.join(directory, name)), expire=expire)
+    except ImportError as e:
+        print("Background callbacks disabled, running inline:", str(e).splitlines()[0])
+        return None
+
+
+# The result of compute, including one it raised as Uncacheable
+def uncached(compute):
+    try:
+        return compute()
+    except Uncacheable as e:
+        return e.result
+
+
+def coalesce(manager, key, compute, expire=RESULT_EXPIRE):
+    if manager is None:
+        return uncached(compute)
+    import diskcache
+    cache, result_key = manager.handle, f'coalesced:{key}'
+    result = cache.get(result_key, default=MISSING)
+    if result is MISSING:
+        with diskcache.Lock(cache, f'lock:{key}', expire=LOCK_EXPIRE):
+            result = cache.get(result_key, default=MISSING)
+            if result is MISSING:
+                try:
+                    result = compute()
+                except Uncacheable as e:
+                    return e.result
+                cache.set(result_key, result, expire=expire)
+    return result
@@ -0,0 +1,40 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+from synthetic import write_chicago_json, write_superstore_csv
+
+# The dashboards are scripts with spaces in their file names, so they are loaded by path
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUPERSTORE_SCRIPT = os.path.join(PROJECT_DIR, '3a SuperstoreDashboard_LOCAL_optimized.py')
+CHICAGO_DIR = os.path.join(PROJECT_DIR, 'Chicago_Crime_Analysis')
+CHICAGO_SCRIPT = os.path.join(CHICAGO_DIR, '4a ChicagoCrimesDataVisualization.py')
+# The scripts import their helper modules from their own directories
+sys.path[:0] = [PROJECT_DIR, CHICAGO_DIR]
+
+
+def load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pools can pickle the module's functions by reference
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    # The scripts load their data on a background thread; measurements need it in place
+    if hasattr(module, 'data_ready'):
+        module.data_ready.wait()
+    return module
+
+
+def load_superstore(rows, workdir=None, seed=0):
+    workdir = workdir or tempfile.mkdtemp(prefix='superstore-bench-')
+    source = write_superstore_csv(os.path.join(workdir, f'superstore-{rows}.csv'), rows, seed)
+    os.environ['SUPERSTORE_SOURCE'] = source
+    os.environ['SUPERSTORE_SNAPSHOT'] = os.path.join(workdir, f'superstore-{rows}.parquet')
+    return load_script(SUPERSTORE_SCRIPT, f'superstore_{rows}')
+
+
+def load_chicago(rows, workdir=None, seed=0):
+    workdir = workdir or tempfile.mkdtemp(prefix='chicago-bench-')
+    os.environ['CHICAGO_DATA_SOURCE'] = write_chicago_json(os.path.join(workdir, f'crimes-{rows}.json'), rows, seed)
+    return load_script(CHICAGO_SCRIPT, f'chicago_{rows}')
@@ -0,0 +1,160 @@
+"""Benchmark the dashboard callbacks directly, without a browser or network, on synthetic data of any size.
+
+Writes a JSON report with wall time, peak traced memory and response payload bytes per
+dashboard type/year (Superstore) and crime type/month (Chicago), so two versions can be diffed.
+
+    python benchmarks/callbacks.py --sizes 10k 1m 10m --output report.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+from plotly.io.json import to_json_plotly
+
+from _dashboards import PROJECT_DIR, load_chicago, load_superstore
+
+SUPERSTORE_VIEWS = [('Management Dashboard', year) for year in range(2011, 2015)] + \
+                   [('Year Based', year) for year in range(2011, 2015)] + \
+                   [('2012 Reports', None)]
+
+
+def parse_size(text):
+    multipliers = {'k': 1_000, 'm': 1_000_000}
+    suffix = text[-1].lower()
+    return int(float(text[:-1]) * multipliers[suffix]) if suffix in multipliers else int(text)
+
+
+# Memoized helpers a callback fills, cleared before each cold call. Chicago also warms the
+# all-crimes pyramid at load time, so without the reset its numbers would be warm-cache timings
+SUPERSTORE_CACHES = ['render_dashboard']
+CHICAGO_CACHES = ['heatmap_pyramid', 'heatmap_tile', 'breakdowns']
+
+
+def cache_reset(module, names):
+    caches = [getattr(module, name) for name in names if hasattr(module, name)]
+    if not caches:
+        return None
+
+    def reset():
+        for cache in caches:
+            cache.cache_clear()
+    return reset
+
+
+def measure(callback, *args, reset=None):
+    if reset:
+        reset()
+    gc.collect()
+    start = time.perf_counter()
+    response = callback(*args)
+    wall = time.perf_counter() - start
+    payload = len(to_json_plotly(response))
+
+    # Peak memory is traced in a separate cold call so tracing overhead stays out of the wall time
+    if reset:
+        reset()
+    gc.collect()
+    tracemalloc.start()
+    callback(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    callback(*args)
+    warm = time.perf_counter() - start
+    return {'wall_ms': round(wall * 1000, 2), 'warm_ms': round(warm * 1000, 2),
+            'peak_bytes': peak, 'payload_bytes': payload}
+
+
+def bench_superstore(rows, workdir):
+    start = time.perf_counter()
+    dashboard = load_superstore(rows, workdir)
+    load_seconds = time.perf_counter() - start
+    reset = cache_reset(dashboard, SUPERSTORE_CACHES)
+    results = []
+    for view, year in SUPERSTORE_VIEWS:
+        result = measure(dashboard.update_output_container, str(year) if year else None, view, reset=reset)
+        results.append({'app': 'superstore', 'rows': rows, 'view': view, 'year': year, **result})
+        print(f"superstore {rows:>10} {view:>22} {year or '':>5} {result['wall_ms']:>10} ms "
+              f"{result['peak_bytes']:>12} peak {result['payload_bytes']:>10} bytes")
+    del sys.modules[dashboard.__name__]
+    return {'app': 'superstore', 'rows': rows, 'load_seconds': round(load_seconds, 3)}, results
+
+
+def bench_chicago(rows, workdir, crime_types, months):
+    start = time.perf_counter()
+    dashboard = load_chicago(rows, workdir)
+    load_seconds = time.perf_counter() - start
+    data = dashboard.data
+    top_types = data['primary_type'].value_counts().index[:crime_types].tolist()
+    latest_months = data['month'].cat.categories[-months:]
+    reset = cache_reset(dashboard, CHICAGO_CACHES)
+    results = []
+    for crime_type in [None] + top_types:
+        for month in [None] + list(latest_months):
+            all_months = ['all'] if month is None else []
+            result = measure(dashboard.update_heatmap, crime_type, month, all_months, reset=reset)
+            results.append({'app': 'chicago', 'rows': rows, 'crime_type': crime_type or 'All Crimes',
+                            'month': str(month) if month is not None else 'All Months', **result})
+            print(f"chicago    {rows:>10} {crime_type or 'All Crimes':>22} {str(month or 'All'):>8} {result['wall_ms']:>10} ms "
+                  f"{result['peak_bytes']:>12} peak {result['payload_bytes']:>10} bytes")
+    del sys.modules[dashboard.__name__]
+    return {'app': 'chicago', 'rows': rows, 'load_seconds': round(load_seconds, 3)}, results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['10k', '1m'], help='row counts, e.g. 10k 1m 10m')
+    parser.add_argument('--apps', nargs='+', default=['superstore', 'chicago'], choices=['superstore', 'chicago'])
+    parser.add_argument('--crime-types', type=int, default=3, help='most frequent crime types to benchmark')
+    parser.add_argument('--months', type=int, default=2, help='latest months to benchmark')
+    parser.add_argument('--output', default='benchmark-report.json')
+    args = parser.parse_args()
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'loads': [],
+        'results': [],
+    }
+    for size in map(parse_size, args.sizes):
+        workdir = tempfile.mkdtemp(prefix='dashboard-bench-')
+        try:
+            if 'superstore' in args.apps:
+                load, results = bench_superstore(size, workdir)
+                report['loads'].append(load)
+                report['results'].extend(results)
+            if 'chicago' in args.apps:
+                load, results = bench_chicago(size, workdir, args.crime_types, args.months)
+                report['loads'].append(load)
+                report['results'].extend(results)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        gc.collect()
+
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
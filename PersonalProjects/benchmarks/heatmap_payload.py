@@ -0,0 +1,64 @@
+"""Payload size and latency of the Chicago heatmap callback, raw points versus server-side binning.
+
+Binned mode is measured at the default city view and zoomed into downtown; cold timings start
+from empty pyramid and tile caches, warm timings replay the same viewport.
+"""
+
+import argparse
+import json
+import time
+
+from plotly.io.json import to_json_plotly
+
+from _dashboards import load_chicago
+from callbacks import parse_size
+
+VIEWS = [
+    ('raw', 'city', None),
+    ('binned', 'city', None),
+    ('binned', 'downtown', {'center': {'lat': 41.8826, 'lon': -87.6233}, 'zoom': 14}),
+]
+
+
+def render(dashboard, crime_type, month, viewport):
+    start = time.perf_counter()
+    figure = dashboard.update_heatmap(crime_type, month, ['all'] if month is None else [], viewport)
+    payload = len(to_json_plotly(figure))
+    return time.perf_counter() - start, payload
+
+
+def measure(dashboard, crime_type, month, mode, view, viewport, repeats):
+    dashboard.HEATMAP_MODE = mode
+    dashboard.heatmap_pyramid.cache_clear()
+    dashboard.heatmap_tile.cache_clear()
+    cold, payload = render(dashboard, crime_type, month, viewport)
+    warm = min(render(dashboard, crime_type, month, viewport)[0] for _ in range(repeats))
+    return {'mode': mode, 'view': view, 'crime_type': crime_type or 'All Crimes', 'month': month or 'All Months',
+            'payload_bytes': payload, 'cold_ms': round(cold * 1000, 2), 'warm_ms': round(warm * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', nargs='+', default=['100k', '1m'])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = []
+    for rows in map(parse_size, args.sizes):
+        dashboard = load_chicago(rows)
+        top_type = dashboard.data['primary_type'].value_counts().index[0]
+        latest_month = max(dashboard.data['month'].dropna())
+        for crime_type, month in [(None, None), (top_type, None), (None, latest_month), (top_type, latest_month)]:
+            for mode, view, viewport in VIEWS:
+                result = {'rows': rows, **measure(dashboard, crime_type, month, mode, view, viewport, args.repeats)}
+                results.append(result)
+                print(f"{rows:>10} {result['crime_type']:>12} {result['month']:>10} {mode:>7} {view:>9} "
+                      f"{result['payload_bytes']:>12} bytes {result['cold_ms']:>9} ms cold {result['warm_ms']:>9} ms warm")
+    if args.output:
+        with open(args.output, 'w') as report:
+            json.dump(results, report, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Load-test serve.py: requests/sec and latency of the heaviest callback as worker count grows.
+
+For each worker count, a server is started on synthetic data and a pool of client threads
+posts the dashboard's main callback (the Chicago heatmap or the Superstore dashboard render)
+with rotating inputs for a fixed duration. The callbacks run inline (DASHBOARD_BACKGROUND=0):
+as background callbacks, a POST only submits a job, so the test would time submissions rather
+than renders.
+
+    python benchmarks/load_test.py chicago --rows 1m --workers 1 2 4 --clients 16 --duration 20
+"""
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from _dashboards import PROJECT_DIR
+from callbacks import parse_size
+from synthetic import CRIME_TYPES, write_chicago_json, write_superstore_csv
+
+SERVE_SCRIPT = os.path.join(PROJECT_DIR, 'serve.py')
+
+
+def callback_payloads(app):
+    # Bodies for Dash's /_dash-update-component endpoint, as the browser would send them
+    if app == 'chicago':
+        months = [None, '2025-06', '2025-05', '2024-12']
+        return [{
+            'output': 'crime-heatmap.figure',
+            'outputs': {'id': 'crime-heatmap', 'property': 'figure'},
+            'inputs': [
+                {'id': 'crime-type-dropdown', 'property': 'value', 'value': crime_type},
+                {'id': 'month-dropdown', 'property': 'value', 'value': month},
+                {'id': 'all-months-checkbox', 'property': 'value', 'value': [] if month else ['all']},
+                {'id': 'map-viewport', 'property': 'data', 'value': None},
+                {'id': 'breakdown-selection', 'property': 'data', 'value': None},
+            ],
+            'changedPropIds': ['crime-type-dropdown.value'],
+            'state': [],
+        } for crime_type, month in itertools.product(CRIME_TYPES[:6], months)]
+    views = [('Management Dashboard', year) for year in range(2011, 2015)] + \
+            [('Year Based', year) for year in range(2011, 2015)] + [('2012 Reports', None)]
+    return [{
+        'output': 'output-container.children',
+        'outputs': {'id': 'output-container', 'property': 'children'},
+        'inputs': [
+            {'id': 'select-year', 'property': 'value', 'value': year},
+            {'id': 'dashboard-type', 'property': 'value', 'value': view},
+        ],
+        'changedPropIds': ['dashboard-type.value'],
+        'state': [],
+    } for view, year in views]
+
+
+def start_server(app, workers, port, env):
+    server = subprocess.Popen([sys.executable, SERVE_SCRIPT, app, '--workers', str(workers),
+                               '--bind', f'127.0.0.1:{port}'], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/readyz', timeout=5).read()
+            return server
+        except OSError:
+            # Including 503 from /readyz while the workers are still loading
+            if server.poll() is not None:
+                raise RuntimeError(f'serve.py exited with code {server.returncode}')
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError('serve.py did not start in time')
+
+
+def run_clients(port, payloads, clients, duration):
+    url = f'http://127.0.0.1:{port}/_dash-update-component'
+    bodies = [json.dumps(payload).encode() for payload in payloads]
+    latencies, errors = [], []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def client(offset):
+        for body in itertools.islice(itertools.cycle(bodies), offset, None):
+            if time.monotonic() >= stop:
+                return
+            request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(request, timeout=120).read()
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except OSError as e:
+                with lock:
+                    errors.append(str(e))
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'requests_per_second': round(len(latencies) / duration, 2),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+        'p95_ms': round(float(np.percentile(latencies, 95)), 2) if len(latencies) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('app', choices=['chicago', 'superstore'])
+    parser.add_argument('--rows', default='200k')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=8097)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    workdir = tempfile.mkdtemp(prefix='load-test-')
+    # Inline callbacks, and a job cache of this run's own should anything still use one
+    env = dict(os.environ, DASHBOARD_BACKGROUND='0', DASHBOARD_JOBS_DIR=os.path.join(workdir, 'jobs'))
+    if args.app == 'chicago':
+        env['CHICAGO_DATA_SOURCE'] = write_chicago_json(os.path.join(workdir, 'crimes.json'), rows)
+    else:
+        env['SUPERSTORE_SOURCE'] = write_superstore_csv(os.path.join(workdir, 'superstore.csv'), rows)
+        env['SUPERSTORE_SNAPSHOT'] = os.path.join(workdir, 'superstore.parquet')
+
+    results = []
+    for workers in args.workers:
+        server = start_server(args.app, workers, args.port, env)
+        try:
+            result = {'app': args.app, 'rows': rows, 'workers': workers, 'clients': args.clients,
+                      **run_clients(args.port, callback_payloads(args.app), args.clients, args.duration)}
+        finally:
+            server.terminate()
+            server.wait()
+        results.append(result)
+        print(f"{args.app:>10} {rows:>10} rows {workers:>3} workers {result['requests_per_second']:>9} req/s "
+              f"p50 {result['p50_ms']} ms p95 {result['p95_ms']} ms ({result['errors']} errors)")
+    if args.output:
+        with open(args.output, 'w') as report:
+            json.dump(results, report, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Check the DuckDB query backend against the in-memory pandas path and time both.
+
+Each dashboard is loaded twice on the same synthetic data: Superstore on its CSV (pandas) and on
+the Parquet snapshot (DuckDB), Chicago on its JSON feed (pandas) and on a month store written by
+chicago_ingest.py (DuckDB). Every chart query is run on both and the results are compared.
+
+    python benchmarks/query_backends.py --rows 200k
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from callbacks import parse_size
+from synthetic import CRIME_TYPES, chicago_frame
+
+REPEATS = 5
+
+
+def timed(query, *args):
+    result = query(*args)
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        query(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, round(best * 1000, 2)
+
+
+# Results are compared as plain sorted frames: categoricals as strings, numbers within float tolerance
+def same_frame(left, right, keys):
+    left, right = (frame.reset_index(drop=True).copy() for frame in (left, right))
+    if len(left) != len(right) or set(left.columns) != set(right.columns):
+        return False
+    for frame in (left, right):
+        for column in frame.columns:
+            if not pd.api.types.is_numeric_dtype(frame[column]) or isinstance(frame[column].dtype, pd.CategoricalDtype):
+                frame[column] = frame[column].astype(object).where(frame[column].notna(), None).astype(str)
+    left = left.sort_values(keys, ignore_index=True)
+    right = right[left.columns].sort_values(keys, ignore_index=True)
+    for column in left.columns:
+        if pd.api.types.is_numeric_dtype(left[column]):
+            if not np.allclose(left[column].to_numpy(dtype=np.float64), right[column].to_numpy(dtype=np.float64),
+                               rtol=1e-9, equal_nan=True):
+                return False
+        elif not left[column].equals(right[column]):
+            return False
+    return True
+
+
+def compare(name, queries, pandas_dashboard, duckdb_dashboard, keys):
+    results = []
+    for label, query, args in queries:
+        expected, pandas_ms = timed(getattr(pandas_dashboard, query), *args(pandas_dashboard))
+        actual, duckdb_ms = timed(getattr(duckdb_dashboard, query), *args(duckdb_dashboard))
+        if isinstance(expected, pd.Series):
+            match = expected.sort_index().astype('int64').equals(actual.sort_index().astype('int64'))
+        else:
+            match = same_frame(expected, actual, keys[query])
+        results.append({'dashboard': name, 'query': label, 'rows': len(expected), 'match': match,
+                        'pandas_ms': pandas_ms, 'duckdb_ms': duckdb_ms})
+    return results
+
+
+def superstore_results(rows, workdir):
+    from _dashboards import SUPERSTORE_SCRIPT, load_script, load_superstore
+    os.environ['SUPERSTORE_QUERY_BACKEND'] = 'pandas'
+    pandas_dashboard = load_superstore(rows, workdir)
+    os.environ['SUPERSTORE_QUERY_BACKEND'] = 'duckdb'
+    duckdb_dashboard = load_script(SUPERSTORE_SCRIPT, 'superstore_duckdb')
+    years = sorted(pandas_dashboard.cube['Year'].unique().tolist())
+    queries = []
+    for year in years:
+        queries += [
+            (f'cube {year}', 'cube_for_year', lambda dashboard, year=year: (dashboard.cube, year)),
+            (f'scatter points {year}', 'points_for_year', lambda dashboard, year=year: (dashboard.year_points, year)),
+            (f'orders by continent {year}', 'orders_by_continent', lambda dashboard, year=year: (dashboard.order_partitions, year)),
+        ]
+    keys = {'cube_for_year': pandas_dashboard.CUBE_DIMENSIONS, 'points_for_year': ['Sales', 'Profit']}
+    return compare('superstore', queries, pandas_dashboard, duckdb_dashboard, keys)
+
+
+def chicago_results(rows, workdir):
+    # The month store location is read when chicago_ingest is first imported
+    os.environ['CHICAGO_STORE'] = os.path.join(workdir, 'crime_store')
+    from _dashboards import CHICAGO_SCRIPT, load_chicago, load_script
+    from chicago_ingest import STORE_DIR, type_page, write_months
+    write_months(type_page(chicago_frame(rows).to_dict('records')), STORE_DIR)
+    os.environ['CHICAGO_QUERY_BACKEND'] = 'pandas'
+    pandas_dashboard = load_chicago(rows, workdir)
+    os.environ['CHICAGO_QUERY_BACKEND'] = 'duckdb'
+    duckdb_dashboard = load_script(CHICAGO_SCRIPT, 'chicago_duckdb')
+    month = pandas_dashboard.months[-1]
+    queries = [(f"points {crime_type or 'all crimes'} in {selected or 'all months'}", 'heatmap_points',
+                lambda dashboard, crime_type=crime_type, selected=selected: (crime_type, selected))
+               for crime_type in [None, CRIME_TYPES[0], CRIME_TYPES[-1]] for selected in [None, month]]
+    results = compare('chicago', queries, pandas_dashboard, duckdb_dashboard, {'heatmap_points': ['id']})
+
+    # The timeline reads one month partition per frame on the DuckDB backend
+    frames = {}
+    for label, dashboard in [('pandas', pandas_dashboard), ('duckdb', duckdb_dashboard)]:
+        start = time.perf_counter()
+        frames[label] = dashboard.timeline_frames(CRIME_TYPES[0])
+        frames[label + '_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    match = all(frames['pandas'][key] == frames['duckdb'][key] for key in ['months', 'latitude', 'longitude', 'zmax', 'frames'])
+    results.append({'dashboard': 'chicago', 'query': f'timeline {CRIME_TYPES[0]}', 'rows': len(frames['pandas']['frames']),
+                    'match': match, 'pandas_ms': frames['pandas_ms'], 'duckdb_ms': frames['duckdb_ms']})
+
+    # Cross-filtered breakdowns: bitmaps on the pandas backend, GROUP BY queries on DuckDB.
+    # The bitmap index also lists the values left with no rows, which SQL does not return
+    selection = pandas_dashboard.selection_key({'district': ['3', '7'], 'dow': ['Friday'], 'arrest': ['True']})
+    for crime_type, selected in [(None, None), (CRIME_TYPES[0], month)]:
+        counts = {}
+        for label, dashboard in [('pandas', pandas_dashboard), ('duckdb', duckdb_dashboard)]:
+            counts[label], counts[label + '_ms'] = timed(dashboard.breakdowns.__wrapped__, crime_type, selected, selection)
+            counts[label] = {name: {key: count for key, count in zip(*bars) if count}
+                             for name, bars in counts[label].items()}
+        points = [set(dashboard.heatmap_points(crime_type, selected, selection)['id'])
+                  for dashboard in (pandas_dashboard, duckdb_dashboard)]
+        results.append({'dashboard': 'chicago', 'query': f"breakdowns {crime_type or 'all crimes'} in {selected or 'all months'}",
+                        'rows': sum(counts['pandas']['district'].values()),
+                        'match': counts['pandas'] == counts['duckdb'] and points[0] == points[1],
+                        'pandas_ms': counts['pandas_ms'], 'duckdb_ms': counts['duckdb_ms']})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='200k')
+    parser.add_argument('--dashboard', choices=['superstore', 'chicago', 'both'], default='both')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    rows = parse_size(args.rows)
+    workdir = tempfile.mkdtemp(prefix='query-backends-')
+    results = []
+    if args.dashboard in ('superstore', 'both'):
+        results += superstore_results(rows, workdir)
+    if args.dashboard in ('chicago', 'both'):
+        results += chicago_results(rows, workdir)
+    for result in results:
+        print(f"{result['dashboard']:>10} {result['query']:<45} {result['rows']:>9} rows "
+              f"pandas {result['pandas_ms']:>9} ms duckdb {result['duckdb_ms']:>9} ms "
+              f"{'match' if result['match'] else 'MISMATCH'}")
+    if args.output:
+        with open(args.output, 'w') as report:
+            json.dump(results, report, indent=2)
+    if not all(result['match'] for result in results):
+        raise SystemExit('DuckDB results differ from the pandas path')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Response bytes and build/serialize time of the Year Based Sales-vs-Profit scatter per payload mode."""
+
+import argparse
+import json
+import time
+
+from plotly.io.json import to_json_plotly
+
+from _dashboards import load_superstore
+from synthetic import superstore_frame
+
+MODES = ['raw', 'sample', 'density']
+
+
+def measure(dashboard, points, mode, repeats):
+    build, serialize, payload = [], [], 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        figure = dashboard.create_sales_profit_scatter(points, 2012, mode=mode)
+        built = time.perf_counter()
+        payload = len(to_json_plotly(figure))
+        build.append(built - start)
+        serialize.append(time.perf_counter() - built)
+    return {'mode': mode, 'points': len(points), 'payload_bytes': payload,
+            'build_ms': round(min(build) * 1000, 2), 'serialize_ms': round(min(serialize) * 1000, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    dashboard = load_superstore(10_000)
+    results = []
+    for size in args.sizes:
+        points = superstore_frame(size)[['Sales', 'Profit']]
+        for mode in MODES:
+            result = measure(dashboard, points, mode, args.repeats)
+            results.append(result)
+            print(f"{size:>10} {mode:>8} {result['payload_bytes']:>12} bytes "
+                  f"{result['build_ms']:>9} ms build {result['serialize_ms']:>9} ms serialize")
+    if args.output:
+        with open(args.output, 'w') as report:
+            json.dump(results, report, indent=2)
+
+
+if __name__ == '__main__':
+    main()
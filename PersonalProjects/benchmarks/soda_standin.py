@@ -0,0 +1,99 @@
+"""Local stand-in for the Chicago SODA endpoint, serving synthetic crimes over HTTP.
+
+Supports the subset of SoQL the ingester uses: ``$limit``, ``$offset``, ``$order`` (``:id``, a
+column, optionally ``DESC``), ``$select=count(*)`` and ``$where`` comparisons of the form
+``column > 'value'`` joined by ``OR``. ``--fail-rate`` answers a share of requests with 503 so
+retries can be exercised.
+
+    python benchmarks/soda_standin.py --rows 1m --port 8765
+    python Chicago_Crime_Analysis/chicago_ingest.py --url http://127.0.0.1:8765/resource/ijzp-q8t2.json
+"""
+
+import argparse
+import json
+import random
+import re
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from callbacks import parse_size
+from synthetic import chicago_frame
+
+WHERE_TERM = re.compile(r"^\s*(\w+)\s*(>=|>|<=|<|=)\s*'([^']*)'\s*$")
+
+
+def apply_where(frame, where):
+    mask = None
+    for term in re.split(r'\s+OR\s+', where, flags=re.IGNORECASE):
+        match = WHERE_TERM.match(term)
+        if not match:
+            raise ValueError(f'unsupported $where term: {term}')
+        column, operator, value = match.groups()
+        values = frame[column]
+        term_mask = {'>': values > value, '>=': values >= value, '<': values < value,
+                     '<=': values <= value, '=': values == value}[operator]
+        mask = term_mask if mask is None else mask | term_mask
+    return frame[mask]
+
+
+class SodaHandler(BaseHTTPRequestHandler):
+    frame = None
+    fail_rate = 0.0
+
+    def do_GET(self):
+        if random.random() < self.fail_rate:
+            self.send_error(503, 'Injected failure')
+            return
+        params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+        try:
+            frame = self.frame
+            if '$where' in params:
+                frame = apply_where(frame, params['$where'])
+            if params.get('$select', '').replace(' ', '').lower() == 'count(*)':
+                body = json.dumps([{'count': str(len(frame))}])
+            else:
+                # The frame is kept in :id order, so only other orderings need a sort
+                order = params.get('$order', ':id').split()
+                if order[0] != ':id':
+                    frame = frame.sort_values(order[0], ascending=len(order) == 1 or order[1].upper() != 'DESC', kind='stable')
+                offset = int(params.get('$offset', 0))
+                frame = frame.iloc[offset:offset + int(params.get('$limit', 1000))]
+                body = frame.to_json(orient='records')
+        except (KeyError, ValueError) as e:
+            self.send_error(400, str(e))
+            return
+        payload = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(rows, port=8765, fail_rate=0.0, seed=0):
+    frame = chicago_frame(rows, seed).sort_values('id', ignore_index=True)
+    # SODA returns numbers as strings; keep that so the ingester's typing is exercised
+    for column in ['id', 'beat', 'district', 'ward', 'community_area', 'year', 'x_coordinate', 'y_coordinate',
+                   'latitude', 'longitude']:
+        frame[column] = frame[column].astype(str)
+    handler = type('Handler', (SodaHandler,), {'frame': frame, 'fail_rate': fail_rate})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', default='100k')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = serve(parse_size(args.rows), args.port, args.fail_rate)
+    print(f"Serving {args.rows} synthetic crimes on http://127.0.0.1:{args.port}/resource/ijzp-q8t2.json")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
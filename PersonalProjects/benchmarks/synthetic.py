@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Synthetic datasets shaped like the real sources, for benchmarking without network access
+
+SUPERSTORE_CATEGORIES = {
+    'Furniture': ['Bookcases', 'Chairs', 'Furnishings', 'Tables'],
+    'Office Supplies': ['Appliances', 'Art', 'Binders', 'Envelopes', 'Fasteners', 'Labels', 'Paper', 'Storage', 'Supplies'],
+    'Technology': ['Accessories', 'Copiers', 'Machines', 'Phones'],
+}
+SUPERSTORE_COUNTRIES = {
+    'United States': 'US', 'Canada': 'Canada', 'Mexico': 'LATAM', 'Brazil': 'LATAM', 'France': 'EU', 'Germany': 'EU',
+    'United Kingdom': 'EU', 'India': 'APAC', 'China': 'APAC', 'Australia': 'APAC', 'South Africa': 'Africa', 'Niger': 'Africa',
+}
+SHIP_MODES = ['Standard Class', 'Second Class', 'First Class', 'Same Day']
+SEGMENTS = ['Consumer', 'Corporate', 'Home Office']
+PRIORITIES = ['Critical', 'High', 'Medium', 'Low']
+
+
+def superstore_frame(rows, seed=0, start='2011-01-01', years=4):
+    rng = np.random.default_rng(seed)
+    order_numbers = rng.integers(0, max(rows // 2, 1), rows)
+    order_date = pd.Timestamp(start) + pd.to_timedelta(np.sort(rng.integers(0, 365 * years, rows)), unit='D')
+    ship_date = order_date + pd.to_timedelta(rng.integers(0, 8, rows), unit='D')
+    category = rng.choice(list(SUPERSTORE_CATEGORIES), rows)
+    sub_category = np.empty(rows, dtype=object)
+    for name, subs in SUPERSTORE_CATEGORIES.items():
+        mask = category == name
+        sub_category[mask] = rng.choice(subs, mask.sum())
+    country = rng.choice(list(SUPERSTORE_COUNTRIES), rows)
+    sales = rng.gamma(1.5, 160, rows).round(2)
+    return pd.DataFrame({
+        'Row.ID': np.arange(1, rows + 1),
+        'Order.ID': 'CA-' + pd.Series(order_date.year.astype(str)) + '-' + pd.Series(order_numbers).astype(str),
+        'Order.Date': order_date.strftime('%Y-%m-%d'),
+        'Ship.Date': ship_date.strftime('%Y-%m-%d'),
+        'Ship.Mode': rng.choice(SHIP_MODES, rows),
+        'Customer.ID': 'C-' + pd.Series(rng.integers(0, 5000, rows)).astype(str),
+        'Segment': rng.choice(SEGMENTS, rows),
+        'City': 'City ' + pd.Series(rng.integers(0, 500, rows)).astype(str),
+        'Country': country,
+        'Market': pd.Series(country).map(SUPERSTORE_COUNTRIES),
+        'Product.ID': 'P-' + pd.Series(rng.integers(0, 10000, rows)).astype(str),
+        'Category': category,
+        'Sub.Category': sub_category,
+        'Sales': sales,
+        'Quantity': rng.integers(1, 15, rows),
+        'Discount': rng.choice([0, 0.1, 0.2, 0.3, 0.5], rows),
+        'Profit': (sales * rng.normal(0.1, 0.3, rows)).round(2),
+        'Shipping.Cost': (sales * rng.uniform(0.01, 0.2, rows)).round(2),
+        'Order.Priority': rng.choice(PRIORITIES, rows),
+    })
+
+
+def write_superstore_csv(path, rows, seed=0):
+    superstore_frame(rows, seed).to_csv(path, index=False)
+    return path
+
+
+CRIME_TYPES = ['THEFT', 'BATTERY', 'CRIMINAL DAMAGE', 'ASSAULT', 'DECEPTIVE PRACTICE', 'OTHER OFFENSE', 'MOTOR VEHICLE THEFT',
+               'NARCOTICS', 'BURGLARY', 'ROBBERY', 'WEAPONS VIOLATION', 'CRIMINAL TRESPASS', 'OFFENSE INVOLVING CHILDREN',
+               'SEX OFFENSE', 'PUBLIC PEACE VIOLATION', 'INTERFERENCE WITH PUBLIC OFFICER', 'HOMICIDE', 'ARSON', 'STALKING',
+               'KIDNAPPING', 'INTIMIDATION', 'LIQUOR LAW VIOLATION', 'OBSCENITY', 'GAMBLING', 'HUMAN TRAFFICKING']
+CRIME_WEIGHTS = np.geomspace(1, 0.002, len(CRIME_TYPES))
+FBI_CODES = ['01A', '02', '03', '04A', '04B', '05', '06', '07', '08A', '08B', '09', '10', '11', '12', '13', '14', '15', '16',
+             '17', '18', '19', '20', '22', '24', '26']
+LOCATIONS = ['STREET', 'RESIDENCE', 'APARTMENT', 'SIDEWALK', 'PARKING LOT / GARAGE (NON RESIDENTIAL)', 'SMALL RETAIL STORE',
+             'RESTAURANT', 'ALLEY', 'DEPARTMENT STORE', 'GAS STATION']
+CHICAGO_BOUNDS = {'lat': (41.645, 42.022), 'lon': (-87.94, -87.524)}
+
+
+def chicago_frame(rows, seed=0, end='2025-06-30', months=24):
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end)
+    seconds = rng.integers(0, months * 30 * 24 * 3600, rows)
+    date = (end - pd.to_timedelta(np.sort(seconds), unit='s')).floor('s')
+    updated_on = date + pd.to_timedelta(rng.integers(0, 7 * 24 * 3600, rows), unit='s')
+    # Cluster incidents around a few hot spots so the heatmaps are not uniform noise
+    centers = np.column_stack([rng.uniform(*CHICAGO_BOUNDS['lat'], 40), rng.uniform(*CHICAGO_BOUNDS['lon'], 40)])
+    hot_spot = rng.integers(0, len(centers), rows)
+    latitude = np.clip(centers[hot_spot, 0] + rng.normal(0, 0.02, rows), *CHICAGO_BOUNDS['lat']).round(9)
+    longitude = np.clip(centers[hot_spot, 1] + rng.normal(0, 0.02, rows), *CHICAGO_BOUNDS['lon']).round(9)
+    primary_type = rng.choice(CRIME_TYPES, rows, p=CRIME_WEIGHTS / CRIME_WEIGHTS.sum())
+    district = rng.integers(1, 26, rows)
+    return pd.DataFrame({
+        'id': np.arange(10_000_000, 10_000_000 + rows)[rng.permutation(rows)],
+        'case_number': 'JJ' + pd.Series(rng.integers(100_000, 999_999, rows)).astype(str),
+        'date': date.strftime('%Y-%m-%dT%H:%M:%S.000'),
+        'block': pd.Series(rng.integers(0, 130, rows) * 100).astype(str).str.zfill(5).str[:3] + 'XX W MADISON ST',
+        'iucr': pd.Series(rng.integers(100, 5000, rows)).astype(str).str.zfill(4),
+        'primary_type': primary_type,
+        'description': 'SYNTHETIC ' + pd.Series(primary_type),
+        'location_description': rng.choice(LOCATIONS, rows),
+        'arrest': rng.random(rows) < 0.12,
+        'domestic': rng.random(rows) < 0.18,
+        'beat': district * 100 + rng.integers(1, 35, rows),
+        'district': district,
+        'ward': rng.integers(1, 51, rows),
+        'community_area': rng.integers(1, 78, rows),
+        'fbi_code': rng.choice(FBI_CODES, rows),
+        'x_coordinate': ((longitude + 88) * 1e6).round(),
+        'y_coordinate': (latitude * 1e5).round(),
+        'year': date.year,
+        'updated_on': updated_on.strftime('%Y-%m-%dT%H:%M:%S.000'),
+        'latitude': latitude,
+        'longitude': longitude,
+    })
+
+
+def write_chicago_json(path, rows, seed=0):
+    chicago_frame(rows, seed).to_json(path, orient='records')
+    return path
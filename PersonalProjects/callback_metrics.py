@@ -0,0 +1,261 @@
+"""Per-callback latency, memory, payload and cache metrics for the dashboards, as Prometheus text.
+
+``instrument_callbacks`` wraps every server-side callback registered on a Dash app. Each call
+records its wall time, the time spent in named phases (``phase('pandas')`` and ``phase('figure')``
+blocks or decorators inside the callback, with the remainder reported as ``other``; work handed to
+a thread pool inside ``pooled()`` keeps its phases too), the size of
+the serialized response, and the hits and misses of the given ``lru_cache`` functions during the
+call. With DASHBOARD_TRACE_MEMORY=1, tracemalloc runs and the peak allocation of each call is
+recorded too. Code inside a callback can observe its own series on ``registry`` (the Superstore
+dashboard records the build time of each figure). Everything is served as histograms and
+counters on ``/metrics`` of the app's own Flask server.
+
+With DASHBOARD_PROFILE_MS set, every call runs under cProfile and calls slower than that many
+milliseconds leave a ``.prof`` dump in DASHBOARD_PROFILE_DIR (open it with pstats or snakeviz).
+
+The metrics belong to the process that answered: under serve.py each worker reports its own, and
+a background callback's work happens in its job process, so only its submit and poll requests
+show up. Peak memory and cache counts are process-wide, so overlapping calls share them.
+"""
+
+import cProfile
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+from flask import Response
+
+TRACE_MEMORY = os.environ.get('DASHBOARD_TRACE_MEMORY', '0') == '1'
+PROFILE_MS = float(os.environ.get('DASHBOARD_PROFILE_MS', 0))  # 0 disables profiling
+PROFILE_DIR = os.environ.get('DASHBOARD_PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'dashboard-profiles'))
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = tuple(4 ** power for power in range(5, 16))  # 1 KiB to 1 GiB
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'dash_callback_duration_seconds': ('histogram', 'Wall time of a callback call', SECONDS_BUCKETS),
+    'dash_callback_phase_seconds': ('histogram', 'Time spent in each phase of a callback call', SECONDS_BUCKETS),
+    'dash_callback_response_bytes': ('histogram', 'Size of the serialized callback response', BYTES_BUCKETS),
+    'dash_callback_peak_memory_bytes': ('histogram', 'Peak traced allocation during a callback call', BYTES_BUCKETS),
+    'dash_figure_build_seconds': ('histogram', 'Build time of each dashboard figure', SECONDS_BUCKETS),
+    'dash_callback_cache_total': ('counter', 'Cache lookups made during callback calls', None),
+    'dash_callback_errors_total': ('counter', 'Callback calls that raised', None),
+    'dash_callback_profiles_total': ('counter', 'cProfile dumps written for slow calls', None),
+}
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}' if labels else ''
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        # Prometheus buckets are cumulative upper bounds (value <= le)
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{format_labels(labels + (("le", bound),))} {cumulative}'
+        yield f'{name}_sum{format_labels(labels)} {self.total}'
+        yield f'{name}_count{format_labels(labels)} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def observe(self, name, labels, value):
+        with self.lock:
+            key = (name, tuple(labels.items()))
+            if key not in self.histograms:
+                self.histograms[key] = Histogram(METRICS[name][2])
+            self.histograms[key].observe(value)
+
+    def increment(self, name, labels, amount=1):
+        with self.lock:
+            key = (name, tuple(labels.items()))
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def render(self):
+        with self.lock:
+            lines = []
+            for name, (kind, description, _) in METRICS.items():
+                series = self.histograms if kind == 'histogram' else self.counters
+                keys = sorted(key for key in series if key[0] == name)
+                if not keys:
+                    continue
+                lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+                for key in keys:
+                    if kind == 'histogram':
+                        lines += series[key].lines(name, key[1])
+                    else:
+                        lines.append(f'{name}{format_labels(key[1])} {series[key]}')
+            return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+current = threading.local()
+
+
+# Time a block (or, as a decorator, a function) under a phase of the running callback call.
+# Nested phases are exclusive: time in an inner phase is not counted again in the outer one
+@contextmanager
+def phase(name):
+    phases = getattr(current, 'phases', None)
+    if phases is None:
+        yield
+        return
+    current.nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        inner = current.nested.pop()
+        phases[name] = phases.get(name, 0.0) + elapsed - inner
+        if current.nested:
+            current.nested[-1] += elapsed
+
+
+# Pool tasks run on other threads, where the call's phases are not visible. Inside
+# `with pooled() as bind:`, tasks wrapped with bind(fn) record their own phases, and the wall
+# time the calling thread spends in the block is split over those phases in proportion to them,
+# so concurrent tasks add up to the time the caller actually waited. Without a running call (or
+# for tasks bind() was not applied to, such as process pool tasks) the block times as before
+@contextmanager
+def pooled():
+    phases = getattr(current, 'phases', None)
+    if phases is None:
+        yield lambda fn: fn
+        return
+    recorded = []
+
+    def bind(fn):
+        @wraps(fn)
+        def task(*args, **kwargs):
+            # A serial executor runs the task on the calling thread, whose state is restored after
+            saved = getattr(current, 'phases', None), getattr(current, 'nested', None)
+            current.phases, current.nested = {}, []
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                recorded.append(current.phases)
+                current.phases, current.nested = saved
+        return task
+
+    current.nested.append(0.0)
+    start = time.perf_counter()
+    try:
+        yield bind
+    finally:
+        elapsed = time.perf_counter() - start
+        inner = current.nested.pop()
+        totals = {}
+        for task_phases in recorded:
+            for name, seconds in task_phases.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        total = sum(totals.values())
+        if total > 0:
+            for name, seconds in totals.items():
+                phases[name] = phases.get(name, 0.0) + (elapsed - inner) * seconds / total
+        if current.nested:
+            # Unattributed time stays with the enclosing phase
+            current.nested[-1] += elapsed if total > 0 else inner
+
+
+def cache_counts(caches):
+    return {cache.__name__: cache.cache_info() for cache in caches}
+
+
+def dump_profile(profiler, name, elapsed):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f'{name}-{time.strftime("%Y%m%dT%H%M%S")}-{os.getpid()}-{elapsed * 1000:.0f}ms.prof')
+    profiler.dump_stats(path)
+    print(f"Slow callback {name} ({elapsed * 1000:.0f} ms), profile written to {path}")
+
+
+def instrumented(name, callback, caches=(), registry=registry):
+    labels = {'callback': name}
+
+    @wraps(callback)
+    def call(*args, **kwargs):
+        before = cache_counts(caches)
+        current.phases, current.nested = {}, []
+        profiler = cProfile.Profile() if PROFILE_MS else None
+        if TRACE_MEMORY:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            if profiler:
+                profiler.enable()
+            response = callback(*args, **kwargs)
+        except PreventUpdate:
+            raise
+        except Exception:
+            registry.increment('dash_callback_errors_total', labels)
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            elapsed = time.perf_counter() - start
+            phases, current.phases = current.phases, None
+            registry.observe('dash_callback_duration_seconds', labels, elapsed)
+            phases['other'] = max(elapsed - sum(phases.values()), 0.0)
+            for phase_name, seconds in phases.items():
+                registry.observe('dash_callback_phase_seconds', {**labels, 'phase': phase_name}, seconds)
+            if TRACE_MEMORY:
+                registry.observe('dash_callback_peak_memory_bytes', labels,
+                                 max(tracemalloc.get_traced_memory()[1] - baseline, 0))
+            for cache, info in cache_counts(caches).items():
+                for result, count in [('hit', info.hits - before[cache].hits), ('miss', info.misses - before[cache].misses)]:
+                    if count > 0:
+                        registry.increment('dash_callback_cache_total', {**labels, 'cache': cache, 'result': result}, count)
+            if profiler and elapsed * 1000 >= PROFILE_MS:
+                dump_profile(profiler, name, elapsed)
+                registry.increment('dash_callback_profiles_total', labels)
+        # Dash hands back the response already serialized to JSON
+        if isinstance(response, (str, bytes)):
+            registry.observe('dash_callback_response_bytes', labels,
+                             len(response.encode('utf-8') if isinstance(response, str) else response))
+        return response
+
+    call.instrumented = True
+    return call
+
+
+def metrics_response():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+
+# Wrap every callback registered so far (call it after the last one) and add the /metrics route
+def instrument_callbacks(app, caches=()):
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    for entry in app.callback_map.values():
+        # Clientside callbacks have no server function to wrap
+        callback = entry.get('callback')
+        if callback is None or getattr(callback, 'instrumented', False):
+            continue
+        entry['callback'] = instrumented(getattr(callback, '__wrapped__', callback).__name__, callback, caches)
+    if 'callback_metrics' not in app.server.view_functions:
+        app.server.add_url_rule('/metrics', 'callback_metrics', metrics_response)
+    return registry
@@ -0,0 +1,23 @@
+"""Liveness and readiness routes for the dashboards' Flask servers.
+
+``/healthz`` answers as soon as the process serves requests. ``/readyz`` answers 200 only once
+the dashboard reports its data loaded, and 503 while it is loading or after the load failed, so
+a load balancer or a rolling restart sends traffic to a worker only when it is warm.
+"""
+
+from flask import Response
+
+
+def add_probes(server, readiness):
+    # readiness() returns (ready, detail)
+    def healthz():
+        return Response('ok\n', mimetype='text/plain')
+
+    def readyz():
+        ready, detail = readiness()
+        return Response(f'{detail}\n', status=200 if ready else 503, mimetype='text/plain')
+
+    if 'healthz' not in server.view_functions:
+        server.add_url_rule('/healthz', 'healthz', healthz)
+        server.add_url_rule('/readyz', 'readyz', readyz)
+    return server
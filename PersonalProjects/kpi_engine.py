@@ -0,0 +1,129 @@
+"""KPI engine for the Superstore dashboards.
+
+Registered measures are summarized per (Year, MonthDay) in one grouped pass, so YTD figures for
+any cutoff date can be evaluated, and new rows folded in, without rescanning the frame.
+'sum'/'count' measures add up across groups; 'nunique' measures keep mergeable distinct-value
+state, exact sets or HyperLogLog registers with SUPERSTORE_DISTINCT_MODE=hll.
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+DISTINCT_MODE = os.environ.get('SUPERSTORE_DISTINCT_MODE', 'exact')  # 'exact' or 'hll'
+HLL_ERROR = float(os.environ.get('SUPERSTORE_HLL_ERROR', 0.02))
+
+# HyperLogLog sketches for distinct counts; registers merge with an element-wise max
+def hll_precision(error=HLL_ERROR):
+    return min(18, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+
+HLL_PRECISION = hll_precision()
+
+def hll_sketch(values, group_codes, n_groups, precision=HLL_PRECISION):
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    register_index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # Rank of the first set bit in the 32 hash bits following the register index
+    following = ((hashes >> np.uint64(32 - precision)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    rank = np.where(following > 0, 32 - np.floor(np.log2(np.maximum(following, 1))), 33).astype(np.uint8)
+    registers = np.zeros((n_groups, 1 << precision), dtype=np.uint8)
+    np.maximum.at(registers, (group_codes, register_index), rank)
+    return registers
+
+def hll_estimate(registers):
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    # Linear counting is more accurate while many registers are still empty
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+
+# Mergeable distinct-value state per group: exact sets, or HLL registers when DISTINCT_MODE is 'hll'
+def distinct_states(data, keys, column):
+    grouped = data.groupby(keys, dropna=False, observed=True)
+    groups = grouped.size().index
+    if DISTINCT_MODE == 'hll':
+        registers = hll_sketch(data[column], grouped.ngroup().to_numpy(), len(groups))
+        return pd.Series(list(registers), index=groups, dtype=object)
+    return pd.Series([set(values) for _, values in grouped[column]], index=groups, dtype=object)
+
+def merge_distinct(states):
+    states = list(states)
+    if DISTINCT_MODE == 'hll':
+        return np.maximum.reduce(states)
+    return set().union(*states)
+
+def count_distinct(state):
+    if DISTINCT_MODE == 'hll':
+        return int(round(float(hll_estimate(state))))
+    return len(state)
+
+def merge_states(states, levels):
+    grouped = states.groupby(level=levels, dropna=False)
+    return pd.Series([merge_distinct(group) for _, group in grouped], index=grouped.size().index, dtype=object)
+
+# Registered measures by name: (column, aggregation)
+KPI_MEASURES = {
+    'sales': ('Sales', 'sum'),
+    'profit': ('Profit', 'sum'),
+    'quantity': ('Quantity', 'sum'),
+    'shipping_days': ('shippingTime', 'sum'),
+    'lines': ('Order.ID', 'count'),
+    'orders': ('Order.ID', 'nunique'),
+}
+KPI_DERIVED = {
+    'profit_margin': lambda kpis: kpis['profit'] / kpis['sales'] * 100,
+    'avg_shipping_time': lambda kpis: kpis['shipping_days'] / kpis['lines'],
+}
+KPI_GROWTH = ['sales']
+KPI_KEYS = ['Year', 'MonthDay']
+
+def additive_measures():
+    return [name for name, (_, how) in KPI_MEASURES.items() if how != 'nunique']
+
+def distinct_measures():
+    return [name for name, (_, how) in KPI_MEASURES.items() if how == 'nunique']
+
+def summarize_kpis(data):
+    month_day = (data['Order.Date'].dt.month * 100 + data['Order.Date'].dt.day).rename('MonthDay')
+    keys = [data['Year'], month_day]
+    summary = data.groupby(keys, observed=True).agg(**{name: KPI_MEASURES[name] for name in additive_measures()})
+    for name in distinct_measures():
+        summary[name] = distinct_states(data, keys, KPI_MEASURES[name][0])
+    return summary
+
+def merge_kpi_summaries(summary, delta_summary):
+    combined = pd.concat([summary, delta_summary])
+    merged = combined[additive_measures()].groupby(level=KPI_KEYS).sum()
+    for name in distinct_measures():
+        merged[name] = merge_states(combined[name], KPI_KEYS)
+    return merged
+
+# Evaluate every registered KPI per year, year-to-date up to the cutoff (defaults to the latest order date)
+def compute_kpis(summary, cutoff=None):
+    if cutoff is None:
+        latest_year = summary.index.get_level_values('Year').max()
+        cutoff_month_day = summary.loc[latest_year].index.max()
+    else:
+        cutoff_month_day = cutoff.month * 100 + cutoff.day
+    ytd = summary[summary.index.get_level_values('MonthDay') <= cutoff_month_day]
+    kpis = ytd[additive_measures()].groupby(level='Year').sum()
+    for name in distinct_measures():
+        kpis[name] = [count_distinct(merge_distinct(states)) for _, states in ytd[name].groupby(level='Year')]
+    return derive_kpis(kpis)
+
+# Derived ratios and year-over-year growth from the per-year measures
+def derive_kpis(kpis):
+    for name, formula in KPI_DERIVED.items():
+        kpis[name] = formula(kpis)
+    for name in KPI_GROWTH:
+        previous = kpis[name].reindex(kpis.index - 1).to_numpy()
+        kpis[f'{name}_growth'] = (kpis[name] - previous) / previous * 100
+    return kpis
+
+# Key metrics for the latest year
+def calculate_metrics(summary):
+    kpis = compute_kpis(summary)
+    return kpis.loc[kpis.index.max()]
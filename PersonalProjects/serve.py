@@ -0,0 +1,110 @@
+"""Serve a dashboard from several gunicorn worker processes sharing one copy of its data.
+
+The dataset is loaded once in the server process and exported to shared memory as one
+memory-mapped buffer per column (see shared_frame.py). Workers import the dashboard with
+SUPERSTORE_SHARED_DATA / CHICAGO_SHARED_DATA pointing at that export, so they attach to it
+zero-copy instead of each downloading and parsing the data. Derived aggregates (cubes,
+indexes, caches) are still built per worker, and the Superstore file refresher is not run, so
+its pages do not poll for refreshed tiles either.
+
+    python serve.py chicago --workers 4 --bind 0.0.0.0:8050
+"""
+
+import argparse
+import gc
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+
+from gunicorn.app.base import BaseApplication
+
+from shared_frame import export_frame
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+CHICAGO_DIR = os.path.join(PROJECT_DIR, 'Chicago_Crime_Analysis')
+APPS = {
+    'superstore': (os.path.join(PROJECT_DIR, '3a SuperstoreDashboard_LOCAL_optimized.py'), 'SUPERSTORE_SHARED_DATA'),
+    'chicago': (os.path.join(CHICAGO_DIR, '4a ChicagoCrimesDataVisualization.py'), 'CHICAGO_SHARED_DATA'),
+}
+SHARED_ROOT = os.environ.get('DASHBOARD_SHARED_ROOT', '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir())
+# The Chicago script imports its helper modules from its own directory
+sys.path.insert(0, CHICAGO_DIR)
+
+
+def load_script(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def share_data(name, directory):
+    path, _ = APPS[name]
+    dashboard = load_script(path, f'{name}_loader')
+    # Joined rather than waited on, so no loader thread is still running when gunicorn forks
+    dashboard.loader.join()
+    data = dashboard.data
+    if data is None:
+        # A dashboard on the DuckDB backend queries its Parquet store directly and holds no frame
+        del sys.modules[f'{name}_loader']
+        return None
+    if hasattr(dashboard, 'heatmap_order'):
+        # Exported in heatmap index order so workers can index the shared columns without copying them
+        data = data.take(dashboard.heatmap_order(data)).reset_index(drop=True)
+    export_frame(data, directory)
+    rows = len(data)
+    del sys.modules[f'{name}_loader'], dashboard, data
+    gc.collect()
+    return rows
+
+
+class DashboardServer(BaseApplication):
+    def __init__(self, name, options):
+        self.name = name
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        # Runs in each worker after the fork, with the shared-data variable already set. The worker
+        # binds at once and attaches to the data in the background; /readyz reports when it is in
+        return load_script(APPS[self.name][0], f'{self.name}_dashboard').server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('app', choices=sorted(APPS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads', type=int, default=1, help='threads per worker (gthread worker when > 1)')
+    parser.add_argument('--bind', default='127.0.0.1:8050')
+    parser.add_argument('--timeout', type=int, default=120)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix=f'{args.app}-', dir=SHARED_ROOT)
+    server_pid = os.getpid()
+    try:
+        rows = share_data(args.app, directory)
+        if rows is not None:
+            print(f"Shared {rows} rows in {directory}")
+            os.environ[APPS[args.app][1]] = directory
+        DashboardServer(args.app, {
+            'bind': args.bind,
+            'workers': args.workers,
+            'threads': args.threads,
+            'worker_class': 'gthread' if args.threads > 1 else 'sync',
+            'timeout': args.timeout,
+        }).run()
+    finally:
+        # Workers are forked from here and unwind through this block too when they exit
+        if os.getpid() == server_pid:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
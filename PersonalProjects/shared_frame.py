@@ -0,0 +1,64 @@
+"""Share a DataFrame between processes as memory-mapped, column-per-file NumPy buffers.
+
+``export_frame`` writes each column as an ``.npy`` file (categoricals and strings as integer
+codes plus their category list, nullable columns as values plus a mask) and a ``frame.json``
+describing them. ``attach_frame`` maps those files read-only, so every process that attaches
+reads the same page-cache pages instead of holding its own copy. On Linux, exporting into
+``/dev/shm`` keeps the buffers in memory.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = 'frame.json'
+
+
+def export_frame(data, directory):
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for position, name in enumerate(data.columns):
+        values = data[name]
+        stem = f'{position:04d}'
+        if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object or pd.api.types.is_string_dtype(values):
+            values = values.astype('category')
+            np.save(os.path.join(directory, f'{stem}.codes.npy'), values.cat.codes.to_numpy())
+            columns.append({'name': name, 'kind': 'category', 'stem': stem,
+                            'categories': values.cat.categories.tolist(), 'ordered': bool(values.cat.ordered)})
+        elif isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and not isinstance(values.dtype, pd.DatetimeTZDtype):
+            # Nullable integer, boolean and float columns: numpy values with a separate mask
+            mask = values.isna().to_numpy()
+            fill = False if pd.api.types.is_bool_dtype(values.dtype) else 0
+            np.save(os.path.join(directory, f'{stem}.npy'), values.fillna(fill).to_numpy(dtype=values.dtype.numpy_dtype))
+            np.save(os.path.join(directory, f'{stem}.mask.npy'), mask)
+            columns.append({'name': name, 'kind': 'masked', 'stem': stem, 'dtype': str(values.dtype)})
+        else:
+            tz = str(values.dt.tz) if isinstance(values.dtype, pd.DatetimeTZDtype) else None
+            np.save(os.path.join(directory, f'{stem}.npy'), values.dt.tz_localize(None).to_numpy() if tz else values.to_numpy())
+            columns.append({'name': name, 'kind': 'array', 'stem': stem, 'tz': tz})
+    with open(os.path.join(directory, MANIFEST), 'w') as manifest:
+        json.dump({'rows': len(data), 'columns': columns}, manifest)
+    return directory
+
+
+def attach_frame(directory):
+    with open(os.path.join(directory, MANIFEST)) as manifest:
+        layout = json.load(manifest)
+
+    def load(stem, suffix='.npy'):
+        return np.load(os.path.join(directory, stem + suffix), mmap_mode='r')
+
+    columns = {}
+    for column in layout['columns']:
+        if column['kind'] == 'category':
+            dtype = pd.CategoricalDtype(column['categories'], ordered=column['ordered'])
+            columns[column['name']] = pd.Categorical.from_codes(load(column['stem'], '.codes.npy'), dtype=dtype, validate=False)
+        elif column['kind'] == 'masked':
+            array_type = pd.api.types.pandas_dtype(column['dtype']).construct_array_type()
+            columns[column['name']] = array_type(load(column['stem']), load(column['stem'], '.mask.npy'))
+        else:
+            values = load(column['stem'])
+            columns[column['name']] = pd.DatetimeIndex(values).tz_localize(column['tz']) if column['tz'] else values
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,45 @@
+import importlib.util
+import os
+import sys
+import threading
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHICAGO_DIR = os.path.join(PROJECT_DIR, 'Chicago_Crime_Analysis')
+sys.path += [PROJECT_DIR, CHICAGO_DIR, os.path.join(PROJECT_DIR, 'benchmarks')]
+
+from soda_standin import serve
+
+STANDIN_ROWS = 250
+
+
+@pytest.fixture
+def standin():
+    server = serve(STANDIN_ROWS, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def standin_url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/resource/ijzp-q8t2.json'
+
+
+# The dashboards are scripts with spaces in their names, so they are loaded by path, with their
+# callbacks inline and their data in place
+@pytest.fixture
+def load_dashboard(monkeypatch, tmp_path):
+    monkeypatch.setenv('DASHBOARD_BACKGROUND', '0')
+    monkeypatch.setenv('DASHBOARD_JOBS_DIR', str(tmp_path / 'jobs'))
+
+    def load(script, name):
+        spec = importlib.util.spec_from_file_location(name, os.path.join(PROJECT_DIR, script))
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, name, module)
+        spec.loader.exec_module(module)
+        module.data_ready.wait()
+        return module
+    return load
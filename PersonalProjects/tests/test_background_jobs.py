@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from background_jobs import Uncacheable, coalesce, create_manager, uncached
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.delenv('DASHBOARD_BACKGROUND', raising=False)
+    return create_manager('jobs', directory=str(tmp_path))
+
+
+# Counts its calls and returns them, so a reused result shows which call computed it
+class Computation:
+    def __init__(self, delay=0, uncacheable=False):
+        self.calls, self.delay, self.uncacheable = 0, delay, uncacheable
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.uncacheable:
+            raise Uncacheable(f'partial {self.calls}')
+        return f'result {self.calls}'
+
+
+def test_coalesce_reuses_the_result_stored_under_a_key(manager):
+    compute = Computation()
+
+    assert [coalesce(manager, 'a', compute) for _ in range(3)] == ['result 1'] * 3
+    assert coalesce(manager, 'b', compute) == 'result 2'
+    assert compute.calls == 2
+
+
+def test_duplicate_jobs_wait_for_the_first_instead_of_recomputing(manager):
+    compute, results = Computation(delay=0.3), []
+    threads = [threading.Thread(target=lambda: results.append(coalesce(manager, 'key', compute))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert compute.calls == 1
+    assert results == ['result 1'] * 4
+
+
+def test_uncacheable_results_are_served_once_and_computed_again(manager):
+    compute = Computation(uncacheable=True)
+
+    assert coalesce(manager, 'key', compute) == 'partial 1'
+    assert coalesce(manager, 'key', compute) == 'partial 2'
+    assert uncached(compute) == 'partial 3'
+    assert len(manager.handle) == 0
+
+
+def test_without_a_manager_every_call_computes():
+    compute = Computation()
+
+    assert [coalesce(None, 'key', compute) for _ in range(2)] == ['result 1', 'result 2']
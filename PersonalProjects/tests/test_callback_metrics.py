@@ -0,0 +1,105 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import dash
+import pytest
+from dash import Input, Output, dcc, html
+from dash.exceptions import PreventUpdate
+
+import callback_metrics
+from callback_metrics import Registry, instrument_callbacks, instrumented, phase, pooled
+
+
+# The exposition text as {'name{labels}': value}
+def samples(text):
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line and not line.startswith('#')}
+
+
+@lru_cache(maxsize=None)
+def cached_square(value):
+    return value * value
+
+
+def render(value):
+    with phase('pandas'):
+        squared = cached_square(value)
+        time.sleep(0.02)
+    with phase('figure'):
+        time.sleep(0.01)
+    return json.dumps({'value': squared})
+
+
+def test_a_call_records_its_duration_phases_payload_and_cache_lookups():
+    registry = Registry()
+    call = instrumented('render', render, caches=[cached_square], registry=registry)
+    cached_square.cache_clear()
+
+    responses = [call(3), call(3), call(4)]
+
+    metrics = samples(registry.render())
+    assert metrics['dash_callback_duration_seconds_count{callback="render"}'] == 3
+    assert metrics['dash_callback_cache_total{callback="render",cache="cached_square",result="hit"}'] == 1
+    assert metrics['dash_callback_cache_total{callback="render",cache="cached_square",result="miss"}'] == 2
+    assert metrics['dash_callback_response_bytes_sum{callback="render"}'] == sum(len(response) for response in responses)
+    phases = {name: metrics[f'dash_callback_phase_seconds_sum{{callback="render",phase="{name}"}}'] for name in ['pandas', 'figure', 'other']}
+    assert phases['pandas'] >= 0.06 and phases['figure'] >= 0.03
+    assert sum(phases.values()) == pytest.approx(metrics['dash_callback_duration_seconds_sum{callback="render"}'])
+
+
+def test_errors_are_counted_but_prevented_updates_are_not():
+    registry = Registry()
+
+    def failing(reason):
+        if reason == 'skip':
+            raise PreventUpdate
+        raise ValueError(reason)
+    call = instrumented('failing', failing, registry=registry)
+    for reason in ['skip', 'broken', 'broken']:
+        with pytest.raises((PreventUpdate, ValueError)):
+            call(reason)
+
+    metrics = samples(registry.render())
+    assert metrics['dash_callback_errors_total{callback="failing"}'] == 2
+    assert metrics['dash_callback_duration_seconds_count{callback="failing"}'] == 3
+
+
+def test_pooled_phases_add_up_to_the_time_waited():
+    registry = Registry()
+
+    def fan_out():
+        with pooled() as bind, ThreadPoolExecutor(4) as executor:
+            list(executor.map(bind(lambda _: render(2)), range(4)))
+    instrumented('fan_out', fan_out, registry=registry)()
+
+    metrics = samples(registry.render())
+    pooled_seconds = sum(metrics[f'dash_callback_phase_seconds_sum{{callback="fan_out",phase="{name}"}}'] for name in ['pandas', 'figure'])
+    assert 0 < pooled_seconds <= metrics['dash_callback_duration_seconds_sum{callback="fan_out"}']
+    assert metrics['dash_callback_phase_seconds_sum{callback="fan_out",phase="pandas"}'] > \
+        metrics['dash_callback_phase_seconds_sum{callback="fan_out",phase="figure"}']
+
+
+# Through the app's own /metrics route, which serves the process-wide registry
+def test_metrics_route_counts_the_app_callbacks():
+    app = dash.Dash(__name__)
+    app.layout = html.Div([dcc.Input(id='value', value='1'), html.Div(id='echo')])
+
+    def echo(value):
+        return f'echo {value}'
+    app.callback(Output('echo', 'children'), [Input('value', 'value')])(echo)
+    instrument_callbacks(app)
+    client = app.server.test_client()
+    request = {'output': 'echo.children', 'outputs': {'id': 'echo', 'property': 'children'},
+               'inputs': [{'id': 'value', 'property': 'value', 'value': '2'}], 'changedPropIds': ['value.value']}
+    count = 'dash_callback_duration_seconds_count{callback="echo"}'
+    before = samples(client.get('/metrics').get_data(as_text=True)).get(count, 0)
+
+    for _ in range(2):
+        assert client.post('/_dash-update-component', json=request).status_code == 200
+    response = client.get('/metrics')
+
+    assert response.content_type == callback_metrics.CONTENT_TYPE
+    metrics = samples(response.get_data(as_text=True))
+    assert metrics[count] - before == 2
+    assert metrics['dash_callback_response_bytes_count{callback="echo"}'] >= 2
@@ -0,0 +1,57 @@
+import pytest
+
+from synthetic import chicago_frame
+
+SCRIPT = 'Chicago_Crime_Analysis/4a ChicagoCrimesDataVisualization.py'
+ROWS = 4000
+
+
+# Rows in no particular order, as neither the feed nor serve.py's heatmap-order export keeps months together
+@pytest.fixture
+def chicago(tmp_path, monkeypatch, load_dashboard):
+    source = tmp_path / 'crimes.json'
+    chicago_frame(ROWS).sample(frac=1, random_state=0).to_json(source, orient='records')
+    monkeypatch.setenv('CHICAGO_DATA_SOURCE', str(source))
+    dashboard = load_dashboard(SCRIPT, 'chicago_shuffled')
+    assert dashboard.load_error is None
+    return dashboard
+
+
+def labelled(data, name):
+    if name == 'hour':
+        return data['date'].dt.hour.astype(str)
+    if name == 'dow':
+        return data['date'].dt.day_name()
+    return data[name].astype(str)
+
+
+# Each chart counts the rows matching the dropdowns and the selections on the other charts
+def expected_breakdowns(data, crime_type, month, selection):
+    matching = (data['primary_type'] == crime_type) & (data['month'] == month)
+    expected = {}
+    for name in ['district', 'ward', 'hour', 'dow', 'arrest', 'domestic', 'fbi_code']:
+        mask = matching.copy()
+        for other, labels in selection:
+            if other != name:
+                mask &= labelled(data, other).isin(labels)
+        expected[name] = labelled(data[mask], name).value_counts().to_dict()
+    return expected
+
+
+@pytest.mark.parametrize('selection', [(), (('district', ('3', '7')),), (('arrest', ('True',)), ('dow', ('Friday', 'Monday')))])
+def test_breakdowns_on_shuffled_rows_match_a_pandas_groupby(chicago, selection):
+    data = chicago.data
+    assert not data['month'].cat.codes.is_monotonic_increasing
+    for crime_type, month in [('THEFT', chicago.months[-1]), ('BATTERY', chicago.months[3])]:
+        result = chicago.breakdowns(crime_type, month, selection)
+
+        counts = {name: {label: count for label, count in zip(*result[name]) if count} for name in result}
+        assert counts == expected_breakdowns(data, crime_type, month, selection)
+
+
+def test_filter_rows_hold_every_row_of_their_value(chicago):
+    data = chicago.data
+    for crime_type, rows in chicago.filter_rows['primary_type'].items():
+        assert rows.tolist() == data.index[data['primary_type'] == crime_type].tolist()
+    for month, rows in chicago.filter_rows['month'].items():
+        assert rows.tolist() == data.index[data['month'] == month].tolist()
@@ -0,0 +1,183 @@
+import functools
+import os
+import sys
+
+import pytest
+
+import chicago_ingest
+from chicago_ingest import (ingest, read_checkpoint, read_chunks, read_parquet_dir, sync, type_page, upsert, write_checkpoint,
+                            write_months)
+from conftest import STANDIN_ROWS, standin_url
+
+PAGE_SIZE = 100
+
+
+def expected_ids(server):
+    return sorted(server.RequestHandlerClass.frame['id'].astype(int))
+
+
+# Records the offset of every page fetched; once `fail_after` pages are in, the feed goes down
+class PageRecorder:
+    def __init__(self, fetch_page):
+        self.fetch_page = fetch_page
+        self.offsets = []
+        self.fail_after = None
+
+    def __call__(self, base_url, offset, limit, where=None):
+        if self.fail_after is not None and len(self.offsets) >= self.fail_after:
+            raise ConnectionError('feed unavailable')
+        page = self.fetch_page(base_url, offset, limit, where)
+        self.offsets.append(offset)
+        return page
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    recorder = PageRecorder(chicago_ingest.fetch_page)
+    monkeypatch.setattr(chicago_ingest, 'fetch_page', recorder)
+    return recorder
+
+
+def record(id, date):
+    return {'id': str(id), 'date': date, 'updated_on': date, 'primary_type': 'THEFT', 'description': 'RETAIL THEFT',
+            'location_description': 'STREET', 'iucr': '0860', 'fbi_code': '06', 'arrest': False, 'domestic': False}
+
+
+def test_upsert_removes_a_month_its_only_record_moved_out_of(tmp_path):
+    data = type_page([record(1, '2020-01-15T10:00:00.000'), record(2, '2025-06-01T08:30:00.000'),
+                      record(3, '2025-06-02T09:00:00.000')])
+    write_months(data, tmp_path)
+    assert sorted(os.listdir(tmp_path / 'months')) == ['2020-01.parquet', '2025-06.parquet']
+
+    data, affected = upsert(data, type_page([record(1, '2025-06-20T12:00:00.000')]))
+    write_months(data, tmp_path, affected)
+
+    assert sorted(affected) == ['2020-01', '2025-06']
+    assert os.listdir(tmp_path / 'months') == ['2025-06.parquet']
+    stored = read_parquet_dir(tmp_path / 'months')
+    assert sorted(stored['id']) == [1, 2, 3]
+
+
+def test_records_without_a_date_are_kept_out_of_the_months(tmp_path):
+    data = type_page([record(1, '2025-06-01T08:30:00.000'), record(2, 'not a date')])
+    write_months(data, tmp_path)
+    assert sorted(os.listdir(tmp_path / 'months')) == ['2025-06.parquet', 'undated.parquet']
+
+    data, affected = upsert(data, type_page([record(2, '2025-06-03T10:00:00.000')]))
+    write_months(data, tmp_path, affected)
+
+    assert sorted(affected) == ['2025-06', 'undated']
+    assert os.listdir(tmp_path / 'months') == ['2025-06.parquet']
+
+
+def test_type_page_drops_records_without_a_numeric_id():
+    page = type_page([record(1, '2025-06-01T08:30:00.000'), record('', '2025-06-01T08:30:00.000'),
+                      {'date': '2025-06-01T08:30:00.000'}])
+    assert page['id'].tolist() == [1]
+    assert page['id'].dtype == 'int64'
+
+
+def test_ingest_fetches_every_page_of_the_feed(standin, tmp_path, fetched):
+    state = ingest(standin_url(standin), tmp_path, page_size=PAGE_SIZE, workers=3)
+
+    assert state['total'] == STANDIN_ROWS
+    assert state['done'] == [0, 100, 200]
+    assert sorted(fetched.offsets) == [0, 100, 200]
+    assert sorted(os.listdir(tmp_path / 'chunks')) == [f'part-{offset:012d}.parquet' for offset in (0, 100, 200)]
+    assert sorted(read_chunks(tmp_path)['id']) == expected_ids(standin)
+
+
+def test_interrupted_ingest_resumes_from_its_checkpoint(standin, tmp_path, fetched):
+    fetched.fail_after = 1
+    with pytest.raises(ConnectionError):
+        ingest(standin_url(standin), tmp_path, page_size=PAGE_SIZE, workers=1)
+    first_run = read_checkpoint(tmp_path / 'checkpoint.json')['done']
+    assert first_run == fetched.offsets == [0]
+
+    fetched.fail_after, fetched.offsets = None, []
+    state = ingest(standin_url(standin), tmp_path, page_size=PAGE_SIZE, workers=1)
+
+    assert sorted(fetched.offsets) == [100, 200]
+    assert state['done'] == [0, 100, 200]
+    ids = read_chunks(tmp_path)['id']
+    assert ids.is_unique
+    assert sorted(ids) == expected_ids(standin)
+
+
+def test_ingest_retries_server_errors(standin, tmp_path, monkeypatch):
+    failed = set()
+    handler = standin.RequestHandlerClass
+
+    class FlakyHandler(handler):
+        # Every request is answered with a 503 the first time it is made
+        def do_GET(self):
+            if self.path not in failed:
+                failed.add(self.path)
+                self.send_error(503, 'Injected failure')
+                return
+            handler.do_GET(self)
+
+    standin.RequestHandlerClass = FlakyHandler
+    monkeypatch.setattr(chicago_ingest.time, 'sleep', lambda seconds: None)
+
+    state = ingest(standin_url(standin), tmp_path, page_size=PAGE_SIZE, workers=2)
+
+    # The count query and all three pages each failed once
+    assert len(failed) == 4
+    assert state['done'] == [0, 100, 200]
+    assert sorted(read_chunks(tmp_path)['id']) == expected_ids(standin)
+
+
+def test_dashboard_opens_on_the_newest_month_after_a_sync(standin, tmp_path, monkeypatch, load_dashboard):
+    monkeypatch.delenv('CHICAGO_DATA_SOURCE', raising=False)
+    monkeypatch.setattr(chicago_ingest, 'sync', functools.partial(sync, standin_url(standin), tmp_path / 'store', PAGE_SIZE))
+
+    dashboard = load_dashboard('Chicago_Crime_Analysis/4a ChicagoCrimesDataVisualization.py', 'chicago_synced')
+
+    newest = max(name[:-len('.parquet')] for name in os.listdir(tmp_path / 'store' / 'months'))
+    assert dashboard.load_error is None
+    assert dashboard.default_month == dashboard.months[-1] == newest
+
+
+def test_sync_of_a_store_without_marks_runs_the_full_paged_load(standin, tmp_path, fetched, monkeypatch):
+    # A store whose first sync found no dated records
+    os.makedirs(tmp_path / 'months')
+    write_checkpoint(str(tmp_path / 'sync.json'), {'url': standin_url(standin), 'marks': {}})
+    ingests = []
+    monkeypatch.setattr(chicago_ingest, 'ingest', lambda *args: ingests.append(args) or ingest(*args))
+
+    data = sync(standin_url(standin), tmp_path, page_size=PAGE_SIZE, workers=2)
+
+    # Through the resumable ingest, not an unfiltered incremental query
+    assert len(ingests) == 1
+    assert sorted(fetched.offsets) == [0, 100, 200]
+    assert data['id'].is_unique
+    assert sorted(data['id']) == expected_ids(standin)
+    assert read_checkpoint(tmp_path / 'sync.json')['marks'].keys() == {'date', 'updated_on'}
+    assert not os.path.exists(tmp_path / 'checkpoint.json')
+
+
+def test_both_backends_open_on_the_same_filters(standin, tmp_path, monkeypatch, load_dashboard):
+    monkeypatch.delenv('CHICAGO_DATA_SOURCE', raising=False)
+    monkeypatch.setattr(chicago_ingest, 'STORE_DIR', str(tmp_path / 'store'))
+    monkeypatch.setattr(chicago_ingest, 'sync', functools.partial(sync, standin_url(standin), tmp_path / 'store', PAGE_SIZE))
+    in_memory = load_dashboard('Chicago_Crime_Analysis/4a ChicagoCrimesDataVisualization.py', 'chicago_pandas')
+    monkeypatch.setenv('CHICAGO_QUERY_BACKEND', 'duckdb')
+    queried = load_dashboard('Chicago_Crime_Analysis/4a ChicagoCrimesDataVisualization.py', 'chicago_duckdb')
+
+    counts = in_memory.data['primary_type'].value_counts()
+    assert queried.data is None and queried.load_error is None
+    assert counts[in_memory.default_crime_type] == counts.max()
+    assert (queried.default_crime_type, queried.default_month) == (in_memory.default_crime_type, in_memory.default_month)
+
+
+def test_duckdb_backend_falls_back_to_pandas_without_duckdb(standin, tmp_path, monkeypatch, load_dashboard):
+    monkeypatch.delenv('CHICAGO_DATA_SOURCE', raising=False)
+    monkeypatch.setenv('CHICAGO_QUERY_BACKEND', 'duckdb')
+    monkeypatch.setitem(sys.modules, 'duckdb', None)
+    monkeypatch.setattr(chicago_ingest, 'sync', functools.partial(sync, standin_url(standin), tmp_path / 'store', PAGE_SIZE))
+
+    dashboard = load_dashboard('Chicago_Crime_Analysis/4a ChicagoCrimesDataVisualization.py', 'chicago_fallback')
+
+    assert dashboard.load_error is None and dashboard.query_connection is None
+    assert sorted(dashboard.data['id'].astype(int)) == expected_ids(standin)
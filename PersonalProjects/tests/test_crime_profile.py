@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crime_profile import DISTINCT_K, QUANTILES, TOP_K, Profile, profile_files, profile_frames
+from synthetic import chicago_frame
+
+ROWS = 20000
+
+
+@pytest.fixture(scope='module')
+def crimes():
+    data = chicago_frame(ROWS)
+    data['date'] = pd.to_datetime(data['date'])
+    # Missing values in a few columns, as the feed has
+    rng = np.random.default_rng(1)
+    for column in ['latitude', 'longitude', 'ward', 'location_description']:
+        data.loc[rng.random(ROWS) < 0.05, column] = None
+    return data
+
+
+def chunked(data, parts):
+    bounds = np.linspace(0, len(data), parts + 1).astype(int)
+    return [data.iloc[start:stop] for start, stop in zip(bounds, bounds[1:])]
+
+
+# Profiled in two halves that are merged, as profile_files merges its per-file profiles
+@pytest.fixture(scope='module')
+def profile(crimes):
+    first, second = crimes.iloc[:12000], crimes.iloc[12000:]
+    return profile_frames(chunked(first, 5)).merge(profile_frames(chunked(second, 3)))
+
+
+def test_moments_nulls_and_extremes_match_pandas(crimes, profile):
+    described = profile.describe()
+
+    assert profile.rows == len(crimes)
+    pd.testing.assert_series_equal(profile.isna(), crimes.isna().sum(), check_names=False)
+    for column in ['latitude', 'longitude', 'ward', 'district', 'beat']:
+        values = crimes[column].astype(float)
+        assert described[column]['count'] == values.count()
+        assert np.isclose(described[column]['mean'], values.mean())
+        assert np.isclose(described[column]['std'], values.std())
+        assert (described[column]['min'], described[column]['max']) == (values.min(), values.max())
+    assert (described['date']['min'], described['date']['max']) == (crimes['date'].min(), crimes['date'].max())
+
+
+def test_quantiles_are_within_a_small_rank_error(crimes, profile):
+    for column in ['latitude', 'ward', 'beat']:
+        values = np.sort(crimes[column].dropna().astype(float).to_numpy())
+        estimates = profile.columns[column].quantiles.quantiles(QUANTILES)
+        for q, estimate in zip(QUANTILES, estimates):
+            ranks = np.searchsorted(values, estimate, side='left'), np.searchsorted(values, estimate, side='right')
+            # The estimate's rank range must come within 2% of the rows of the target rank
+            assert ranks[0] - 0.02 * len(values) <= q * len(values) <= ranks[1] + 0.02 * len(values)
+
+
+def test_top_values_undercount_by_at_most_the_misra_gries_bound(crimes, profile):
+    for column in ['primary_type', 'location_description', 'block']:
+        exact = crimes[column].value_counts()
+        top = profile.value_counts(column)
+        bound = exact.sum() / (TOP_K + 1)
+        assert (top <= exact[top.index]).all() and (top >= exact[top.index] - bound).all()
+        # A value above the bound is always kept
+        assert set(exact[exact > bound].index) <= set(top.index)
+    pd.testing.assert_series_equal(profile.value_counts('primary_type'), crimes['primary_type'].value_counts(),
+                                   check_names=False, check_index_type=False)
+
+
+def test_distinct_counts_are_exact_below_k_and_close_above(crimes, profile):
+    described = profile.describe()
+    assert described['primary_type']['unique'] == crimes['primary_type'].nunique()
+    assert described['block']['unique'] == crimes['block'].nunique()
+    exact = crimes['case_number'].nunique()
+    assert exact > DISTINCT_K
+    assert abs(described['case_number']['unique'] - exact) <= 3 / np.sqrt(DISTINCT_K) * exact
+
+
+def test_correlations_match_pairwise_complete_pandas(crimes, profile):
+    numeric = profile.numeric_columns()
+
+    pd.testing.assert_frame_equal(profile.corr(), crimes[numeric].astype(float).corr(), atol=1e-9)
+
+
+def test_files_profiled_in_parallel_merge_to_one_profile(crimes, tmp_path):
+    for month, rows in crimes.groupby(crimes['date'].dt.to_period('M')):
+        rows.to_parquet(tmp_path / f'{month}.parquet')
+
+    merged = profile_files([str(tmp_path)], workers=2, chunk_rows=700)
+
+    assert isinstance(merged, Profile) and merged.rows == len(crimes)
+    pd.testing.assert_series_equal(merged.isna(), crimes.isna().sum(), check_names=False)
+    assert np.isclose(merged.describe()['latitude']['mean'], crimes['latitude'].mean())
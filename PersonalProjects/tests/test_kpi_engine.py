@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path += [PROJECT_DIR, os.path.join(PROJECT_DIR, 'benchmarks')]
+
+import kpi_engine
+from kpi_engine import (HLL_PRECISION, calculate_metrics, compute_kpis, distinct_states, hll_estimate, hll_sketch, merge_kpi_summaries,
+                        merge_states, summarize_kpis)
+from synthetic import superstore_frame
+
+
+def typed_frame(rows, seed=0):
+    data = superstore_frame(rows, seed)
+    data['Order.Date'] = pd.to_datetime(data['Order.Date'])
+    data['Ship.Date'] = pd.to_datetime(data['Ship.Date'])
+    data['Year'] = data['Order.Date'].dt.year
+    data['shippingTime'] = (data['Ship.Date'] - data['Order.Date']).dt.days
+    return data
+
+
+def year_to_date(data, year, cutoff):
+    dates = data['Order.Date']
+    return data[(data['Year'] == year) & (dates.dt.month * 100 + dates.dt.day <= cutoff.month * 100 + cutoff.day)]
+
+
+def test_latest_year_metrics_match_year_masks():
+    data = typed_frame(5000)
+    latest = data['Year'].max()
+    cutoff = data['Order.Date'].max()
+    current, previous = year_to_date(data, latest, cutoff), year_to_date(data, latest - 1, cutoff)
+
+    metrics = calculate_metrics(summarize_kpis(data))
+
+    assert metrics.name == latest
+    assert np.isclose(metrics['sales'], current['Sales'].sum())
+    assert metrics['orders'] == current['Order.ID'].nunique()
+    assert metrics['quantity'] == current['Quantity'].sum()
+    assert np.isclose(metrics['profit_margin'], current['Profit'].sum() / current['Sales'].sum() * 100)
+    assert np.isclose(metrics['avg_shipping_time'], current['shippingTime'].mean())
+    assert np.isclose(metrics['sales_growth'], (current['Sales'].sum() / previous['Sales'].sum() - 1) * 100)
+
+
+def test_merged_summaries_match_a_summary_of_all_rows():
+    data = typed_frame(4000)
+    cutoff = pd.Timestamp('2014-06-30')
+    merged = merge_kpi_summaries(summarize_kpis(data.iloc[:2500]), summarize_kpis(data.iloc[2500:]))
+
+    expected, kpis = compute_kpis(summarize_kpis(data), cutoff), compute_kpis(merged, cutoff)
+
+    pd.testing.assert_frame_equal(kpis, expected, check_dtype=False)
+
+
+# Three standard errors of a HyperLogLog estimate at the configured precision
+HLL_BOUND = 3 * 1.04 / np.sqrt(1 << HLL_PRECISION)
+
+
+@pytest.mark.parametrize('distinct', [50, 2000, 60000])
+def test_hll_estimate_is_within_its_error_bound(distinct):
+    rng = np.random.default_rng(distinct)
+    values = pd.Series('CA-' + pd.Series(rng.integers(0, distinct, distinct * 3)).astype(str))
+
+    estimate = hll_estimate(hll_sketch(values, np.zeros(len(values), dtype=np.int64), 1))[0]
+
+    assert abs(estimate - values.nunique()) <= HLL_BOUND * values.nunique()
+
+
+def test_hll_order_counts_merge_within_the_error_bound(monkeypatch):
+    monkeypatch.setattr(kpi_engine, 'DISTINCT_MODE', 'hll')
+    data = typed_frame(20000)
+    data['Month'] = data['Order.Date'].dt.month
+    exact = data.groupby('Year')['Order.ID'].nunique()
+
+    # Month partitions merged up to years, as the dashboard's order counts are
+    states = merge_states(pd.concat([distinct_states(data.iloc[:9000], ['Year', 'Month'], 'Order.ID'),
+                                     distinct_states(data.iloc[9000:], ['Year', 'Month'], 'Order.ID')]), ['Year'])
+    for year, registers in states.items():
+        assert abs(hll_estimate(registers) - exact[year]) <= HLL_BOUND * exact[year]
+    metrics = calculate_metrics(summarize_kpis(data))
+    assert abs(metrics['orders'] - exact[metrics.name]) <= HLL_BOUND * exact[metrics.name]
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from shared_frame import attach_frame, export_frame
+
+
+def mixed_frame(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    missing = rng.random(rows) < 0.1
+    return pd.DataFrame({
+        'id': np.arange(rows, dtype=np.int64),
+        'sales': rng.gamma(1.5, 160, rows).astype(np.float32),
+        'district': pd.array(np.where(missing, None, rng.integers(1, 26, rows)), dtype='Int16'),
+        'arrest': pd.array(np.where(missing, None, rng.random(rows) < 0.12), dtype='boolean'),
+        'block': pd.array(np.where(missing, None, rng.choice(['001XX W MADISON', '002XX N STATE'], rows)), dtype='string'),
+        'priority': pd.Categorical(rng.choice(['Low', 'High', 'Critical'], rows), categories=['Low', 'High', 'Critical'],
+                                   ordered=True),
+        'month': pd.Categorical(np.where(missing, None, rng.choice(['2024-01', '2024-02'], rows)), ordered=True),
+        'segment': rng.choice(['Consumer', 'Corporate'], rows).astype(object),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 86400 * 60, rows), unit='s'),
+        'updated_on': pd.date_range('2024-01-01', periods=rows, freq='h', tz='America/Chicago'),
+    })
+
+
+def test_attached_frame_matches_the_exported_one(tmp_path):
+    data = mixed_frame()
+
+    attached = attach_frame(export_frame(data, tmp_path / 'shared'))
+
+    # Strings come back as categoricals; every other column keeps its dtype, missing values and order
+    expected = data.astype({'block': 'category', 'segment': 'category'})
+    pd.testing.assert_frame_equal(attached.copy(deep=True), expected, check_categorical=False)
+    for column in ['district', 'arrest', 'priority', 'month', 'date', 'updated_on']:
+        assert attached[column].dtype == data[column].dtype
+    assert attached['priority'].cat.ordered and list(attached['priority'].cat.categories) == ['Low', 'High', 'Critical']
+    assert attached['priority'].max() == 'Critical'
+    assert attached['district'].isna().equals(data['district'].isna())
+
+
+# Columns are the mapped files themselves, not copies a worker would hold privately
+def test_attached_columns_are_read_only_maps_of_the_export(tmp_path):
+    attached = attach_frame(export_frame(mixed_frame(), tmp_path / 'shared'))
+
+    columns = [np.asarray(attached[column]) for column in ['id', 'sales', 'date']]
+    columns += [attached['district'].array._data, attached['district'].array._mask, attached['priority'].cat.codes.to_numpy()]
+    assert not any(values.flags.writeable for values in columns)
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import background_jobs
+from background_jobs import extend_fingerprint
+from synthetic import superstore_frame, write_superstore_csv
+
+SCRIPT = '3a SuperstoreDashboard_LOCAL_optimized.py'
+ROWS = 3000
+
+
+@pytest.fixture
+def superstore(tmp_path, monkeypatch, load_dashboard):
+    monkeypatch.setenv('SUPERSTORE_SOURCE', write_superstore_csv(str(tmp_path / 'superstore.csv'), ROWS))
+    monkeypatch.setenv('SUPERSTORE_SNAPSHOT', str(tmp_path / 'superstore.parquet'))
+
+    # A frame given is loaded instead of the default synthetic rows
+    def load(name, frame=None, **env):
+        if frame is not None:
+            frame.to_csv(tmp_path / 'rows.csv', index=False)
+            monkeypatch.setenv('SUPERSTORE_SOURCE', str(tmp_path / 'rows.csv'))
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        dashboard = load_dashboard(SCRIPT, name)
+        assert dashboard.load_error is None
+        return dashboard
+    return load
+
+
+# The source rows with the derived columns the cube groups by, typed by plain pandas
+def source_rows(frame):
+    data = frame.copy()
+    order_date = pd.to_datetime(data['Order.Date'])
+    data['Year'], data['Month'] = order_date.dt.year, order_date.dt.month
+    data['shippingTime'] = (pd.to_datetime(data['Ship.Date']) - order_date).dt.days
+    return data
+
+
+def sorted_cube(cube):
+    cube = cube.astype({column: str for column in cube.select_dtypes('category').columns})
+    return cube.sort_values(list(cube.columns[:7])).reset_index(drop=True)
+
+
+def appended_rows(dashboard, rows, seed=1):
+    return dashboard.type_frame(superstore_frame(rows, seed))
+
+
+# The inputs of every callback that runs on the server; clientside callbacks have no function here
+def served_inputs(app):
+    return [input['id'] for callback in app.callback_map.values() if 'callback' in callback for input in callback['inputs']]
+
+
+def test_client_mode_sends_every_view_with_the_page(superstore):
+    dashboard = superstore('superstore_client', SUPERSTORE_RENDER_MODE='client')
+
+    views = dashboard.client_views()
+    years = sorted(int(year) for year in dashboard.cube['Year'].unique())
+    assert views['version'] == dashboard.data_version
+    assert set(views['views']) == {f'{view}|{year}' for view in dashboard.CLIENT_VIEWS for year in years} | {'2012 Reports|'}
+    for view, year in dashboard.client_view_keys():
+        sent = views['views'][dashboard.client_view_key(view, year)]
+        assert sent == {'children': dashboard.dashboard_view(view, year), 'complete': True}
+    # Picking a year or a report runs no server callback besides the re-request of a partial view
+    assert sorted(served_inputs(dashboard.app)) == ['client-version', 'client-view-request', 'ready-poll', 'refresh-interval']
+
+
+def test_appended_rows_extend_the_fingerprint_without_rehashing_the_frame(superstore, monkeypatch):
+    dashboard = superstore('superstore_refresh')
+    previous = dashboard.data_version
+    hashed = []
+    monkeypatch.setattr(background_jobs, 'frame_fingerprint', lambda frame: hashed.append(len(frame)) or str(len(frame)))
+
+    dashboard.append_rows(appended_rows(dashboard, 200))
+
+    assert hashed == [200]
+    assert dashboard.data_version == extend_fingerprint(previous, dashboard.data.iloc[ROWS:]) != previous
+    assert len(dashboard.data) == ROWS + 200
+
+
+def find_component(layout, id):
+    if getattr(layout, 'id', None) == id:
+        return layout
+    children = getattr(layout, 'children', None)
+    for child in children if isinstance(children, list) else [children] if children is not None else []:
+        found = find_component(child, id)
+        if found is not None:
+            return found
+
+
+def test_pages_poll_for_refreshes_only_while_the_refresher_runs(superstore):
+    dashboard = superstore('superstore_polling')
+    assert find_component(dashboard.dashboard_layout(), 'refresh-interval').disabled
+
+    assert dashboard.start_refresher() is dashboard.refresher is not None
+    assert not find_component(dashboard.dashboard_layout(), 'refresh-interval').disabled
+
+
+def test_cube_rollups_match_a_groupby_of_the_rows(superstore):
+    frame = superstore_frame(ROWS)
+    # Rows of a country without a continent still count towards the year totals
+    frame.loc[frame.index[::50], 'Country'] = 'Atlantis'
+    dashboard = superstore('superstore_cube', frame)
+    rows = source_rows(frame)
+    measures = ['Sales', 'Profit', 'Quantity', 'Shipping.Cost', 'shippingTime']
+
+    for dimensions in [['Year'], ['Year', 'Category'], ['Year', 'Month', 'Segment'], ['Sub.Category', 'Ship.Mode']]:
+        rolled = dashboard.cube.groupby(dimensions, observed=True)[measures + ['Orders']].sum()
+        expected = rows.groupby(dimensions)[measures].sum().assign(Orders=rows.groupby(dimensions).size())
+        rolled.index, expected.index = rolled.index.map(str), expected.index.map(str)
+        pd.testing.assert_frame_equal(rolled.sort_index(), expected.sort_index(), check_dtype=False, check_index_type=False)
+    assert dashboard.cube['Continent'].isna().any()
+    assert np.isclose(dashboard.cube['Sales'].sum(), rows['Sales'].sum())
+
+
+def test_appended_rows_merge_into_what_a_rebuild_from_all_rows_gives(superstore):
+    dashboard = superstore('superstore_merge')
+    appended = superstore_frame(400, seed=1, start='2014-06-01', years=1)
+    # Categories the loaded frame has never seen
+    appended.loc[appended.index[::40], ['Segment', 'Country']] = ['Wholesale', 'Atlantis']
+
+    dashboard.append_rows(dashboard.type_frame(appended.copy()))
+    every_row, _ = dashboard.prepare_data(dashboard.type_frame(pd.concat([superstore_frame(ROWS), appended], ignore_index=True)))
+
+    assert len(dashboard.data) == len(every_row)
+    assert {'Wholesale'} <= set(dashboard.data['Segment'].cat.categories)
+    pd.testing.assert_frame_equal(sorted_cube(dashboard.cube), sorted_cube(dashboard.build_cube(every_row)), check_dtype=False,
+                                  check_categorical=False)
+    for year, points in dashboard.build_year_points(every_row).items():
+        pd.testing.assert_frame_equal(dashboard.year_points[year], points, check_dtype=False)
+    pd.testing.assert_series_equal(dashboard.metrics, dashboard.calculate_metrics(dashboard.summarize_kpis(every_row)))
+    orders = every_row.groupby(['Year', 'Continent'], observed=True)['Order.ID'].nunique()
+    for year in orders.index.levels[0]:
+        counted = dashboard.orders_by_continent(dashboard.order_partitions, year)
+        assert {str(continent): int(count) for continent, count in counted.items()} == orders[year].to_dict()
+
+
+def test_a_render_with_a_failed_figure_is_served_but_never_cached(superstore, tmp_path, monkeypatch):
+    dashboard = superstore('superstore_incomplete')
+    monkeypatch.delenv('DASHBOARD_BACKGROUND')
+    monkeypatch.setattr(dashboard, 'background_manager', background_jobs.create_manager('jobs', directory=str(tmp_path)))
+    dashboard.render_dashboard.cache_clear()
+    year = int(dashboard.metrics.name)
+
+    def failing_funnel(data):
+        raise ValueError('funnel down')
+    with monkeypatch.context() as patch:
+        patch.setattr(dashboard, 'create_funnel_chart', failing_funnel)
+        partial = dashboard.update_output_container_in_background(lambda progress: None, year, 'Management Dashboard')
+
+    assert 'Chart unavailable: funnel down' in repr(partial)
+    assert dashboard.render_dashboard.cache_info().currsize == 0
+    assert len(dashboard.background_manager.handle) == 0
+    complete = dashboard.update_output_container_in_background(lambda progress: None, year, 'Management Dashboard')
+    assert 'Chart unavailable' not in repr(complete)
+    assert complete == dashboard.update_output_container(year, 'Management Dashboard')
+    assert len(dashboard.background_manager.handle) == 1